@@ -5,3 +5,6 @@ class ArticuloConfig(AppConfig):
     """Configuración de la aplicación articulo."""
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'articulo'
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
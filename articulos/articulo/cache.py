@@ -0,0 +1,111 @@
+import uuid
+from typing import Iterable, Optional
+from django.conf import settings
+from django.core.cache import cache
+from django.forms.models import model_to_dict
+from .models import Articulo
+
+
+# Se incrementa cuando cambia el formato del artículo guardado en caché,
+# para no leer entradas con el formato anterior.
+VERSION = 3
+
+CLAVE_ACIERTOS = f'articulo:v{VERSION}:cache:aciertos'
+CLAVE_FALLOS = f'articulo:v{VERSION}:cache:fallos'
+
+
+def clave_articulo(articulo_id) -> str:
+    """Clave de caché de un artículo."""
+    return f'articulo:v{VERSION}:{articulo_id}'
+
+
+def _timeout() -> int:
+    return getattr(settings, 'ARTICULOS_CACHE_TIMEOUT', 300)
+
+
+def _contar(clave: str, cantidad: int) -> None:
+    """Incrementa un contador de la caché."""
+    if not cantidad:
+        return
+    cache.add(clave, 0, timeout=None)
+    try:
+        cache.incr(clave, cantidad)
+    except ValueError:
+        # El contador se expulsó entre `add` e `incr`
+        cache.set(clave, cantidad, timeout=None)
+
+
+def _marca_invalidacion() -> tuple:
+    """Valor que deja una escritura en lugar del artículo: cuenta como
+    fallo y es distinto en cada invalidación."""
+    return ('invalidado', uuid.uuid4().hex)
+
+
+def serializar(articulo: Articulo) -> dict:
+    """Representación del artículo que se guarda en caché."""
+    data = model_to_dict(articulo)
+    data['fecha_actualizacion'] = articulo.fecha_actualizacion
+    return data
+
+
+def obtener_articulo(articulo_id) -> Optional[dict]:
+    """Obtiene un artículo de la caché o, si no está, de la base de datos.
+
+    Devuelve `None` si el artículo no existe.
+    """
+    return obtener_articulos([articulo_id]).get(articulo_id)
+
+
+def obtener_articulos(articulo_ids: Iterable[int]) -> dict:
+    """Obtiene varios artículos de la caché, indexados por ID.
+
+    Los que no están en caché se leen con una sola consulta `id__in` y se
+    guardan para las siguientes lecturas, salvo los que se han invalidado
+    mientras se leían: la fila leída puede ser anterior a la escritura.
+    """
+    claves = {clave_articulo(articulo_id): articulo_id
+              for articulo_id in articulo_ids}
+    entradas = cache.get_many(list(claves))
+    articulos = {claves[clave]: data for clave, data in entradas.items()
+                 if not isinstance(data, tuple)}
+    faltantes = [articulo_id for articulo_id in claves.values()
+                 if articulo_id not in articulos]
+    _contar(CLAVE_ACIERTOS, len(articulos))
+    _contar(CLAVE_FALLOS, len(faltantes))
+
+    if faltantes:
+        leidos = {articulo.id: serializar(articulo)
+                  for articulo in Articulo.objects.filter(id__in=faltantes)}
+        # Una escritura durante la lectura habrá cambiado la entrada
+        claves_leidas = [clave_articulo(articulo_id) for articulo_id in leidos]
+        actuales = cache.get_many(claves_leidas)
+        cache.set_many({clave: leidos[claves[clave]]
+                        for clave in claves_leidas
+                        if actuales.get(clave) == entradas.get(clave)},
+                       timeout=_timeout())
+        articulos.update(leidos)
+    return articulos
+
+
+def invalidar_articulo(articulo_id) -> None:
+    """Invalida un artículo de la caché.
+
+    En lugar de borrarlo se deja una marca nueva, así una lectura de la
+    base de datos que empezó antes no puede volver a guardar la fila
+    anterior.
+    """
+    cache.set(clave_articulo(articulo_id), _marca_invalidacion(),
+              timeout=_timeout())
+
+
+def estadisticas() -> dict:
+    """Aciertos, fallos y tasa de aciertos de la caché de artículos."""
+    contadores = cache.get_many([CLAVE_ACIERTOS, CLAVE_FALLOS])
+    aciertos = contadores.get(CLAVE_ACIERTOS, 0)
+    fallos = contadores.get(CLAVE_FALLOS, 0)
+    total = aciertos + fallos
+    return {
+        'aciertos': aciertos,
+        'fallos': fallos,
+        'tasa_aciertos': aciertos / total if total else 0.0,
+    }
@@ -1,8 +1,15 @@
-from decimal import Decimal
+from decimal import ROUND_HALF_UP, Decimal
 from django.db import models
 from django.utils import timezone
 
 
+def etag_articulo(articulo_id, version, variante: str = '') -> str:
+    """ETag fuerte de la representación de un artículo."""
+    if variante:
+        return f'"{articulo_id}-{version}-{variante}"'
+    return f'"{articulo_id}-{version}"'
+
+
 class Articulo(models.Model):
     """Modelo para los artículos"""
 
@@ -12,11 +19,42 @@ class Articulo(models.Model):
     precio_sin_impuestos = models.DecimalField(max_digits=10, decimal_places=2)
     impuesto_aplicable = models.DecimalField(max_digits=5, decimal_places=2)
     fecha_creacion = models.DateTimeField(default=timezone.now)
+    # Cambian en cada guardado; sirven de validadores HTTP (ETag y
+    # Last-Modified)
+    version = models.PositiveIntegerField(default=1)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Recorrido ordenado del feed de cambios
+            models.Index(fields=['fecha_actualizacion', 'id'],
+                         name='articulo_cambios_idx'),
+        ]
 
     def precio_con_impuestos(self) -> Decimal:
-        """Calcula el precio con impuestos"""
-        return self.precio_sin_impuestos + (self.precio_sin_impuestos
-                                            * self.impuesto_aplicable / 100)
+        """Calcula el precio con impuestos, redondeado al céntimo con los
+        medios hacia arriba como en Pedidos."""
+        precio = self.precio_sin_impuestos + (self.precio_sin_impuestos
+                                              * self.impuesto_aplicable / 100)
+        return precio.quantize(Decimal('0.01'), ROUND_HALF_UP)
+
+    def save(self, *args, **kwargs) -> None:
+        """Guarda el artículo incrementando su versión.
+
+        La versión se incrementa en la base de datos: dos guardados a la
+        vez nunca dejan la misma versión (y el mismo ETag) a dos contenidos
+        distintos. Un guardado parcial también actualiza la fecha, para que
+        el cambio llegue al feed y a Last-Modified.
+        """
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        self.version = models.F('version') + 1
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {
+                *kwargs['update_fields'], 'version', 'fecha_actualizacion'}
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=['version'])
 
     def __str__(self) -> str:
         return self.nombre
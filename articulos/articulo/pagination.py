@@ -0,0 +1,92 @@
+import datetime
+from typing import Iterator, Optional, Tuple
+from django.db.models import Q, QuerySet
+
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+MICROSEGUNDO = datetime.timedelta(microseconds=1)
+
+
+class PaginacionInvalida(ValueError):
+    """Los parámetros de paginación de la petición no son válidos."""
+
+
+def paginar_por_id(queryset: QuerySet, params, limite_defecto: int,
+                   limite_maximo: int) -> Tuple[list, Optional[str]]:
+    """Pagina un queryset de `.values()` por cursor (keyset) sobre `id`.
+
+    Lee `cursor` y `limit` de `params` y devuelve las filas de la página
+    junto al cursor de la página siguiente (`None` si es la última).
+    """
+    try:
+        limite = int(params.get('limit', limite_defecto))
+        cursor = params.get('cursor')
+        cursor = int(cursor) if cursor else None
+    except (TypeError, ValueError):
+        raise PaginacionInvalida('El cursor y limit deben ser enteros')
+    if limite <= 0:
+        raise PaginacionInvalida('limit debe ser mayor que 0')
+    limite = min(limite, limite_maximo)
+
+    queryset = queryset.order_by('id')
+    if cursor is not None:
+        queryset = queryset.filter(id__gt=cursor)
+
+    # Se pide una fila de más para saber si hay página siguiente
+    filas = list(queryset[:limite + 1])
+    if len(filas) > limite:
+        filas = filas[:limite]
+        return filas, str(filas[-1]['id'])
+    return filas, None
+
+
+def iterar_por_bloques(queryset: QuerySet,
+                       chunk_size: int = 1000) -> Iterator[dict]:
+    """Recorre un queryset de `.values()` por bloques de `id` creciente.
+
+    Cada bloque es una consulta `WHERE id > ultimo LIMIT chunk_size`, así
+    la memoria usada no depende del tamaño de la tabla aunque el driver
+    de MySQL no permita cursores en servidor.
+    """
+    ultimo_id = 0
+    while True:
+        bloque = list(queryset.filter(id__gt=ultimo_id)
+                      .order_by('id')[:chunk_size])
+        if not bloque:
+            return
+        yield from bloque
+        ultimo_id = bloque[-1]['id']
+
+
+def cursor_cambios(fecha: datetime.datetime, articulo_id: int) -> str:
+    """Cursor del feed de cambios: `<microsegundos>_<id>`."""
+    return f"{(fecha - EPOCH) // MICROSEGUNDO}_{articulo_id}"
+
+
+def paginar_cambios(queryset: QuerySet, cursor: Optional[str], limite: int,
+                    hasta: datetime.datetime) -> Tuple[list, Optional[str]]:
+    """Devuelve las filas modificadas después de `cursor`.
+
+    Las filas se recorren en orden `(fecha_actualizacion, id)`, que está
+    indexado, y sólo se incluyen las modificadas antes de `hasta`. El
+    queryset debe ser de `.values()` e incluir `id` y
+    `fecha_actualizacion`. Devuelve también el cursor de la última fila
+    (o el mismo cursor si no hay cambios).
+    """
+    if cursor:
+        try:
+            microsegundos, articulo_id = (int(parte)
+                                          for parte in cursor.split('_'))
+            fecha = EPOCH + microsegundos * MICROSEGUNDO
+        except (ValueError, OverflowError):
+            raise PaginacionInvalida('Cursor no válido')
+        queryset = queryset.filter(
+            Q(fecha_actualizacion__gt=fecha)
+            | Q(fecha_actualizacion=fecha, id__gt=articulo_id))
+
+    filas = list(queryset.filter(fecha_actualizacion__lte=hasta)
+                 .order_by('fecha_actualizacion', 'id')[:limite])
+    if filas:
+        cursor = cursor_cambios(filas[-1]['fecha_actualizacion'],
+                                filas[-1]['id'])
+    return filas, cursor
@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .cache import invalidar_articulo
+from .models import Articulo
+
+
+@receiver(post_save, sender=Articulo)
+@receiver(post_delete, sender=Articulo)
+def invalidar_cache_articulo(sender, instance, **kwargs) -> None:
+    """Invalida la caché de un artículo cuando se modifica."""
+    articulo_id = instance.id
+    invalidar_articulo(articulo_id)
+    if transaction.get_connection().in_atomic_block:
+        # Hasta que se confirme, las lecturas todavía ven la fila anterior
+        transaction.on_commit(lambda: invalidar_articulo(articulo_id))
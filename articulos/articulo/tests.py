@@ -1,10 +1,16 @@
 import json
-from django.test import TestCase
+import tempfile
+from decimal import Decimal
+from unittest.mock import patch
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth.models import User
 from rest_framework.test import APIClient
 from rest_framework.authtoken.models import Token
+from . import cache as cache_articulos
 from .models import Articulo
+from .views import ArticuloListView
 
 
 class ArticuloTestCase(TestCase):
@@ -14,6 +20,8 @@ class ArticuloTestCase(TestCase):
         """Este método se ejecuta antes de cada prueba para crear algunos
         artículos de prueba."""
 
+        cache.clear()
+
         # Crear un usuario y autenticarse
         self.user = User.objects.create_user(
             username='testuser',
@@ -54,11 +62,57 @@ class ArticuloTestCase(TestCase):
         self.assertEqual(response.status_code, 201)
         self.assertEqual(Articulo.objects.count(), 3)
 
+    def test_precio_con_impuestos(self) -> None:
+        """Prueba que el precio con impuestos se redondea al céntimo."""
+        articulo = Articulo(precio_sin_impuestos=Decimal('0.50'),
+                            impuesto_aplicable=Decimal('21.00'))
+        self.assertEqual(articulo.precio_con_impuestos(), Decimal('0.61'))
+
     def test_listar_articulos(self) -> None:
         """Prueba que se puedan listar todos los artículos."""
         response = self.client.get(reverse('listar_articulos'))
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.json()), 2)
+        self.assertEqual(len(response.json()['articulos']), 2)
+        self.assertIsNone(response.json()['siguiente_cursor'])
+
+    def test_listar_articulos_campos(self) -> None:
+        """Prueba listar sólo los campos pedidos con `?fields=`."""
+        response = self.client.get(reverse('listar_articulos'),
+                                   {'fields': 'nombre'})
+        self.assertEqual([set(a) for a in response.json()['articulos']],
+                         [{'id', 'nombre'}] * 2)
+
+    def test_listar_articulos_paginado(self) -> None:
+        """Prueba recorrer el catálogo página a página con el cursor."""
+        response = self.client.get(reverse('listar_articulos'), {'limit': 1})
+        self.assertEqual(
+            [a['referencia'] for a in response.json()['articulos']],
+            ['ART123'])
+
+        response = self.client.get(reverse('listar_articulos'), {
+            'limit': 1, 'cursor': response.json()['siguiente_cursor']})
+        self.assertEqual(
+            [a['referencia'] for a in response.json()['articulos']],
+            ['ART124'])
+        self.assertIsNone(response.json()['siguiente_cursor'])
+
+    def test_listar_articulos_limite_maximo(self) -> None:
+        """Prueba que `limit` no supere el máximo del servidor."""
+        with patch.object(ArticuloListView, 'max_limit', 1):
+            response = self.client.get(reverse('listar_articulos'),
+                                       {'limit': 1000})
+        self.assertEqual(len(response.json()['articulos']), 1)
+
+    def test_listar_articulos_stream(self) -> None:
+        """Prueba enviar el catálogo completo en NDJSON por bloques."""
+        with patch.object(ArticuloListView, 'chunk_size', 1):
+            response = self.client.get(reverse('listar_articulos'),
+                                       {'stream': 'ndjson'})
+            lineas = b''.join(response.streaming_content).decode()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(
+            [json.loads(linea)['referencia'] for linea in lineas.splitlines()],
+            ['ART123', 'ART124'])
 
     def test_obtener_articulo(self) -> None:
         """Prueba que se pueda obtener un artículo por su ID."""
@@ -68,6 +122,24 @@ class ArticuloTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()['nombre'], articulo.nombre)
 
+    def test_obtener_articulo_campos(self) -> None:
+        """Prueba que `?fields=` sólo devuelva los campos pedidos."""
+        articulo = Articulo.objects.first()
+        response = self.client.get(
+            reverse('detalle_articulo', args=[articulo.id]),
+            {'fields': 'referencia,precio_sin_impuestos'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()),
+                         {'id', 'referencia', 'precio_sin_impuestos'})
+
+    def test_obtener_articulo_campos_invalidos(self) -> None:
+        """Prueba que un campo desconocido en `?fields=` devuelva un 400."""
+        articulo = Articulo.objects.first()
+        response = self.client.get(
+            reverse('detalle_articulo', args=[articulo.id]),
+            {'fields': 'nombre,inexistente'})
+        self.assertEqual(response.status_code, 400)
+
     def test_editar_articulo(self) -> None:
         """Prueba que se pueda editar un artículo por su ID."""
         articulo = Articulo.objects.first()
@@ -86,7 +158,253 @@ class ArticuloTestCase(TestCase):
         articulo.refresh_from_db()
         self.assertEqual(articulo.nombre, 'Artículo Editado')
 
+    def test_obtener_articulo_cacheado(self) -> None:
+        """Prueba que las lecturas repetidas no consulten la base de
+        datos."""
+        articulo = Articulo.objects.first()
+        url = reverse('detalle_articulo', args=[articulo.id])
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'fields': 'nombre'})
+        self.assertEqual(response.json()['nombre'], articulo.nombre)
+
+        estadisticas = self.client.get(
+            reverse('estadisticas_cache_articulos')).json()
+        self.assertEqual(estadisticas['aciertos'], 1)
+        self.assertEqual(estadisticas['fallos'], 1)
+
+    def test_editar_articulo_invalida_cache(self) -> None:
+        """Prueba que editar un artículo invalide su entrada en caché."""
+        articulo = Articulo.objects.first()
+        url = reverse('detalle_articulo', args=[articulo.id])
+        self.client.get(url)
+        self.client.put(url, data=json.dumps({
+            'referencia': articulo.referencia,
+            'nombre': 'Nombre Nuevo',
+            'descripcion': articulo.descripcion,
+            'precio_sin_impuestos': 100,
+            'impuesto_aplicable': 21
+        }), content_type='application/json')
+        self.assertEqual(self.client.get(url).json()['nombre'],
+                         'Nombre Nuevo')
+
+    def test_cache_no_guarda_lectura_anterior_a_edicion(self) -> None:
+        """Prueba que una lectura que empezó antes de una edición no deja
+        la versión anterior en caché."""
+        articulo = Articulo.objects.first()
+        serializar = cache_articulos.serializar
+
+        def editar_durante_la_lectura(leido):
+            editado = Articulo.objects.get(id=leido.id)
+            editado.nombre = 'Nombre Nuevo'
+            editado.save()
+            return serializar(leido)
+
+        with patch.object(cache_articulos, 'serializar',
+                          side_effect=editar_durante_la_lectura):
+            anterior = cache_articulos.obtener_articulo(articulo.id)
+        self.assertEqual(anterior['version'], 1)
+
+        actual = cache_articulos.obtener_articulo(articulo.id)
+        self.assertEqual((actual['nombre'], actual['version']),
+                         ('Nombre Nuevo', 2))
+
+    def test_cache_en_fichero(self) -> None:
+        """Prueba la caché de artículos con el backend de ficheros."""
+        articulo = Articulo.objects.first()
+        url = reverse('detalle_articulo', args=[articulo.id])
+        with tempfile.TemporaryDirectory() as directorio, override_settings(
+                CACHES={'default': {
+                    'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                    'LOCATION': directorio}}):
+            self.client.get(url)
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+        self.assertEqual(response.json()['referencia'], articulo.referencia)
+
+    def test_version_incrementada_al_editar(self) -> None:
+        """Prueba que cada guardado incremente la versión del artículo."""
+        articulo = Articulo.objects.first()
+        self.assertEqual(articulo.version, 1)
+        articulo.nombre = 'Otro nombre'
+        articulo.save()
+        articulo.refresh_from_db()
+        self.assertEqual(articulo.version, 2)
+
+    def test_version_guardados_concurrentes(self) -> None:
+        """Prueba que dos guardados de copias leídas a la vez dejan
+        versiones distintas."""
+        primera = Articulo.objects.first()
+        segunda = Articulo.objects.get(id=primera.id)
+        primera.nombre = 'Nombre A'
+        primera.save()
+        segunda.nombre = 'Nombre B'
+        segunda.save()
+        self.assertEqual((primera.version, segunda.version), (2, 3))
+        self.assertEqual(Articulo.objects.get(id=primera.id).version, 3)
+
+    def test_guardado_parcial_actualiza_fecha(self) -> None:
+        """Prueba que un guardado con `update_fields` también cambia la
+        fecha de actualización, que ordena el feed de cambios."""
+        articulo = Articulo.objects.first()
+        anterior = articulo.fecha_actualizacion
+        articulo.nombre = 'Otro nombre'
+        articulo.save(update_fields=['nombre'])
+        guardado = Articulo.objects.get(id=articulo.id)
+        self.assertEqual(guardado.version, 2)
+        self.assertGreater(guardado.fecha_actualizacion, anterior)
+
+    def test_obtener_articulo_condicional(self) -> None:
+        """Prueba que un ETag vigente se responda con un 304 sin cuerpo."""
+        articulo = Articulo.objects.first()
+        url = reverse('detalle_articulo', args=[articulo.id])
+        response = self.client.get(url)
+        self.assertEqual(response['ETag'], f'"{articulo.id}-1"')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        articulo.save()
+        response = self.client.get(url,
+                                   HTTP_IF_NONE_MATCH=f'"{articulo.id}-1"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['version'], 2)
+
+    def test_etag_depende_de_campos(self) -> None:
+        """Prueba que cada `?fields=` tenga su propio ETag."""
+        articulo = Articulo.objects.first()
+        url = reverse('detalle_articulo', args=[articulo.id])
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, {'fields': 'nombre'},
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_listar_articulos_condicional(self) -> None:
+        """Prueba el 304 de una página de la lista sin leer las filas."""
+        url = reverse('listar_articulos')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Articulo.objects.first().save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_listar_articulos_condicional_nuevo_cursor(self) -> None:
+        """Prueba que una última página llena cambia de ETag cuando se
+        crea un artículo detrás y la página pasa a tener cursor."""
+        url = reverse('listar_articulos')
+        limite = Articulo.objects.count()
+        response = self.client.get(url, {'limit': limite})
+        self.assertIsNone(response.json()['siguiente_cursor'])
+
+        Articulo.objects.create(referencia="ART999", nombre="Nuevo",
+                                precio_sin_impuestos=1,
+                                impuesto_aplicable=21)
+        response = self.client.get(url, {'limit': limite},
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.json()['siguiente_cursor'])
+
+    def test_obtener_articulos_lote_sin_cambios(self) -> None:
+        """Prueba que el lote no reenvíe los artículos ya conocidos."""
+        articulo = Articulo.objects.first()
+        otro = Articulo.objects.last()
+        response = self.client.post(
+            reverse('lote_articulos'),
+            data=json.dumps({'ids': [articulo.id, otro.id],
+                             'versiones': {str(articulo.id): 1,
+                                           str(otro.id): 0}}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.json()['sin_cambios'], [articulo.id])
+        self.assertEqual(list(response.json()['articulos']), [str(otro.id)])
+
+    @override_settings(ARTICULOS_CAMBIOS_MARGEN=0)
+    def test_feed_de_cambios(self) -> None:
+        """Prueba recorrer el feed de cambios y recibir sólo lo nuevo."""
+        url = reverse('cambios_articulos')
+        response = self.client.get(url, {'limit': 1})
+        self.assertEqual(len(response.json()['articulos']), 1)
+        self.assertTrue(response.json()['hay_mas'])
+
+        response = self.client.get(url, {
+            'desde': response.json()['siguiente_cursor']})
+        self.assertEqual(len(response.json()['articulos']), 1)
+        self.assertFalse(response.json()['hay_mas'])
+        cursor = response.json()['siguiente_cursor']
+
+        response = self.client.get(url, {'desde': cursor})
+        self.assertEqual(response.json()['articulos'], [])
+        self.assertEqual(response.json()['siguiente_cursor'], cursor)
+
+        articulo = Articulo.objects.first()
+        articulo.nombre = 'Modificado'
+        articulo.save()
+        response = self.client.get(url, {'desde': cursor,
+                                         'fields': 'nombre'})
+        self.assertEqual(response.json()['articulos'],
+                         [{'id': articulo.id, 'nombre': 'Modificado'}])
+
+    def test_feed_de_cambios_margen(self) -> None:
+        """Prueba que los cambios más recientes que el margen no se
+        publiquen todavía."""
+        with override_settings(ARTICULOS_CAMBIOS_MARGEN=3600):
+            response = self.client.get(reverse('cambios_articulos'))
+        self.assertEqual(response.json()['articulos'], [])
+
+    def test_feed_de_cambios_cursor_invalido(self) -> None:
+        """Prueba que un cursor mal formado devuelva un 400."""
+        response = self.client.get(reverse('cambios_articulos'),
+                                   {'desde': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('cambios_articulos'),
+                                   {'desde': '99999999999999999999_1'})
+        self.assertEqual(response.status_code, 400)
+
     def test_articulo_no_existente(self) -> None:
         "Prueba que la solicitud de un artículo no existente retorne un 404."
         response = self.client.get(reverse('detalle_articulo', args=[999]))
         self.assertEqual(response.status_code, 404)
+
+    def test_obtener_articulos_lote(self) -> None:
+        """Prueba que se obtengan varios artículos con una sola consulta."""
+        ids = list(Articulo.objects.values_list('id', flat=True))
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                reverse('lote_articulos'),
+                {'ids': ','.join(str(i) for i in ids + [999])})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.json()['articulos']),
+                         sorted(str(i) for i in ids))
+        self.assertEqual(response.json()['no_encontrados'], [999])
+
+    def test_obtener_articulos_lote_post(self) -> None:
+        """Prueba la variante POST de la consulta por lotes."""
+        articulo = Articulo.objects.first()
+        response = self.client.post(
+            reverse('lote_articulos'),
+            data=json.dumps({'ids': [articulo.id]}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['articulos'][str(articulo.id)]['referencia'],
+            articulo.referencia)
+
+    def test_obtener_articulos_lote_ids_invalidos(self) -> None:
+        """Prueba que IDs no numéricos devuelvan un 400."""
+        response = self.client.get(reverse('lote_articulos'), {'ids': 'a,b'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse('lote_articulos'),
+                                    data=json.dumps({'ids': [True]}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
@@ -1,11 +1,61 @@
+import datetime
+import hashlib
 import json
+from typing import Optional
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework import status
-from django.http import JsonResponse
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, JsonResponse, \
+    StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.forms.models import model_to_dict
-from .models import Articulo
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+from django.utils.http import http_date
+from . import cache as cache_articulos
+from .fields import CamposInvalidos, campos_solicitados
+from .models import Articulo, etag_articulo
+from .pagination import PaginacionInvalida, iterar_por_bloques, \
+    paginar_cambios, paginar_por_id
+
+
+# Campos que se pueden pedir con `?fields=`
+CAMPOS_ARTICULO = [field.attname for field in Articulo._meta.concrete_fields]
+
+
+def _variante(campos: Optional[list]) -> str:
+    """Identifica la representación que corresponde a `?fields=`."""
+    if campos is None:
+        return ''
+    return hashlib.sha1(','.join(campos).encode()).hexdigest()[:8]
+
+
+def _respuesta_condicional(request, etag: str, fecha_actualizacion,
+                           contenido) -> HttpResponse:
+    """Responde 304 si el cliente tiene la versión actual del recurso.
+
+    `contenido` es una función que sólo se llama, para serializar la
+    respuesta, cuando hay que enviar el cuerpo completo.
+    """
+    ultima_modificacion = (int(fecha_actualizacion.timestamp())
+                           if fecha_actualizacion else None)
+    response = get_conditional_response(request, etag=etag,
+                                        last_modified=ultima_modificacion)
+    if response is None:
+        response = JsonResponse(contenido())
+    response['ETag'] = etag
+    if ultima_modificacion is not None:
+        response['Last-Modified'] = http_date(ultima_modificacion)
+    return response
+
+
+def _proyectar(articulo: dict, campos: Optional[list]) -> dict:
+    """Deja sólo los `campos` pedidos de un artículo serializado."""
+    if campos is None:
+        return articulo
+    return {campo: articulo[campo] for campo in campos}
 
 
 class ArticuloCreateView(APIView):
@@ -51,10 +101,29 @@ class ArticuloDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, id) -> JsonResponse:
-        """Obtiene el detalle de un artículo."""
+        """Obtiene el detalle de un artículo.
 
-        articulo = get_object_or_404(Articulo, id=id)
-        return JsonResponse(model_to_dict(articulo))
+        El artículo se sirve desde la caché y sólo se lee de la base de
+        datos si no está en ella. Con `?fields=` sólo se devuelven los
+        campos pedidos. Responde 304 a `If-None-Match` y
+        `If-Modified-Since` si el artículo no ha cambiado.
+        """
+
+        try:
+            campos = campos_solicitados(request.GET, CAMPOS_ARTICULO)
+        except CamposInvalidos as e:
+            return JsonResponse({'error': str(e)},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        articulo = cache_articulos.obtener_articulo(id)
+        if articulo is None:
+            raise Http404
+        return _respuesta_condicional(
+            request,
+            etag_articulo(articulo['id'], articulo['version'],
+                          _variante(campos)),
+            articulo['fecha_actualizacion'],
+            lambda: _proyectar(articulo, campos))
 
     def put(self, request, id) -> JsonResponse:
         """Actualiza los datos de un artículo."""
@@ -75,8 +144,187 @@ class ArticuloListView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    # Tamaño de página por defecto y máximo permitido con `?limit=`
+    limit = 100
+    max_limit = 1000
+    # Filas leídas por consulta en el modo `?stream=ndjson`
+    chunk_size = 1000
+
+    def get(self, request) -> JsonResponse:
+        """Obtiene una página de artículos.
+
+        La página siguiente se pide con `?cursor=<siguiente_cursor>`. Con
+        `?stream=ndjson` se envía el catálogo completo, un artículo por
+        línea. Con `?fields=` sólo se leen los campos pedidos. Cada página
+        lleva ETag y Last-Modified y responde 304 si no ha cambiado.
+        """
+        try:
+            campos = campos_solicitados(request.GET, CAMPOS_ARTICULO)
+        except CamposInvalidos as e:
+            return JsonResponse({'error': str(e)},
+                                status=status.HTTP_400_BAD_REQUEST)
+        articulos = Articulo.objects.values(*(campos or []))
+
+        if request.GET.get('stream') == 'ndjson':
+            return StreamingHttpResponse(
+                (json.dumps(articulo, cls=DjangoJSONEncoder) + '\n'
+                 for articulo in iterar_por_bloques(articulos,
+                                                    self.chunk_size)),
+                content_type='application/x-ndjson')
+
+        # Primero se leen sólo los validadores de la página; las filas
+        # completas sólo se leen si el cliente no tiene ya esta versión.
+        try:
+            validadores, siguiente_cursor = paginar_por_id(
+                Articulo.objects.values('id', 'version',
+                                        'fecha_actualizacion'),
+                request.GET, self.limit, self.max_limit)
+        except PaginacionInvalida as e:
+            return JsonResponse({'error': str(e)},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        # El cursor forma parte de la página: una última página llena deja
+        # de serlo cuando se crea un artículo detrás
+        huella = hashlib.sha1(
+            f"{_variante(campos)}|{siguiente_cursor}|".encode())
+        for validador in validadores:
+            huella.update(f"{validador['id']}:{validador['version']},"
+                          .encode())
+        fecha_actualizacion = max(
+            (validador['fecha_actualizacion'] for validador in validadores),
+            default=None)
+
+        def contenido() -> dict:
+            return {
+                'articulos': list(articulos.filter(
+                    id__in=[validador['id'] for validador in validadores])
+                    .order_by('id')),
+                'siguiente_cursor': siguiente_cursor
+            }
+
+        return _respuesta_condicional(request, f'"{huella.hexdigest()}"',
+                                      fecha_actualizacion, contenido)
+
+
+class ArticuloBatchView(APIView):
+    """Vista para obtener varios artículos en una sola petición."""
+
+    permission_classes = [IsAuthenticated]
+
+    # Número máximo de IDs por petición
+    MAX_IDS = 1000
+
+    def get(self, request) -> JsonResponse:
+        """Obtiene los artículos de `?ids=1,2,3`."""
+        try:
+            ids = [int(i) for i in request.GET.get('ids', '').split(',')
+                   if i.strip()]
+        except ValueError:
+            return JsonResponse({'error': 'Los IDs deben ser enteros'},
+                                status=status.HTTP_400_BAD_REQUEST)
+        return self._lote(ids, request.GET)
+
+    def post(self, request) -> JsonResponse:
+        """Obtiene los artículos de `{"ids": [...]}` para listas largas.
+
+        Si se envía `"versiones": {"<id>": <version>}`, los artículos que
+        siguen en esa versión se devuelven en `sin_cambios` en lugar de
+        enviarse completos.
+        """
+        data = json.loads(request.body)
+        ids = data.get('ids', [])
+        versiones = data.get('versiones', {})
+        if (not isinstance(ids, list)
+                or not all(isinstance(i, int) and not isinstance(i, bool)
+                           for i in ids)
+                or not isinstance(versiones, dict)):
+            return JsonResponse({'error': 'Los IDs deben ser enteros'},
+                                status=status.HTTP_400_BAD_REQUEST)
+        return self._lote(ids, request.GET, versiones)
+
+    def _lote(self, ids: list, params,
+              versiones: Optional[dict] = None) -> JsonResponse:
+        """Busca los artículos en la caché y los que faltan con una sola
+        consulta `id__in`."""
+        try:
+            campos = campos_solicitados(params, CAMPOS_ARTICULO)
+        except CamposInvalidos as e:
+            return JsonResponse({'error': str(e)},
+                                status=status.HTTP_400_BAD_REQUEST)
+        if not ids:
+            return JsonResponse({'error': 'Debe indicar al menos un ID'},
+                                status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.MAX_IDS:
+            return JsonResponse(
+                {'error': f'No se pueden pedir más de {self.MAX_IDS} IDs'},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        encontrados = cache_articulos.obtener_articulos(ids)
+        versiones = versiones or {}
+        sin_cambios = [articulo_id for articulo_id, articulo
+                       in encontrados.items()
+                       if versiones.get(str(articulo_id))
+                       == articulo['version']]
+        return JsonResponse({
+            'articulos': {articulo_id: _proyectar(articulo, campos)
+                          for articulo_id, articulo in encontrados.items()
+                          if articulo_id not in sin_cambios},
+            'sin_cambios': sin_cambios,
+            'no_encontrados': [i for i in dict.fromkeys(ids)
+                               if i not in encontrados],
+        })
+
+
+class ArticuloCacheStatsView(APIView):
+    """Vista para consultar las métricas de la caché de artículos."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request) -> JsonResponse:
+        """Obtiene los aciertos y fallos de la caché de artículos."""
+        return JsonResponse(cache_articulos.estadisticas())
+
+
+class ArticuloCambiosView(APIView):
+    """Vista del feed de cambios del catálogo."""
+
+    permission_classes = [IsAuthenticated]
+
+    # Tamaño de página por defecto y máximo permitido con `?limit=`
+    limit = 100
+    max_limit = 1000
+
     def get(self, request) -> JsonResponse:
-        """Obtiene todos los artículos."""
-        articulos = Articulo.objects.all()
-        articulos_json = list(articulos.values())
-        return JsonResponse(articulos_json, safe=False)
+        """Obtiene los artículos creados o modificados después de
+        `?desde=<cursor>`.
+
+        Sin cursor se recorre el catálogo completo. El cliente guarda
+        `siguiente_cursor` y lo envía en la siguiente consulta; mientras
+        `hay_mas` sea verdadero puede pedir la página siguiente
+        inmediatamente. Los cambios de los últimos
+        `ARTICULOS_CAMBIOS_MARGEN` segundos no se incluyen todavía, para no
+        saltarse transacciones que aún no han confirmado.
+        """
+        try:
+            campos = campos_solicitados(request.GET, CAMPOS_ARTICULO)
+            limite = int(request.GET.get('limit', self.limit))
+            if limite <= 0:
+                raise PaginacionInvalida('limit debe ser mayor que 0')
+            columnas = (campos + ['fecha_actualizacion']
+                        if campos and 'fecha_actualizacion' not in campos
+                        else campos or [])
+            hasta = timezone.now() - datetime.timedelta(
+                seconds=settings.ARTICULOS_CAMBIOS_MARGEN)
+            articulos, siguiente_cursor = paginar_cambios(
+                Articulo.objects.values(*columnas), request.GET.get('desde'),
+                min(limite, self.max_limit), hasta)
+        except (CamposInvalidos, PaginacionInvalida, ValueError) as e:
+            return JsonResponse({'error': str(e)},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        return JsonResponse({
+            'articulos': [_proyectar(articulo, campos)
+                          for articulo in articulos],
+            'siguiente_cursor': siguiente_cursor,
+            'hay_mas': len(articulos) == min(limite, self.max_limit),
+        })
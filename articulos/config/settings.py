@@ -94,6 +94,20 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Memoria local por defecto; p. ej. CACHE_URL=filecache:///tmp/articulos
+
+CACHES = {
+    'default': env.cache_url('CACHE_URL', default='locmemcache://'),
+}
+
+# Segundos que un artículo permanece en caché
+ARTICULOS_CACHE_TIMEOUT = env.int('ARTICULOS_CACHE_TIMEOUT', default=300)
+
+# Segundos de margen antes de publicar un cambio en el feed de cambios
+ARTICULOS_CAMBIOS_MARGEN = env.int('ARTICULOS_CAMBIOS_MARGEN', default=2)
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
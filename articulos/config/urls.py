@@ -20,7 +20,8 @@ from drf_yasg import openapi
 from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, \
     TokenRefreshView
-from articulo.views import ArticuloCreateView, ArticuloDetailView, \
+from articulo.views import ArticuloBatchView, ArticuloCacheStatsView, \
+    ArticuloCambiosView, ArticuloCreateView, ArticuloDetailView, \
     ArticuloListView
 
 
@@ -43,6 +44,12 @@ urlpatterns = [
          name='detalle_articulo'),
     path('articulos/list/', ArticuloListView.as_view(),
          name='listar_articulos'),
+    path('articulos/batch', ArticuloBatchView.as_view(),
+         name='lote_articulos'),
+    path('articulos/cambios', ArticuloCambiosView.as_view(),
+         name='cambios_articulos'),
+    path('articulos/cache/stats', ArticuloCacheStatsView.as_view(),
+         name='estadisticas_cache_articulos'),
 
     # JWT Authentication
     path('api/token/', TokenObtainPairView.as_view(),
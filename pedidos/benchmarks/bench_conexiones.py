@@ -0,0 +1,49 @@
+"""Benchmark: conexión nueva por petición frente al pool keep-alive.
+
+Compara `requests.get` (una conexión TCP por petición, como hacían las
+vistas) con `ArticulosClient`, que reutiliza las conexiones de su sesión.
+
+Uso (desde el directorio `pedidos/`):
+
+    python benchmarks/bench_conexiones.py [peticiones]
+"""
+import os
+import sys
+import time
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_articulos import StubArticulos  # noqa: E402
+from pedido.clients import ArticulosClient  # noqa: E402
+
+
+def sin_pool(url: str, peticiones: int) -> None:
+    for articulo_id in range(peticiones):
+        requests.get(f"{url}/articulos/{articulo_id}")
+
+
+def con_pool(url: str, peticiones: int) -> None:
+    client = ArticulosClient(url=f"{url}/articulos/",
+                             token_url=f"{url}/api/token/",
+                             username='usuario', password='clave')
+    for articulo_id in range(peticiones):
+        client.obtener_articulo(articulo_id)
+
+
+def main() -> None:
+    peticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print(f"{peticiones} peticiones GET contra un servidor local")
+    print(f"{'modo':<12}{'conexiones':>12}{'total (s)':>12}"
+          f"{'por petición (ms)':>20}")
+    for nombre, funcion in (('sin pool', sin_pool), ('con pool', con_pool)):
+        with StubArticulos() as stub:
+            inicio = time.perf_counter()
+            funcion(stub.url, peticiones)
+            total = time.perf_counter() - inicio
+            print(f"{nombre:<12}{stub.conexiones:>12}{total:>12.3f}"
+                  f"{total / peticiones * 1000:>20.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark: latencia de las consultas de un artículo con y sin hedging.
+
+Levanta el servicio de Artículos simulado de `stub_articulos` con un
+retardo de `--rapida` segundos salvo en una fracción `--lentas` de las
+peticiones, que tardan `--lenta`. Consulta el mismo número de artículos con
+el cliente sin hedging y con hedging y muestra los percentiles 50 y 99 y
+cuántas peticiones ha recibido el servicio por consulta.
+
+Uso (desde el directorio `pedidos/`):
+
+    python benchmarks/bench_hedging.py [--consultas 1000] [--lentas 0.02]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_articulos import StubArticulos  # noqa: E402
+from pedido.clients import ArticulosClient  # noqa: E402
+
+
+def percentil(latencias: list, p: float) -> float:
+    ordenadas = sorted(latencias)
+    return ordenadas[max(int(len(ordenadas) * p / 100 + 0.5), 1) - 1]
+
+
+def medir(stub: StubArticulos, consultas: int, espera: float,
+          **opciones) -> tuple:
+    """Latencias en milisegundos y peticiones por consulta."""
+    client = ArticulosClient(url=f"{stub.url}/articulos/",
+                             token_url=f"{stub.url}/api/token/",
+                             username='benchmark', password='benchmark',
+                             **opciones)
+    client.obtener_token()
+    stub.peticiones = 0
+    latencias = []
+    for articulo_id in range(1, consultas + 1):
+        inicio = time.perf_counter()
+        client.obtener_articulo(articulo_id)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    # Las peticiones perdedoras terminan en segundo plano
+    time.sleep(espera)
+    return latencias, stub.peticiones / consultas, client
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--consultas', type=int, default=1000)
+    parser.add_argument('--rapida', type=float, default=0.005)
+    parser.add_argument('--lenta', type=float, default=0.2)
+    parser.add_argument('--lentas', type=float, default=0.02)
+    parser.add_argument('--percentil', type=float, default=95)
+    parser.add_argument('--presupuesto', type=float, default=0.1)
+    args = parser.parse_args()
+    azar = random.Random(42)
+
+    def retardo() -> float:
+        return args.lenta if azar.random() < args.lentas else args.rapida
+
+    print(f"{args.consultas} consultas; {args.lentas:.0%} tardan "
+          f"{args.lenta * 1000:.0f} ms y el resto "
+          f"{args.rapida * 1000:.0f} ms")
+    print(f"{'':>14}{'p50 (ms)':>12}{'p99 (ms)':>12}"
+          f"{'peticiones/consulta':>22}")
+    with StubArticulos(retardo=retardo) as stub:
+        for nombre, opciones in (
+                ('sin hedging', {}),
+                ('con hedging', {'hedging': True,
+                                 'hedging_percentil': args.percentil,
+                                 'hedging_presupuesto': args.presupuesto})):
+            latencias, carga, client = medir(stub, args.consultas,
+                                             args.lenta * 2, **opciones)
+            print(f"{nombre:>14}{percentil(latencias, 50):>12.2f}"
+                  f"{percentil(latencias, 99):>12.2f}{carga:>22.3f}")
+            if client.hedging is not None:
+                print(f"{'':>14}{client.hedging.estadisticas()}")
+
+
+if __name__ == '__main__':
+    main()
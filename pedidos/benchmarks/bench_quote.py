@@ -0,0 +1,118 @@
+"""Benchmark: presupuesto de cestas de 1, 100 y 10 000 líneas.
+
+Mide `POST /pedidos/quote` de principio a fin (validación, resolución de
+artículos, cálculo de precios y serialización de la respuesta) con los
+artículos servidos desde memoria, para que sólo cuente el trabajo de
+Pedidos. También compara el cálculo de los precios unitarios con
+impuestos con NumPy y con enteros de Python, y mide el de los totales.
+
+Uso (desde el directorio `pedidos/`):
+
+    python benchmarks/bench_quote.py [repeticiones]
+"""
+import json
+import os
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+settings.configure(
+    INSTALLED_APPS=['django.contrib.contenttypes', 'django.contrib.auth',
+                    'rest_framework', 'pedido'],
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3',
+                           'NAME': ':memory:'}},
+    API_ARTICULOS={},
+)
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from rest_framework.test import APIRequestFactory, \
+    force_authenticate  # noqa: E402
+from pedido import pricing, services  # noqa: E402
+from pedido.views import PedidoQuoteView  # noqa: E402
+
+TAMANOS = (1, 100, 10000)
+
+
+class CatalogoEnMemoria:
+    """Cliente de Artículos que responde desde un diccionario."""
+
+    def __init__(self, articulos: int) -> None:
+        self.articulos = {
+            articulo_id: {
+                'id': articulo_id,
+                'referencia': f'ART{articulo_id}',
+                'nombre': f'Artículo {articulo_id}',
+                'precio_sin_impuestos':
+                    f'{articulo_id % 997}.{articulo_id % 100:02}',
+                'impuesto_aplicable':
+                    ('21.00', '10.00', '4.00')[articulo_id % 3],
+                'version': 1,
+            } for articulo_id in range(1, articulos + 1)}
+
+    def obtener_articulos(self, articulo_ids, campos=None) -> dict:
+        return {articulo_id: self.articulos[articulo_id]
+                for articulo_id in dict.fromkeys(articulo_ids)}
+
+
+def cesta(lineas: int) -> bytes:
+    return json.dumps({'articulos': [
+        {'id': 1 + i % 5000, 'cantidad': 1 + i % 7} for i in range(lineas)
+    ]}).encode()
+
+
+def medir(funcion, repeticiones: int) -> float:
+    """Milisegundos por llamada (la mejor de tres series)."""
+    mejor = float('inf')
+    for _ in range(3):
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor / repeticiones * 1000
+
+
+def main() -> None:
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    factory = APIRequestFactory()
+    vista = PedidoQuoteView.as_view()
+    usuario = User(username='benchmark')
+    catalogo = CatalogoEnMemoria(5000)
+
+    def presupuestar(datos: bytes):
+        request = factory.post('/pedidos/quote', datos,
+                               content_type='application/json')
+        force_authenticate(request, user=usuario)
+        response = vista(request)
+        assert response.status_code == 200, response.content
+
+    print(f"{'líneas':>8}{'quote (ms)':>14}{'precios NumPy (ms)':>22}"
+          f"{'precios enteros (ms)':>24}{'totales (ms)':>16}")
+    with patch.object(services, 'get_articulos_client',
+                      return_value=catalogo):
+        for lineas in TAMANOS:
+            datos = cesta(lineas)
+            columnas = ([1 + i * 37 % 99999 for i in range(lineas)],
+                        [(2100, 1000, 400)[i % 3] for i in range(lineas)],
+                        [1 + i % 7 for i in range(lineas)])
+            quote = medir(lambda: presupuestar(datos), repeticiones)
+            vectorizado = medir(
+                lambda: pricing.precios_con_impuestos(*columnas[:2]),
+                repeticiones)
+            with patch.object(pricing, 'numpy', None):
+                enteros = medir(
+                    lambda: pricing.precios_con_impuestos(*columnas[:2]),
+                    repeticiones)
+            totales = medir(lambda: pricing.calcular_totales(*columnas),
+                            repeticiones)
+            print(f"{lineas:>8}{quote:>14.3f}{vectorizado:>22.3f}"
+                  f"{enteros:>24.3f}{totales:>16.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Servidor HTTP mínimo que simula el microservicio de Artículos.
+
+Se usa en los benchmarks de `benchmarks/`: responde al login JWT y a
+`GET /articulos/<id>` con HTTP/1.1 keep-alive, y cuenta las conexiones TCP
+que acepta y los GET que recibe.
+"""
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+def _jwt(exp: float) -> str:
+    payload = base64.urlsafe_b64encode(
+        json.dumps({'exp': exp}).encode()).decode().rstrip('=')
+    return f"cabecera.{payload}.firma"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.conexiones += 1
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _responder(self, status_code: int, data) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._responder(200, {'access': _jwt(time.time() + 300),
+                              'refresh': _jwt(time.time() + 3600)})
+
+    def do_GET(self) -> None:
+        with self.server.lock:
+            self.server.peticiones += 1
+        retardo = self.server.retardo()
+        if retardo:
+            time.sleep(retardo)
+        # El cliente añade `?fields=...` a la URL
+        articulo_id = int(
+            urlsplit(self.path).path.rstrip('/').split('/')[-1])
+        self._responder(200, {
+            'id': articulo_id,
+            'referencia': f'ART{articulo_id}',
+            'nombre': f'Artículo {articulo_id}',
+            'precio_sin_impuestos': '100.00',
+            'impuesto_aplicable': '21.00',
+        })
+
+
+class StubArticulos:
+    """Arranca el servidor simulado en un hilo en segundo plano.
+
+    `retardo` es una función sin argumentos que devuelve los segundos que
+    se retrasa cada respuesta a un GET.
+    """
+
+    def __init__(self, retardo=lambda: 0) -> None:
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.conexiones = 0
+        self.server.peticiones = 0
+        self.server.retardo = retardo
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    @property
+    def conexiones(self) -> int:
+        return self.server.conexiones
+
+    @property
+    def peticiones(self) -> int:
+        return self.server.peticiones
+
+    @peticiones.setter
+    def peticiones(self, valor: int) -> None:
+        with self.server.lock:
+            self.server.peticiones = valor
+
+    def __enter__(self) -> 'StubArticulos':
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
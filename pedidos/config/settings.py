@@ -163,12 +163,70 @@ PEDIDOS_SUPERUSER_USERNAME = env('PEDIDOS_SUPERUSER_USERNAME')
 PEDIDOS_SUPERUSER_PASSWORD = env('PEDIDOS_SUPERUSER_PASSWORD')
 PEDIDOS_SUPERUSER_EMAIL = env('PEDIDOS_SUPERUSER_EMAIL')
 
+# Creación de pedidos asíncrona: las peticiones se encolan y las procesa
+# `python manage.py procesar_solicitudes`. También se puede pedir por
+# petición con la cabecera `Prefer: respond-async`.
+PEDIDOS_CREACION_ASINCRONA = env.bool('PEDIDOS_CREACION_ASINCRONA',
+                                      default=False)
+
+# Claves `Idempotency-Key`: segundos que se guarda la respuesta y que espera
+# un reintento a que termine la petición original. Las caducadas se borran
+# con `python manage.py limpiar_idempotencia`.
+PEDIDOS_IDEMPOTENCIA_TTL = env.int('PEDIDOS_IDEMPOTENCIA_TTL', default=86400)
+PEDIDOS_IDEMPOTENCIA_ESPERA = env.float('PEDIDOS_IDEMPOTENCIA_ESPERA',
+                                        default=10)
+
 # Environment variables
 
 API_ARTICULOS = {
     'URL': env('API_ARTICULOS_URL'),
     'TOKEN_URL': env('API_ARTICULOS_TOKEN_URL'),
+    'TOKEN_REFRESH_URL': env('API_ARTICULOS_TOKEN_REFRESH_URL', default=None),
+    # Segundos antes de la expiración en los que se renueva el token
+    'TOKEN_MARGEN_EXPIRACION': env.int('API_ARTICULOS_TOKEN_MARGEN',
+                                       default=30),
     'USERNAME': env('API_ARTICULOS_USERNAME'),
     'PASSWORD': env('API_ARTICULOS_PASSWORD'),
+    # Pool de conexiones keep-alive y tiempos de espera (segundos)
+    'POOL_SIZE': env.int('API_ARTICULOS_POOL_SIZE', default=10),
+    'CONNECT_TIMEOUT': env.float('API_ARTICULOS_CONNECT_TIMEOUT', default=2.0),
+    'READ_TIMEOUT': env.float('API_ARTICULOS_READ_TIMEOUT', default=5.0),
+    # Consultas simultáneas cuando los artículos se piden uno a uno
+    'MAX_CONCURRENCIA': env.int('API_ARTICULOS_MAX_CONCURRENCIA', default=8),
+    # Caché local de artículos: entradas, segundos frescos y segundos en
+    # los que se sirven obsoletas mientras se revalidan
+    'CACHE_MAX_SIZE': env.int('API_ARTICULOS_CACHE_MAX_SIZE', default=10000),
+    'CACHE_TTL': env.float('API_ARTICULOS_CACHE_TTL', default=60),
+    'CACHE_STALE_TTL': env.float('API_ARTICULOS_CACHE_STALE_TTL',
+                                 default=300),
+    # Snapshot binario del catálogo compartido por los workers (se genera
+    # con `refrescar_catalogo`) y segundos tras los que deja de usarse
+    'SNAPSHOT_PATH': env('API_ARTICULOS_SNAPSHOT_PATH', default=None),
+    'SNAPSHOT_MAX_EDAD': env.float('API_ARTICULOS_SNAPSHOT_MAX_EDAD',
+                                   default=600),
+    # Circuito: fallos seguidos que lo abren, segundos abierto y llamadas
+    # de prueba al reabrir. Con `CIRCUITO_USAR_CACHE`, mientras está abierto
+    # se usan artículos caducados de la caché de hasta
+    # `CIRCUITO_CACHE_MAX_EDAD` segundos en lugar de responder 503
+    'CIRCUITO_UMBRAL_FALLOS': env.int('API_ARTICULOS_CIRCUITO_UMBRAL_FALLOS',
+                                      default=5),
+    'CIRCUITO_DURACION_ABIERTO': env.float(
+        'API_ARTICULOS_CIRCUITO_DURACION_ABIERTO', default=30),
+    'CIRCUITO_SONDAS': env.int('API_ARTICULOS_CIRCUITO_SONDAS', default=1),
+    'CIRCUITO_USAR_CACHE': env.bool('API_ARTICULOS_CIRCUITO_USAR_CACHE',
+                                    default=False),
+    'CIRCUITO_CACHE_MAX_EDAD': env.float(
+        'API_ARTICULOS_CIRCUITO_CACHE_MAX_EDAD', default=3600),
+    # Hedging de las consultas de un artículo: se duplican las que tardan
+    # más que el percentil `HEDGING_PERCENTIL` de las últimas latencias
+    # (`HEDGING_RETARDO_INICIAL` segundos hasta tener muestras), como mucho
+    # una fracción `HEDGING_PRESUPUESTO` de las consultas
+    'HEDGING': env.bool('API_ARTICULOS_HEDGING', default=False),
+    'HEDGING_PERCENTIL': env.float('API_ARTICULOS_HEDGING_PERCENTIL',
+                                   default=95),
+    'HEDGING_PRESUPUESTO': env.float('API_ARTICULOS_HEDGING_PRESUPUESTO',
+                                     default=0.1),
+    'HEDGING_RETARDO_INICIAL': env.float(
+        'API_ARTICULOS_HEDGING_RETARDO_INICIAL', default=0.05),
 }
 
@@ -20,8 +20,10 @@ from rest_framework_simplejwt.views import TokenObtainPairView, \
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from django.urls import path
-from pedido.views import PedidoCreateView, PedidoDetailView, PedidoEditView, \
-    PedidoListView
+from pedido.views import ArticulosCacheStatsView, PedidoBatchView, \
+    PedidoCreateView, PedidoDetailView, PedidoEditView, PedidoExportView, \
+    PedidoListView, PedidoQuoteView, SolicitudPedidoDetailView, \
+    VentasArticulosView
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -38,11 +40,22 @@ schema_view = get_schema_view(
 
 urlpatterns = [
     path('pedidos/', PedidoCreateView.as_view(), name='crear_pedido'),
+    path('pedidos/batch', PedidoBatchView.as_view(), name='lote_pedidos'),
+    path('pedidos/quote', PedidoQuoteView.as_view(),
+         name='presupuestar_pedido'),
+    path('pedidos/solicitudes/<int:id>/', SolicitudPedidoDetailView.as_view(),
+         name='estado_solicitud'),
     path('pedidos/<int:id>/', PedidoDetailView.as_view(),
          name='detalle_pedido'),
     path('pedidos/<int:id>/editar/', PedidoEditView.as_view(),
          name='editar_pedido'),
     path('pedidos/list/', PedidoListView.as_view(), name='listar_pedidos'),
+    path('pedidos/export/', PedidoExportView.as_view(),
+         name='exportar_pedidos'),
+    path('pedidos/ventas/', VentasArticulosView.as_view(),
+         name='ventas_articulos'),
+    path('pedidos/cache/articulos/stats/', ArticulosCacheStatsView.as_view(),
+         name='estadisticas_cache_articulos'),
 
     # JWT Authentication
     path('api/token/', TokenObtainPairView.as_view(),
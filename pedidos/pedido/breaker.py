@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+CERRADO = 'cerrado'
+ABIERTO = 'abierto'
+SEMIABIERTO = 'semiabierto'
+
+
+class CircuitBreaker:
+    """Circuito que corta las llamadas a un servicio que está fallando.
+
+    - cerrado: las llamadas pasan. Tras `umbral_fallos` fallos seguidos se
+      abre.
+    - abierto: las llamadas se rechazan sin enviarlas durante
+      `duracion_abierto` segundos.
+    - semiabierto: pasado ese tiempo se dejan pasar hasta `sondas` llamadas
+      de prueba. Si una tiene éxito el circuito se cierra y si falla se
+      vuelve a abrir.
+    """
+
+    def __init__(self, umbral_fallos: int = 5,
+                 duracion_abierto: float = 30, sondas: int = 1,
+                 reloj=time.monotonic) -> None:
+        self.umbral_fallos = umbral_fallos
+        self.duracion_abierto = duracion_abierto
+        self.sondas = sondas
+        self._reloj = reloj
+        self._lock = threading.Lock()
+
+        self.estado = CERRADO
+        self._desde = reloj()
+        self._fallos_seguidos = 0
+        self._sondas_en_curso = 0
+
+        self.exitos = 0
+        self.fallos = 0
+        self.rechazadas = 0
+        self.transiciones = {}
+
+    def _cambiar(self, estado: str) -> None:
+        transicion = f'{self.estado}->{estado}'
+        self.transiciones[transicion] = \
+            self.transiciones.get(transicion, 0) + 1
+        logger.warning("Circuito de Artículos: %s", transicion)
+        self.estado = estado
+        self._desde = self._reloj()
+        self._sondas_en_curso = 0
+
+    def _admite(self) -> bool:
+        """Indica si ahora pasaría una llamada, sin registrarla."""
+        if self.estado == CERRADO:
+            return True
+        # Una sonda que no ha dado resultado no bloquea el circuito para
+        # siempre: pasado el mismo tiempo se admite otra
+        vencido = self._reloj() - self._desde >= self.duracion_abierto
+        if self.estado == ABIERTO:
+            return vencido
+        return self._sondas_en_curso < self.sondas or vencido
+
+    def disponible(self) -> bool:
+        """Indica si una llamada pasaría ahora por el circuito."""
+        with self._lock:
+            return self._admite()
+
+    def permitir(self) -> bool:
+        """Registra una llamada y devuelve si se puede enviar. Cada llamada
+        permitida se debe cerrar con `exito` o `fallo`."""
+        with self._lock:
+            if not self._admite():
+                self.rechazadas += 1
+                return False
+            if self.estado == ABIERTO:
+                self._cambiar(SEMIABIERTO)
+            elif (self.estado == SEMIABIERTO
+                  and self._sondas_en_curso >= self.sondas):
+                # Las sondas anteriores se han perdido
+                self._sondas_en_curso = 0
+                self._desde = self._reloj()
+            if self.estado == SEMIABIERTO:
+                self._sondas_en_curso += 1
+            return True
+
+    def exito(self) -> None:
+        with self._lock:
+            self.exitos += 1
+            self._fallos_seguidos = 0
+            if self.estado != CERRADO:
+                self._cambiar(CERRADO)
+
+    def fallo(self) -> None:
+        with self._lock:
+            self.fallos += 1
+            self._fallos_seguidos += 1
+            if self.estado == SEMIABIERTO or (
+                    self.estado == CERRADO
+                    and self._fallos_seguidos >= self.umbral_fallos):
+                self._cambiar(ABIERTO)
+
+    def estadisticas(self) -> dict:
+        """Estado del circuito, llamadas y transiciones."""
+        with self._lock:
+            return {
+                'estado': self.estado,
+                'segundos_en_estado': self._reloj() - self._desde,
+                'fallos_seguidos': self._fallos_seguidos,
+                'exitos': self.exitos,
+                'fallos': self.fallos,
+                'rechazadas': self.rechazadas,
+                'transiciones': dict(self.transiciones),
+            }
@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+FRESCO = 'fresco'
+OBSOLETO = 'obsoleto'
+CADUCADO = 'caducado'
+
+
+class Entrada:
+    """Artículo guardado en la caché junto con su ETag."""
+
+    __slots__ = ('data', 'etag', 'guardado')
+
+    def __init__(self, data: dict, etag: Optional[str],
+                 guardado: float) -> None:
+        self.data = data
+        self.etag = etag
+        self.guardado = guardado
+
+
+class ArticuloCache:
+    """Caché LRU en memoria de los artículos recibidos de Artículos.
+
+    Cada entrada pasa por tres estados según su antigüedad:
+
+    - fresca (menos de `ttl` segundos): se usa sin consultar al servicio.
+    - obsoleta (hasta `ttl + stale_ttl`): se usa, pero se debe revalidar en
+      segundo plano (stale-while-revalidate).
+    - caducada: no se usa, pero se conserva hasta que la expulsa el LRU
+      para revalidarla con su ETag o versión en lugar de descargarla.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 60,
+                 stale_ttl: float = 300, reloj=time.monotonic) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._reloj = reloj
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.aciertos = 0
+        self.aciertos_obsoletos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+
+    def _estado(self, entrada: Entrada) -> str:
+        edad = self.edad(entrada)
+        if edad < self.ttl:
+            return FRESCO
+        if edad < self.ttl + self.stale_ttl:
+            return OBSOLETO
+        return CADUCADO
+
+    def consultar(self, clave: Hashable):
+        """Busca una entrada y devuelve `(estado, entrada)`.
+
+        Devuelve `(None, None)` si no está. Las entradas caducadas cuentan
+        como fallo pero se devuelven para poder revalidarlas.
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None, None
+            self._entradas.move_to_end(clave)
+            estado = self._estado(entrada)
+            if estado == FRESCO:
+                self.aciertos += 1
+            elif estado == OBSOLETO:
+                self.aciertos_obsoletos += 1
+            else:
+                self.fallos += 1
+            return estado, entrada
+
+    def ver(self, clave: Hashable) -> Optional[Entrada]:
+        """Devuelve la entrada sea cual sea su estado, sin contar la
+        consulta en las métricas."""
+        with self._lock:
+            return self._entradas.get(clave)
+
+    def edad(self, entrada: Entrada) -> float:
+        """Segundos desde que se guardó o validó la entrada."""
+        return self._reloj() - entrada.guardado
+
+    def get(self, clave: Hashable) -> Optional[dict]:
+        """Devuelve el artículo si la entrada es fresca u obsoleta."""
+        estado, entrada = self.consultar(clave)
+        if estado in (FRESCO, OBSOLETO):
+            return entrada.data
+        return None
+
+    def set(self, clave: Hashable, data: dict,
+            etag: Optional[str] = None) -> None:
+        """Guarda o renueva un artículo, expulsando el menos usado."""
+        with self._lock:
+            self._entradas[clave] = Entrada(data, etag, self._reloj())
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_size:
+                self._entradas.popitem(last=False)
+                self.expulsiones += 1
+
+    def renovar(self, clave: Hashable) -> None:
+        """Marca como recién validada una entrada que no ha cambiado."""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                entrada.guardado = self._reloj()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+    def estadisticas(self) -> dict:
+        """Métricas de uso de la caché."""
+        with self._lock:
+            consultas = self.aciertos + self.aciertos_obsoletos + self.fallos
+            return {
+                'tamano': len(self._entradas),
+                'tamano_maximo': self.max_size,
+                'aciertos': self.aciertos,
+                'aciertos_obsoletos': self.aciertos_obsoletos,
+                'fallos': self.fallos,
+                'expulsiones': self.expulsiones,
+                'tasa_aciertos': ((self.aciertos + self.aciertos_obsoletos)
+                                  / consultas if consultas else 0.0),
+            }
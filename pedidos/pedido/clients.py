@@ -0,0 +1,625 @@
+import base64
+import json
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, FIRST_EXCEPTION, Future, \
+    ThreadPoolExecutor, wait
+from typing import Optional
+from rest_framework import status
+from requests.adapters import HTTPAdapter
+import requests
+from .breaker import CircuitBreaker
+from .cache import FRESCO, OBSOLETO, ArticuloCache
+from .hedging import Hedging
+from .snapshot import CatalogoCompartido
+
+
+logger = logging.getLogger(__name__)
+
+# Vida asumida de un token cuando no se puede leer su expiración
+DURACION_TOKEN_POR_DEFECTO = 60
+
+# Campos del artículo que se copian en `DetallePedido`,
+# y su versión, que permite revalidarlo sin descargarlo de nuevo.
+CAMPOS_ARTICULO = ('id', 'referencia', 'nombre', 'precio_sin_impuestos',
+                   'impuesto_aplicable', 'version')
+
+
+class ArticulosServiceError(Exception):
+    """Error al comunicarse con el microservicio de Artículos."""
+
+    def __init__(self, mensaje: str,
+                 status_code: int = status.HTTP_502_BAD_GATEWAY) -> None:
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.status_code = status_code
+
+
+class TokenError(ArticulosServiceError):
+    """No se pudo obtener un token del microservicio de Artículos."""
+
+
+class CircuitoAbierto(ArticulosServiceError):
+    """No se llama a Artículos porque está fallando."""
+
+    def __init__(self) -> None:
+        super().__init__("El servicio de artículos no está disponible",
+                         status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+class ArticuloNoEncontrado(ArticulosServiceError):
+    """El artículo solicitado no existe en el microservicio de Artículos."""
+
+    def __init__(self, articulo_id) -> None:
+        super().__init__(
+            f"Artículo con referencia {articulo_id} no encontrado",
+            status.HTTP_404_NOT_FOUND)
+        self.articulo_id = articulo_id
+
+
+def _expiracion_jwt(token: str) -> float:
+    """Obtiene el instante de expiración (`exp`) de un JWT.
+
+    La firma no se verifica: sólo se usa para saber cuándo renovarlo.
+    """
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return time.time() + DURACION_TOKEN_POR_DEFECTO
+
+
+class ArticulosClient:
+    """Cliente compartido para el microservicio de Artículos.
+
+    Obtiene el token JWT una sola vez y lo reutiliza entre peticiones,
+    renovándolo con el token de refresco poco antes de que expire. Las
+    conexiones se mantienen abiertas en un pool (keep-alive) y todas las
+    peticiones tienen tiempos de espera de conexión y de lectura.
+    """
+
+    # A partir de este número de IDs la consulta por lotes se hace por POST
+    MAX_IDS_GET = 50
+    # IDs que admite `articulos/batch` por consulta (`ArticuloBatchView`)
+    MAX_IDS_LOTE = 1000
+    # Segundos sin usar la consulta por lotes después de un 404 o 405; un
+    # error puntual (por ejemplo durante un despliegue) no la desactiva
+    # para siempre
+    REINTENTO_LOTES = 60
+
+    def __init__(self, url: str, token_url: str, username: str,
+                 password: str, token_refresh_url: Optional[str] = None,
+                 margen_expiracion: int = 30, pool_size: int = 10,
+                 connect_timeout: float = 2.0, read_timeout: float = 5.0,
+                 max_concurrencia: int = 8, cache_max_size: int = 10000,
+                 cache_ttl: float = 60, cache_stale_ttl: float = 300,
+                 snapshot_path: Optional[str] = None,
+                 snapshot_max_edad: float = 600,
+                 circuito_umbral_fallos: int = 5,
+                 circuito_duracion_abierto: float = 30,
+                 circuito_sondas: int = 1,
+                 circuito_usar_cache: bool = False,
+                 circuito_cache_max_edad: float = 3600,
+                 hedging: bool = False, hedging_percentil: float = 95,
+                 hedging_presupuesto: float = 0.1,
+                 hedging_retardo_inicial: float = 0.05) -> None:
+        self.url = url
+        self.token_url = token_url
+        self.token_refresh_url = token_refresh_url or f"{token_url}refresh/"
+        self.username = username
+        self.password = password
+        self.margen_expiracion = margen_expiracion
+        self.timeout = (connect_timeout, read_timeout)
+
+        # Sin reintentos automáticos: un servicio lento no debe multiplicar
+        # el tiempo de espera de la vista.
+        adapter = HTTPAdapter(pool_connections=pool_size,
+                              pool_maxsize=pool_size, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # Consultas individuales en paralelo cuando no hay consulta por lotes
+        self._lotes_desactivados_hasta = 0.0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrencia,
+            thread_name_prefix='articulos-client')
+
+        # Artículos ya recibidos: los frescos no cuestan ninguna petición y
+        # los demás se revalidan con su ETag o versión
+        self.cache = ArticuloCache(cache_max_size, cache_ttl,
+                                   cache_stale_ttl)
+        self._revalidando = set()
+        self._revalidando_lock = threading.Lock()
+
+        # Snapshot del catálogo compartido por todos los workers; se
+        # consulta cuando el artículo no está en la caché del proceso
+        self.catalogo = (CatalogoCompartido(snapshot_path, snapshot_max_edad)
+                         if snapshot_path else None)
+
+        # Con Artículos caído las llamadas fallan al momento en lugar de
+        # esperar al timeout. Si `circuito_usar_cache`, mientras tanto se
+        # usan los artículos de la caché de hasta `circuito_cache_max_edad`
+        # segundos aunque hayan caducado
+        self.circuito = CircuitBreaker(circuito_umbral_fallos,
+                                       circuito_duracion_abierto,
+                                       circuito_sondas)
+        self.circuito_usar_cache = circuito_usar_cache
+        self.circuito_cache_max_edad = circuito_cache_max_edad
+
+        # Las consultas de un artículo que tardan más que el percentil
+        # configurado se duplican y se usa la primera respuesta. Los
+        # duplicados tienen su propio pool: se lanzan también desde las
+        # tareas de `_executor`
+        self.hedging = None
+        if hedging:
+            self.hedging = Hedging(hedging_percentil, hedging_presupuesto,
+                                   hedging_retardo_inicial)
+            self._executor_hedging = ThreadPoolExecutor(
+                max_workers=2 * max_concurrencia,
+                thread_name_prefix='articulos-hedging')
+
+        self._lock = threading.Lock()
+        self._access = None
+        self._access_exp = 0.0
+        self._refresh = None
+        self._refresh_exp = 0.0
+
+    @property
+    def lotes_disponibles(self) -> bool:
+        """Indica si se usa la consulta por lotes; tras un 404 o 405 se
+        vuelve a probar pasados `REINTENTO_LOTES` segundos."""
+        return time.monotonic() >= self._lotes_desactivados_hasta
+
+    @classmethod
+    def from_settings(cls, config: dict) -> 'ArticulosClient':
+        """Crea el cliente a partir de `API_ARTICULOS`."""
+        return cls(
+            url=config['URL'],
+            token_url=config['TOKEN_URL'],
+            username=config['USERNAME'],
+            password=config['PASSWORD'],
+            token_refresh_url=config.get('TOKEN_REFRESH_URL'),
+            margen_expiracion=config.get('TOKEN_MARGEN_EXPIRACION', 30),
+            pool_size=config.get('POOL_SIZE', 10),
+            connect_timeout=config.get('CONNECT_TIMEOUT', 2.0),
+            read_timeout=config.get('READ_TIMEOUT', 5.0),
+            max_concurrencia=config.get('MAX_CONCURRENCIA', 8),
+            cache_max_size=config.get('CACHE_MAX_SIZE', 10000),
+            cache_ttl=config.get('CACHE_TTL', 60),
+            cache_stale_ttl=config.get('CACHE_STALE_TTL', 300),
+            snapshot_path=config.get('SNAPSHOT_PATH'),
+            snapshot_max_edad=config.get('SNAPSHOT_MAX_EDAD', 600),
+            circuito_umbral_fallos=config.get('CIRCUITO_UMBRAL_FALLOS', 5),
+            circuito_duracion_abierto=config.get('CIRCUITO_DURACION_ABIERTO',
+                                                 30),
+            circuito_sondas=config.get('CIRCUITO_SONDAS', 1),
+            circuito_usar_cache=config.get('CIRCUITO_USAR_CACHE', False),
+            circuito_cache_max_edad=config.get('CIRCUITO_CACHE_MAX_EDAD',
+                                               3600),
+            hedging=config.get('HEDGING', False),
+            hedging_percentil=config.get('HEDGING_PERCENTIL', 95),
+            hedging_presupuesto=config.get('HEDGING_PRESUPUESTO', 0.1),
+            hedging_retardo_inicial=config.get('HEDGING_RETARDO_INICIAL',
+                                               0.05),
+        )
+
+    def _vigente(self, expiracion: float) -> bool:
+        return expiracion - self.margen_expiracion > time.time()
+
+    def _http(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Envía una petición por la sesión compartida con timeouts.
+
+        Los errores de conexión, los timeouts y los 5xx cuentan como fallos
+        del circuito; con el circuito abierto lanza `CircuitoAbierto` sin
+        enviarla.
+        """
+        if not self.circuito.permitir():
+            raise CircuitoAbierto()
+        try:
+            response = self.session.request(method, url,
+                                            timeout=self.timeout, **kwargs)
+        except requests.Timeout:
+            self.circuito.fallo()
+            raise ArticulosServiceError(
+                "El servicio de artículos no respondió a tiempo",
+                status.HTTP_504_GATEWAY_TIMEOUT)
+        except requests.RequestException:
+            self.circuito.fallo()
+            raise ArticulosServiceError(
+                "El servicio de artículos no está disponible",
+                status.HTTP_503_SERVICE_UNAVAILABLE)
+        if response.status_code >= 500:
+            self.circuito.fallo()
+        else:
+            self.circuito.exito()
+        return response
+
+    def _guardar_tokens(self, data: dict) -> None:
+        self._access = data['access']
+        self._access_exp = _expiracion_jwt(self._access)
+        if data.get('refresh'):
+            self._refresh = data['refresh']
+            self._refresh_exp = _expiracion_jwt(self._refresh)
+
+    def _renovar_token(self) -> bool:
+        """Renueva el token de acceso con el token de refresco."""
+        response = self._http('POST', self.token_refresh_url,
+                              data={'refresh': self._refresh})
+        if response.status_code != 200:
+            self._refresh = None
+            return False
+        self._guardar_tokens(response.json())
+        return True
+
+    def _login(self) -> None:
+        """Obtiene un nuevo par de tokens con usuario y contraseña."""
+        response = self._http('POST', self.token_url,
+                              data={'username': self.username,
+                                    'password': self.password})
+        if response.status_code != 200:
+            raise TokenError("No se pudo obtener el token",
+                             response.status_code)
+        self._guardar_tokens(response.json())
+
+    def obtener_token(self) -> str:
+        """Devuelve un token de acceso vigente, renovándolo si hace falta."""
+        with self._lock:
+            if self._access and self._vigente(self._access_exp):
+                return self._access
+            if not (self._refresh and self._vigente(self._refresh_exp)
+                    and self._renovar_token()):
+                self._login()
+            return self._access
+
+    def invalidar_token(self, token: str) -> None:
+        """Descarta el token de acceso si sigue siendo el indicado."""
+        with self._lock:
+            if self._access == token:
+                self._access = None
+
+    def _send(self, method: str, path: str, token: str,
+              **kwargs) -> requests.Response:
+        headers = {**kwargs.pop('headers', {}),
+                   'Authorization': f'Bearer {token}'}
+        return self._http(method, f"{self.url}{path}", headers=headers,
+                          **kwargs)
+
+    def request(self, method: str, path: str,
+                **kwargs) -> requests.Response:
+        """Realiza una petición autenticada; reintenta una vez ante un 401."""
+        token = self.obtener_token()
+        response = self._send(method, path, token, **kwargs)
+        if response.status_code == status.HTTP_401_UNAUTHORIZED:
+            self.invalidar_token(token)
+            response = self._send(method, path, self.obtener_token(),
+                                  **kwargs)
+        return response
+
+    def _get_con_hedging(self, path: str, **kwargs) -> requests.Response:
+        """GET que se repite si la primera petición no ha respondido tras
+        el retardo de `hedging`; devuelve la primera respuesta que llega.
+
+        La primera petición sale al momento en su propio hilo, sin pasar
+        por el pool: el hedging no limita la concurrencia del proceso y la
+        espera en una cola no cuenta como latencia. Sólo los duplicados
+        usan `_executor_hedging`. Si una de las dos falla se espera a la
+        otra. La que pierde no se puede cancelar: termina en segundo plano
+        y se descarta.
+        """
+        hedging = self.hedging
+        hedging.nueva_consulta()
+        original = Future()
+        inicio = time.monotonic()
+
+        def enviar() -> None:
+            try:
+                original.set_result(self.request('GET', path, **kwargs))
+            except Exception as e:
+                original.set_exception(e)
+            finally:
+                hedging.registrar(time.monotonic() - inicio)
+
+        threading.Thread(target=enviar, name='articulos-hedging-original',
+                         daemon=True).start()
+        hechos, _ = wait([original], timeout=hedging.retardo())
+        if hechos or not hedging.duplicar():
+            return original.result()
+
+        duplicada = self._executor_hedging.submit(self.request, 'GET', path,
+                                                  **kwargs)
+        pendientes = {original, duplicada}
+        while pendientes:
+            hechos, pendientes = wait(pendientes,
+                                      return_when=FIRST_COMPLETED)
+            for future in hechos:
+                if future.exception() is None:
+                    if future is duplicada:
+                        hedging.ganada_por_duplicado()
+                    return future.result()
+        return original.result()
+
+    def _get(self, path: str, **kwargs) -> requests.Response:
+        """GET de una consulta de lectura, con hedging si está activo."""
+        if self.hedging is not None:
+            return self._get_con_hedging(path, **kwargs)
+        return self.request('GET', path, **kwargs)
+
+    @staticmethod
+    def _params_campos(campos) -> dict:
+        return {'fields': ','.join(campos)} if campos else {}
+
+    def obtener_articulo(self, articulo_id,
+                         campos=CAMPOS_ARTICULO) -> dict:
+        """Obtiene la información de un artículo por su ID.
+
+        Sólo se piden los `campos` indicados (todos si es `None`). Si está
+        en la caché, se revalida con `If-None-Match` y un 304 reutiliza la
+        versión guardada. Con `hedging` la consulta se duplica si tarda.
+        """
+        entrada = self.cache.ver((articulo_id, campos))
+        headers = {}
+        if entrada and entrada.etag:
+            headers['If-None-Match'] = entrada.etag
+        response = self._get(f"{articulo_id}",
+                             params=self._params_campos(campos),
+                             headers=headers)
+        if response.status_code == status.HTTP_304_NOT_MODIFIED and entrada:
+            self.cache.renovar((articulo_id, campos))
+            return entrada.data
+        if response.status_code == status.HTTP_404_NOT_FOUND:
+            raise ArticuloNoEncontrado(articulo_id)
+        if response.status_code != status.HTTP_200_OK:
+            raise ArticulosServiceError(
+                f"Error al obtener el artículo {articulo_id}",
+                response.status_code)
+        data = response.json()
+        self.cache.set((articulo_id, campos), data,
+                       response.headers.get('ETag'))
+        return data
+
+    def obtener_articulos(self, articulo_ids,
+                          campos=CAMPOS_ARTICULO) -> dict:
+        """Obtiene varios artículos eliminando los IDs repetidos.
+
+        Los artículos frescos en la caché no generan ninguna petición. Los
+        demás se buscan en el snapshot compartido del catálogo y, si no
+        están, los obsoletos se usan mientras se revalidan en segundo
+        plano. El resto se piden con la consulta por lotes de Artículos o,
+        si el servicio no la ofrece, uno a uno de forma concurrente.
+        Devuelve un diccionario indexado por ID y lanza
+        `ArticuloNoEncontrado` si falta alguno.
+        """
+        return self._resolver(articulo_ids, campos, None)
+
+    def buscar_articulos(self, articulo_ids,
+                         campos=CAMPOS_ARTICULO) -> tuple:
+        """Como `obtener_articulos`, pero sin fallar si falta alguno.
+
+        Devuelve los artículos encontrados, indexados por ID, y la lista de
+        IDs que no existen.
+        """
+        no_encontrados = []
+        articulos = self._resolver(articulo_ids, campos, no_encontrados)
+        return articulos, no_encontrados
+
+    def _resolver(self, articulo_ids, campos,
+                  no_encontrados: Optional[list]) -> dict:
+        """Resuelve los artículos; los que no existen se añaden a
+        `no_encontrados` o, si es `None`, lanzan `ArticuloNoEncontrado`."""
+        articulos = {}
+        obsoletos = []
+        pendientes = []
+        for articulo_id in dict.fromkeys(articulo_ids):
+            estado, entrada = self.cache.consultar((articulo_id, campos))
+            if estado == FRESCO:
+                articulos[articulo_id] = entrada.data
+                continue
+            articulo = self._del_catalogo(articulo_id, campos)
+            if articulo is not None:
+                articulos[articulo_id] = articulo
+            elif estado == OBSOLETO:
+                articulos[articulo_id] = entrada.data
+                obsoletos.append(articulo_id)
+            else:
+                pendientes.append(articulo_id)
+
+        if not self.circuito.disponible():
+            # No se revalida nada hasta que Artículos se recupere
+            obsoletos = []
+            if self.circuito_usar_cache:
+                pendientes = self._de_cache_caducada(pendientes, campos,
+                                                     articulos)
+        if obsoletos:
+            self._revalidar_en_segundo_plano(obsoletos, campos)
+        if pendientes:
+            descargados = None
+            if self.lotes_disponibles:
+                descargados = self._obtener_lote(pendientes, campos,
+                                                 no_encontrados)
+            if descargados is None:
+                descargados = self.obtener_articulos_concurrente(
+                    pendientes, campos, no_encontrados)
+            articulos.update(descargados)
+        return articulos
+
+    def _de_cache_caducada(self, articulo_ids: list, campos,
+                           articulos: dict) -> list:
+        """Añade a `articulos` los que están en la caché aunque hayan
+        caducado, si no son más antiguos que `circuito_cache_max_edad`.
+        Devuelve los IDs que siguen sin resolver."""
+        pendientes = []
+        for articulo_id in articulo_ids:
+            entrada = self.cache.ver((articulo_id, campos))
+            if (entrada is not None and self.cache.edad(entrada)
+                    <= self.circuito_cache_max_edad):
+                articulos[articulo_id] = entrada.data
+            else:
+                pendientes.append(articulo_id)
+        return pendientes
+
+    def _del_catalogo(self, articulo_id, campos) -> Optional[dict]:
+        """Busca un artículo en el snapshot, que sólo tiene los campos de
+        `CAMPOS_ARTICULO`."""
+        if self.catalogo is None or tuple(campos or ()) != CAMPOS_ARTICULO:
+            return None
+        return self.catalogo.get(articulo_id)
+
+    def _revalidar_en_segundo_plano(self, articulo_ids: list,
+                                    campos) -> None:
+        """Revalida artículos obsoletos sin bloquear la petición actual."""
+        with self._revalidando_lock:
+            articulo_ids = [articulo_id for articulo_id in articulo_ids
+                            if (articulo_id, campos) not in self._revalidando]
+            self._revalidando.update((articulo_id, campos)
+                                     for articulo_id in articulo_ids)
+        if articulo_ids:
+            self._executor.submit(self._revalidar, articulo_ids, campos)
+
+    def _revalidar(self, articulo_ids: list, campos) -> None:
+        try:
+            if (not self.lotes_disponibles
+                    or self._obtener_lote(articulo_ids, campos) is None):
+                # Uno a uno y en este mismo hilo, para no esperar a otras
+                # tareas del pool desde dentro del pool
+                for articulo_id in articulo_ids:
+                    self.obtener_articulo(articulo_id, campos)
+        except ArticulosServiceError as e:
+            logger.warning("No se pudieron revalidar los artículos %s: %s",
+                           articulo_ids, e.mensaje)
+        finally:
+            with self._revalidando_lock:
+                self._revalidando.difference_update(
+                    (articulo_id, campos) for articulo_id in articulo_ids)
+
+    def _obtener_lote(self, ids: list, campos,
+                      no_encontrados: Optional[list] = None
+                      ) -> Optional[dict]:
+        """Obtiene los artículos con `articulos/batch`.
+
+        Devuelve `None` si el servicio no tiene la consulta por lotes. Los
+        artículos ya recibidos se envían con su versión y el servicio sólo
+        devuelve completos los que han cambiado. Los IDs que no existen se
+        añaden a `no_encontrados` o, si es `None`, lanzan
+        `ArticuloNoEncontrado`. Con más de `MAX_IDS_LOTE` IDs se hacen
+        varias consultas y se juntan sus resultados. Con `hedging` la
+        consulta por GET se duplica si tarda.
+        """
+        if len(ids) > self.MAX_IDS_LOTE:
+            articulos = {}
+            for inicio in range(0, len(ids), self.MAX_IDS_LOTE):
+                bloque = self._obtener_lote(
+                    ids[inicio:inicio + self.MAX_IDS_LOTE], campos,
+                    no_encontrados)
+                if bloque is None:
+                    return None
+                articulos.update(bloque)
+            return articulos
+
+        recordados = {}
+        for articulo_id in ids:
+            entrada = self.cache.ver((articulo_id, campos))
+            if entrada and 'version' in entrada.data:
+                recordados[articulo_id] = entrada.data
+
+        params = self._params_campos(campos)
+        if len(ids) <= self.MAX_IDS_GET and not recordados:
+            params['ids'] = ','.join(map(str, ids))
+            response = self._get('batch', params=params)
+        else:
+            response = self.request('POST', 'batch', params=params, json={
+                'ids': ids,
+                'versiones': {str(articulo_id): articulo['version']
+                              for articulo_id, articulo
+                              in recordados.items()}
+            })
+        if response.status_code in (status.HTTP_404_NOT_FOUND,
+                                    status.HTTP_405_METHOD_NOT_ALLOWED):
+            self._lotes_desactivados_hasta = (time.monotonic()
+                                              + self.REINTENTO_LOTES)
+            return None
+        if response.status_code != status.HTTP_200_OK:
+            raise ArticulosServiceError("Error al obtener los artículos",
+                                        response.status_code)
+
+        data = response.json()
+        if data['no_encontrados']:
+            if no_encontrados is None:
+                raise ArticuloNoEncontrado(data['no_encontrados'][0])
+            no_encontrados.extend(data['no_encontrados'])
+        articulos = {}
+        for articulo_id, articulo in data['articulos'].items():
+            articulos[int(articulo_id)] = articulo
+            self.cache.set((int(articulo_id), campos), articulo)
+        for articulo_id in data.get('sin_cambios', []):
+            articulos[articulo_id] = recordados[articulo_id]
+            self.cache.renovar((articulo_id, campos))
+        return articulos
+
+    def obtener_articulos_concurrente(self, articulo_ids,
+                                      campos=CAMPOS_ARTICULO,
+                                      no_encontrados: Optional[list] = None
+                                      ) -> dict:
+        """Obtiene los artículos uno a uno con concurrencia limitada.
+
+        Se detiene en el primer error y cancela las consultas que aún no
+        han empezado. Si se pasa la lista `no_encontrados`, los 404 se
+        añaden a ella en lugar de detenerse.
+        """
+        futures = {self._executor.submit(self.obtener_articulo, articulo_id,
+                                         campos): articulo_id
+                   for articulo_id in dict.fromkeys(articulo_ids)}
+        articulos = {}
+        pendientes = set(futures)
+        try:
+            while pendientes:
+                hechos, pendientes = wait(pendientes,
+                                          return_when=FIRST_EXCEPTION)
+                for future in hechos:
+                    try:
+                        articulos[futures[future]] = future.result()
+                    except ArticuloNoEncontrado:
+                        if no_encontrados is None:
+                            raise
+                        no_encontrados.append(futures[future])
+        finally:
+            for future in pendientes:
+                future.cancel()
+        return articulos
+
+    def obtener_cambios(self, cursor: Optional[str] = None,
+                        limite: int = 1000,
+                        campos=CAMPOS_ARTICULO) -> dict:
+        """Obtiene los artículos creados o modificados después de `cursor`.
+
+        Devuelve la respuesta del feed de cambios: `articulos`,
+        `siguiente_cursor` (que se envía en la siguiente consulta) y
+        `hay_mas`.
+        """
+        params = {**self._params_campos(campos), 'limit': limite}
+        if cursor:
+            params['desde'] = cursor
+        response = self.request('GET', 'cambios', params=params)
+        if response.status_code != status.HTTP_200_OK:
+            raise ArticulosServiceError(
+                "Error al obtener los cambios del catálogo",
+                response.status_code)
+        return response.json()
+
+
+_articulos_client = None
+_articulos_client_lock = threading.Lock()
+
+
+def get_articulos_client() -> ArticulosClient:
+    """Devuelve el cliente de Artículos compartido por el proceso."""
+    global _articulos_client
+    if _articulos_client is None:
+        with _articulos_client_lock:
+            if _articulos_client is None:
+                from django.conf import settings
+                _articulos_client = ArticulosClient.from_settings(
+                    settings.API_ARTICULOS)
+    return _articulos_client
@@ -0,0 +1,135 @@
+import csv
+import datetime
+import json
+from collections import defaultdict
+from typing import Iterator, Optional
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from .models import Pedido, DetallePedido
+
+
+FORMATOS = ('ndjson', 'csv')
+
+COLUMNAS_CSV = [
+    'pedido_id',
+    'fecha_creacion',
+    'precio_total_sin_impuestos',
+    'precio_total_con_impuestos',
+    'articulo_id',
+    'articulo_referencia',
+    'articulo_nombre',
+    'articulo_precio_sin_impuestos',
+    'articulo_impuesto_aplicable',
+    'cantidad',
+]
+
+
+def parsear_fecha(valor: Optional[str], fin: bool = False):
+    """Convierte `YYYY-MM-DD` o una fecha ISO 8601 en un datetime.
+
+    Con `fin=True` una fecha sin hora se interpreta como el inicio del día
+    siguiente, para usarla como límite exclusivo del rango.
+    """
+    if not valor:
+        return None
+    fecha_hora = parse_datetime(valor)
+    if fecha_hora is None:
+        fecha = parse_date(valor)
+        if fecha is None:
+            raise ValueError(f"Fecha no válida: {valor}")
+        if fin:
+            fecha += datetime.timedelta(days=1)
+        fecha_hora = datetime.datetime.combine(fecha, datetime.time.min)
+    if timezone.is_naive(fecha_hora):
+        fecha_hora = timezone.make_aware(fecha_hora)
+    return fecha_hora
+
+
+def pedidos_en_rango(desde=None, hasta=None):
+    """Pedidos creados en `[desde, hasta)`."""
+    pedidos = Pedido.objects.all()
+    if desde is not None:
+        pedidos = pedidos.filter(fecha_creacion__gte=desde)
+    if hasta is not None:
+        pedidos = pedidos.filter(fecha_creacion__lt=hasta)
+    return pedidos
+
+
+def iterar_pedidos(pedidos, chunk_size: int = 1000) -> Iterator[tuple]:
+    """Recorre los pedidos por bloques junto con sus detalles.
+
+    Cada bloque se lee con una consulta por cursor sobre `id` y sus
+    detalles con una sola consulta `pedido_id__in`, de modo que la memoria
+    usada sólo depende de `chunk_size` y no del tamaño de la tabla.
+    """
+    ultimo_id = 0
+    while True:
+        bloque = list(pedidos.filter(id__gt=ultimo_id)
+                      .order_by('id')[:chunk_size])
+        if not bloque:
+            return
+
+        detalles = defaultdict(list)
+        for detalle in DetallePedido.objects.filter(
+                pedido_id__in=[pedido.id for pedido in bloque]).order_by('id'):
+            detalles[detalle.pedido_id].append(detalle)
+
+        for pedido in bloque:
+            yield pedido, detalles[pedido.id]
+        ultimo_id = bloque[-1].id
+
+
+def lineas_ndjson(pedidos, chunk_size: int = 1000) -> Iterator[str]:
+    """Genera un objeto JSON por línea y pedido, con sus artículos."""
+    for pedido, detalles in iterar_pedidos(pedidos, chunk_size):
+        yield json.dumps({
+            'id': pedido.id,
+            'articulos': [{
+                'articulo_id': detalle.articulo_id,
+                'referencia': detalle.articulo_referencia,
+                'nombre': detalle.articulo_nombre,
+                'cantidad': detalle.cantidad,
+                'precio_sin_impuestos': detalle.articulo_precio_sin_impuestos,
+                'impuesto_aplicable': detalle.articulo_impuesto_aplicable
+            } for detalle in detalles],
+            'precio_total_sin_impuestos': pedido.precio_total_sin_impuestos,
+            'precio_total_con_impuestos': pedido.precio_total_con_impuestos,
+            'fecha_creacion': pedido.fecha_creacion
+        }, cls=DjangoJSONEncoder) + '\n'
+
+
+class _Eco:
+    """Pseudo-fichero que devuelve lo escrito en lugar de guardarlo."""
+
+    def write(self, valor: str) -> str:
+        return valor
+
+
+def lineas_csv(pedidos, chunk_size: int = 1000) -> Iterator[str]:
+    """Genera una cabecera y una fila CSV por cada línea de pedido."""
+    writer = csv.writer(_Eco())
+    yield writer.writerow(COLUMNAS_CSV)
+    for pedido, detalles in iterar_pedidos(pedidos, chunk_size):
+        for detalle in detalles:
+            yield writer.writerow([
+                pedido.id,
+                pedido.fecha_creacion.isoformat(),
+                pedido.precio_total_sin_impuestos,
+                pedido.precio_total_con_impuestos,
+                detalle.articulo_id,
+                detalle.articulo_referencia,
+                detalle.articulo_nombre,
+                detalle.articulo_precio_sin_impuestos,
+                detalle.articulo_impuesto_aplicable,
+                detalle.cantidad,
+            ])
+
+
+def exportar(formato: str, desde=None, hasta=None,
+             chunk_size: int = 1000) -> Iterator[str]:
+    """Genera la exportación de pedidos en el formato indicado."""
+    pedidos = pedidos_en_rango(desde, hasta)
+    if formato == 'csv':
+        return lineas_csv(pedidos, chunk_size)
+    return lineas_ndjson(pedidos, chunk_size)
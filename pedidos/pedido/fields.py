@@ -0,0 +1,23 @@
+from typing import Optional
+
+
+class CamposInvalidos(ValueError):
+    """El parámetro `fields` contiene campos desconocidos."""
+
+
+def campos_solicitados(params, permitidos) -> Optional[list]:
+    """Lee `?fields=a,b,c` y devuelve los campos pedidos.
+
+    Devuelve `None` si no se indica `fields`. El campo `id` se incluye
+    siempre, porque identifica la fila y sirve de cursor.
+    """
+    valor = params.get('fields')
+    if not valor:
+        return None
+    campos = [campo.strip() for campo in valor.split(',') if campo.strip()]
+    desconocidos = [campo for campo in campos if campo not in permitidos]
+    if desconocidos:
+        raise CamposInvalidos(
+            f"Campos desconocidos: {', '.join(desconocidos)}")
+    return ['id'] + [campo for campo in dict.fromkeys(campos)
+                     if campo != 'id']
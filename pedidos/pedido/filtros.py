@@ -0,0 +1,68 @@
+from decimal import Decimal, InvalidOperation
+from django.db.models import QuerySet
+from .exports import parsear_fecha
+from .models import DetallePedido, Pedido
+
+
+class FiltrosInvalidos(ValueError):
+    """Los filtros de la petición no son válidos."""
+
+
+def _importe(params, nombre: str) -> Decimal:
+    """Importe de un filtro; rechaza NaN, los infinitos y los que no caben
+    en el total del pedido."""
+    try:
+        valor = Decimal(params[nombre])
+    except InvalidOperation:
+        raise FiltrosInvalidos(f"{nombre} debe ser un importe")
+    campo = Pedido._meta.get_field('precio_total_con_impuestos')
+    if (not valor.is_finite()
+            or abs(valor) >= 10 ** (campo.max_digits - campo.decimal_places)):
+        raise FiltrosInvalidos(f"{nombre} debe ser un importe")
+    return valor
+
+
+def filtrar_pedidos(pedidos: QuerySet, params) -> QuerySet:
+    """Aplica a `pedidos` los filtros de la petición.
+
+    - `desde` y `hasta`: rango de `fecha_creacion` (`hasta` incluido si es
+      una fecha sin hora).
+    - `articulo_id` o `articulo_referencia`: pedidos con alguna línea de ese
+      artículo, con una subconsulta sobre el índice
+      `(articulo_id, pedido)` o `(articulo_referencia, pedido)` de las
+      líneas.
+    - `total_min` y `total_max`: rango del total con impuestos.
+    """
+    try:
+        desde = parsear_fecha(params.get('desde'))
+        hasta = parsear_fecha(params.get('hasta'), fin=True)
+    except ValueError as e:
+        raise FiltrosInvalidos(str(e))
+    if desde:
+        pedidos = pedidos.filter(fecha_creacion__gte=desde)
+    if hasta:
+        pedidos = pedidos.filter(fecha_creacion__lt=hasta)
+
+    detalles = None
+    if params.get('articulo_id'):
+        try:
+            articulo_id = int(params['articulo_id'])
+        except ValueError:
+            raise FiltrosInvalidos('articulo_id debe ser un entero')
+        detalles = DetallePedido.objects.filter(articulo_id=articulo_id)
+    if params.get('articulo_referencia'):
+        detalles = (detalles if detalles is not None
+                    else DetallePedido.objects.all()).filter(
+            articulo_referencia=params['articulo_referencia'])
+    if detalles is not None:
+        # Una subconsulta en lugar de un JOIN: no repite pedidos ni
+        # necesita DISTINCT, y la paginación por ID sigue igual
+        pedidos = pedidos.filter(id__in=detalles.values('pedido_id'))
+
+    if params.get('total_min'):
+        pedidos = pedidos.filter(
+            precio_total_con_impuestos__gte=_importe(params, 'total_min'))
+    if params.get('total_max'):
+        pedidos = pedidos.filter(
+            precio_total_con_impuestos__lte=_importe(params, 'total_max'))
+    return pedidos
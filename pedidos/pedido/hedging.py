@@ -0,0 +1,88 @@
+import math
+import threading
+from collections import deque
+
+
+class Hedging:
+    """Decide cuándo duplicar una consulta a Artículos que tarda.
+
+    Una consulta se duplica si no ha terminado tras el percentil
+    `percentil` de las últimas `muestras` latencias (`retardo_inicial`
+    mientras no hay `min_muestras`). Cada consulta suma `presupuesto` al
+    saldo, hasta `saldo_maximo`, y cada duplicado gasta uno: como mucho se
+    duplica esa fracción de las consultas y, con `presupuesto` limitado a
+    1, la carga nunca llega a más del doble.
+    """
+
+    def __init__(self, percentil: float = 95, presupuesto: float = 0.1,
+                 retardo_inicial: float = 0.05, muestras: int = 500,
+                 min_muestras: int = 20, saldo_maximo: float = 10) -> None:
+        self.percentil = percentil
+        self.presupuesto = min(max(presupuesto, 0.0), 1.0)
+        self.retardo_inicial = retardo_inicial
+        self.min_muestras = min_muestras
+        self.saldo_maximo = saldo_maximo
+        self._latencias = deque(maxlen=muestras)
+        self._retardo = retardo_inicial
+        self._nuevas = 0
+        self._saldo = 0.0
+        self._lock = threading.Lock()
+
+        self.consultas = 0
+        self.duplicadas = 0
+        self.sin_presupuesto = 0
+        self.ganadas_por_duplicado = 0
+
+    def registrar(self, segundos: float) -> None:
+        """Guarda la latencia de una consulta original."""
+        with self._lock:
+            self._latencias.append(segundos)
+            self._nuevas += 1
+
+    def retardo(self) -> float:
+        """Segundos que se espera antes de duplicar una consulta.
+
+        El percentil se recalcula cada `min_muestras` latencias nuevas, no
+        en cada consulta.
+        """
+        with self._lock:
+            if (len(self._latencias) >= self.min_muestras
+                    and self._nuevas >= self.min_muestras):
+                ordenadas = sorted(self._latencias)
+                posicion = math.ceil(len(ordenadas) * self.percentil / 100)
+                self._retardo = ordenadas[max(posicion, 1) - 1]
+                self._nuevas = 0
+            return self._retardo
+
+    def nueva_consulta(self) -> None:
+        with self._lock:
+            self.consultas += 1
+            self._saldo = min(self._saldo + self.presupuesto,
+                              self.saldo_maximo)
+
+    def duplicar(self) -> bool:
+        """Gasta presupuesto para duplicar una consulta, si queda."""
+        with self._lock:
+            if self._saldo < 1:
+                self.sin_presupuesto += 1
+                return False
+            self._saldo -= 1
+            self.duplicadas += 1
+            return True
+
+    def ganada_por_duplicado(self) -> None:
+        with self._lock:
+            self.ganadas_por_duplicado += 1
+
+    def estadisticas(self) -> dict:
+        """Consultas, duplicados y retardo actual."""
+        with self._lock:
+            return {
+                'consultas': self.consultas,
+                'duplicadas': self.duplicadas,
+                'sin_presupuesto': self.sin_presupuesto,
+                'ganadas_por_duplicado': self.ganadas_por_duplicado,
+                'retardo': self._retardo,
+                'percentil': self.percentil,
+                'presupuesto': self.presupuesto,
+            }
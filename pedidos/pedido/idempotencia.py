@@ -0,0 +1,125 @@
+import datetime
+import hashlib
+import json
+import time
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from .models import ClaveIdempotencia
+
+
+# Segundos que una petición puede tener reservada su clave; si el proceso
+# muere sin terminarla, pasado este tiempo otro reintento puede ejecutarla
+BLOQUEO = 60
+# Segundos entre consultas mientras se espera a la petición original
+INTERVALO_ESPERA = 0.1
+MAX_LONGITUD_CLAVE = 128
+
+
+class ErrorIdempotencia(Exception):
+    """La clave no se puede usar para esta petición."""
+
+    def __init__(self, mensaje: str,
+                 status_code: int = status.HTTP_409_CONFLICT) -> None:
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.status_code = status_code
+
+
+def huella(datos) -> str:
+    """Huella del cuerpo de una petición, independiente del orden de las
+    claves."""
+    contenido = json.dumps(datos, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(contenido.encode()).hexdigest()
+
+
+def reservar(usuario, clave: str, huella_peticion: str,
+             espera: float = 10) -> tuple:
+    """Reserva la clave para ejecutar la petición, o devuelve la respuesta
+    que ya se guardó con ella.
+
+    Un reintento con la respuesta guardada cuesta una sola consulta por el
+    índice único `(usuario, clave)`. Si la petición original sigue en curso
+    se espera hasta `espera` segundos a que termine. Devuelve el registro y
+    si es una reserva nueva; lanza `ErrorIdempotencia` si la clave se usó
+    con otro cuerpo o si la petición original no termina a tiempo.
+    """
+    if not clave or len(clave) > MAX_LONGITUD_CLAVE:
+        raise ErrorIdempotencia(
+            'La cabecera Idempotency-Key debe tener entre 1 y '
+            f'{MAX_LONGITUD_CLAVE} caracteres.', status.HTTP_400_BAD_REQUEST)
+
+    limite = time.monotonic() + espera
+    while True:
+        ahora = timezone.now()
+        registro = ClaveIdempotencia.objects.filter(
+            usuario=usuario, clave=clave).first()
+        if registro is None:
+            try:
+                with transaction.atomic():
+                    return ClaveIdempotencia.objects.create(
+                        usuario=usuario, clave=clave, huella=huella_peticion,
+                        expira=ahora + datetime.timedelta(seconds=BLOQUEO)
+                    ), True
+            except IntegrityError:
+                # Otra petición con la misma clave se ha adelantado
+                continue
+
+        if registro.expira <= ahora:
+            # Caducada, o abandonada por un proceso que murió a medias
+            ClaveIdempotencia.objects.filter(
+                id=registro.id, expira__lte=ahora).delete()
+            continue
+        if registro.huella != huella_peticion:
+            raise ErrorIdempotencia(
+                'La clave de idempotencia ya se usó con otra petición.',
+                status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if registro.estado == ClaveIdempotencia.COMPLETADA:
+            return registro, False
+        if time.monotonic() >= limite:
+            raise ErrorIdempotencia(
+                'Hay otra petición en curso con la misma clave de '
+                'idempotencia.')
+        time.sleep(INTERVALO_ESPERA)
+
+
+def renovar(registro: ClaveIdempotencia) -> bool:
+    """Amplía la reserva de la clave si esta petición todavía la tiene.
+
+    Dentro de una transacción deja la fila bloqueada hasta el final, así
+    nadie puede recuperar la clave antes de que se guarde la respuesta.
+    """
+    return ClaveIdempotencia.objects.filter(
+        id=registro.id, estado=ClaveIdempotencia.EN_CURSO).update(
+        expira=timezone.now() + datetime.timedelta(seconds=BLOQUEO)) == 1
+
+
+def completar(registro: ClaveIdempotencia, status_code: int, respuesta,
+              cabeceras: dict, ttl: int = 86400) -> None:
+    """Guarda la respuesta de la petición durante `ttl` segundos."""
+    registro.estado = ClaveIdempotencia.COMPLETADA
+    registro.status_code = status_code
+    registro.respuesta = respuesta
+    registro.cabeceras = cabeceras
+    registro.expira = timezone.now() + datetime.timedelta(seconds=ttl)
+    registro.save(update_fields=['estado', 'status_code', 'respuesta',
+                                 'cabeceras', 'expira'])
+
+
+def liberar(registro: ClaveIdempotencia) -> None:
+    """Libera la clave para que un reintento vuelva a ejecutar la
+    petición."""
+    ClaveIdempotencia.objects.filter(id=registro.id).delete()
+
+
+def limpiar(lote: int = 1000) -> int:
+    """Borra las claves caducadas por lotes. Devuelve cuántas se han
+    borrado."""
+    borradas = 0
+    while True:
+        ids = list(ClaveIdempotencia.objects
+                   .filter(expira__lte=timezone.now())
+                   .values_list('id', flat=True)[:lote])
+        if not ids:
+            return borradas
+        borradas += ClaveIdempotencia.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from pedido.exports import FORMATOS, exportar, parsear_fecha
+
+
+class Command(BaseCommand):
+    """Exporta todos los pedidos y sus líneas en NDJSON o CSV."""
+
+    help = 'Exporta los pedidos y sus líneas en NDJSON o CSV, fila a fila.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--formato', choices=FORMATOS, default='ndjson')
+        parser.add_argument('--desde', help='Fecha inicial (incluida).')
+        parser.add_argument('--hasta', help='Fecha final (incluida).')
+        parser.add_argument('--salida',
+                            help='Fichero de salida (por defecto stdout).')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options) -> None:
+        try:
+            desde = parsear_fecha(options['desde'])
+            hasta = parsear_fecha(options['hasta'], fin=True)
+        except ValueError as e:
+            raise CommandError(e)
+
+        lineas = exportar(options['formato'], desde, hasta,
+                          options['chunk_size'])
+        if options['salida']:
+            with open(options['salida'], 'w', newline='',
+                      encoding='utf-8') as salida:
+                salida.writelines(lineas)
+        else:
+            for linea in lineas:
+                self.stdout.write(linea, ending='')
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from pedido.idempotencia import limpiar
+
+
+class Command(BaseCommand):
+    """Borra las claves de idempotencia caducadas."""
+
+    help = ('Borra las respuestas guardadas con Idempotency-Key que han '
+            'caducado.')
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--lote', type=int, default=1000,
+                            help='Claves por DELETE.')
+
+    def handle(self, *args, **options) -> None:
+        borradas = limpiar(options['lote'])
+        self.stdout.write(f"Borradas {borradas} claves caducadas")
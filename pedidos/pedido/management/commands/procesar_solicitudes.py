@@ -0,0 +1,41 @@
+import time
+from django.core.management.base import BaseCommand
+from pedido.solicitudes import procesar_lote
+
+
+class Command(BaseCommand):
+    """Crea los pedidos de las solicitudes encoladas."""
+
+    help = ('Procesa por lotes las peticiones de creación de pedidos '
+            'encoladas en modo asíncrono.')
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--lote', type=int, default=100,
+                            help='Solicitudes que se reservan cada vez.')
+        parser.add_argument('--intervalo', type=float,
+                            help='Sigue esperando nuevas solicitudes y las '
+                                 'busca cada N segundos.')
+        parser.add_argument('--timeout', type=float, default=300,
+                            help='Segundos tras los que se recupera una '
+                                 'solicitud que otro worker dejó a medias.')
+        parser.add_argument('--max-intentos', type=int, default=5,
+                            help='Intentos tras los que una solicitud se '
+                                 'marca como errónea, también si el worker '
+                                 'muere sin terminarla.')
+        parser.add_argument('--espera-reintento', type=float, default=30,
+                            help='Segundos antes de reintentar una '
+                                 'solicitud que falló por un error temporal.')
+
+    def handle(self, *args, **options) -> None:
+        procesadas = 0
+        while True:
+            cantidad = procesar_lote(options['lote'], options['timeout'],
+                                     options['max_intentos'],
+                                     options['espera_reintento'])
+            procesadas += cantidad
+            if cantidad:
+                continue
+            if not options['intervalo']:
+                break
+            time.sleep(options['intervalo'])
+        self.stdout.write(f"{procesadas} solicitudes procesadas")
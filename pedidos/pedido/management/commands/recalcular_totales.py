@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+from pedido.models import DetallePedido, Pedido, redondear_totales, \
+    totales_detalles
+
+
+class Command(BaseCommand):
+    """Recalcula los totales de todos los pedidos a partir de sus líneas."""
+
+    help = ('Recalcula los totales de los pedidos por bloques de IDs: una '
+            'consulta agregada con las sumas de cada bloque y UPDATE por '
+            'lotes, redondeando igual que al crear los pedidos.')
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--chunk-size', type=int, default=10000,
+                            help='Pedidos por bloque.')
+        parser.add_argument('--desde-id', type=int, default=0,
+                            help='Primer ID, para continuar una ejecución '
+                                 'interrumpida.')
+
+    def handle(self, *args, **options) -> None:
+        rango = Pedido.objects.filter(id__gte=options['desde_id']).aggregate(
+            primero=Min('id'), ultimo=Max('id'))
+        if rango['primero'] is None:
+            return
+        ultimo = rango['ultimo']
+
+        chunk_size = options['chunk_size']
+        actualizados = 0
+        for inicio in range(rango['primero'], ultimo + 1, chunk_size):
+            fin = inicio + chunk_size
+            # Cada bloque en su propia transacción: los bloqueos duran poco
+            # y una interrupción no deshace lo ya recalculado
+            with transaction.atomic():
+                # Las sumas sin redondear salen de la base de datos y se
+                # redondean con `pricing`, como en `calcular_precio_total`
+                totales = {
+                    fila['pedido_id']: fila for fila in
+                    DetallePedido.objects
+                    .filter(pedido_id__gte=inicio, pedido_id__lt=fin)
+                    .order_by().values('pedido_id')
+                    .annotate(**totales_detalles())}
+                pedidos = list(Pedido.objects.filter(
+                    id__gte=inicio, id__lt=fin).only('id'))
+                for pedido in pedidos:
+                    (pedido.precio_total_sin_impuestos,
+                     pedido.precio_total_con_impuestos) = redondear_totales(
+                        totales.get(pedido.id))
+                Pedido.objects.bulk_update(
+                    pedidos, ['precio_total_sin_impuestos',
+                              'precio_total_con_impuestos'],
+                    batch_size=1000)
+            actualizados += len(pedidos)
+            self.stdout.write(f"Recalculados hasta el ID "
+                              f"{min(fin, ultimo + 1) - 1} "
+                              f"({actualizados} pedidos)")
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate
+from django.utils.dateparse import parse_date
+from pedido.exports import parsear_fecha
+from pedido.models import DetallePedido, VentaDiariaArticulo
+from pedido.ventas import IMPORTE
+
+
+class Command(BaseCommand):
+    """Recalcula las ventas diarias por artículo a partir de los pedidos."""
+
+    help = ('Vuelve a calcular las ventas diarias por artículo a partir de '
+            'las líneas de los pedidos, para cargar el histórico o corregir '
+            'desviaciones.')
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--desde', help='Primer día (YYYY-MM-DD).')
+        parser.add_argument('--hasta', help='Último día (YYYY-MM-DD).')
+        parser.add_argument('--lote', type=int, default=1000,
+                            help='Filas por INSERT.')
+
+    def _fecha(self, valor):
+        if valor is None:
+            return None
+        fecha = parse_date(valor)
+        if fecha is None:
+            raise CommandError(f"Fecha no válida: {valor}")
+        return fecha
+
+    def handle(self, *args, **options) -> None:
+        desde = self._fecha(options['desde'])
+        hasta = self._fecha(options['hasta'])
+
+        ventas = VentaDiariaArticulo.objects.all()
+        detalles = DetallePedido.objects.all()
+        if desde:
+            ventas = ventas.filter(fecha__gte=desde)
+            detalles = detalles.filter(
+                pedido__fecha_creacion__gte=parsear_fecha(options['desde']))
+        if hasta:
+            ventas = ventas.filter(fecha__lte=hasta)
+            detalles = detalles.filter(
+                pedido__fecha_creacion__lt=parsear_fecha(options['hasta'],
+                                                         fin=True))
+        filas = (detalles.annotate(fecha=TruncDate('pedido__fecha_creacion'))
+                 .order_by()
+                 .values('fecha', 'articulo_id')
+                 .annotate(unidades=Sum('cantidad'),
+                           importe=Sum(F('articulo_precio_sin_impuestos')
+                                       * F('cantidad'), output_field=IMPORTE)))
+
+        # Los días se borran y se reconstruyen en una sola transacción: las
+        # consultas nunca ven el rango a medias
+        creadas = 0
+        with transaction.atomic():
+            ventas.delete()
+            lote = []
+            for fila in filas.iterator():
+                lote.append(VentaDiariaArticulo(
+                    fecha=fila['fecha'], articulo_id=fila['articulo_id'],
+                    unidades=fila['unidades'],
+                    importe_sin_impuestos=fila['importe']))
+                if len(lote) >= options['lote']:
+                    VentaDiariaArticulo.objects.bulk_create(lote)
+                    creadas += len(lote)
+                    lote = []
+            VentaDiariaArticulo.objects.bulk_create(lote)
+            creadas += len(lote)
+        self.stdout.write(f"Reconstruidas {creadas} ventas diarias")
@@ -0,0 +1,45 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from pedido.clients import ArticulosServiceError, get_articulos_client
+from pedido.snapshot import refrescar_snapshot
+
+
+class Command(BaseCommand):
+    """Genera el snapshot del catálogo que comparten los workers."""
+
+    help = ('Actualiza el snapshot binario del catálogo de artículos con el '
+            'feed de cambios y lo sustituye de forma atómica.')
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--salida',
+                            help='Fichero del snapshot (por defecto '
+                                 'API_ARTICULOS_SNAPSHOT_PATH).')
+        parser.add_argument('--completo', action='store_true',
+                            help='Recorre el catálogo entero en lugar de '
+                                 'sólo los cambios.')
+        parser.add_argument('--intervalo', type=float,
+                            help='Repite el refresco cada N segundos.')
+
+    def handle(self, *args, **options) -> None:
+        ruta = options['salida'] or settings.API_ARTICULOS['SNAPSHOT_PATH']
+        if not ruta:
+            raise CommandError("No se ha configurado la ruta del snapshot")
+
+        client = get_articulos_client()
+        completo = options['completo']
+        while True:
+            try:
+                total = refrescar_snapshot(client, ruta, completo)
+            except ArticulosServiceError as e:
+                if not options['intervalo']:
+                    raise CommandError(e.mensaje)
+                self.stderr.write(f"Error al refrescar el catálogo: "
+                                  f"{e.mensaje}")
+            else:
+                self.stdout.write(f"Snapshot con {total} artículos en "
+                                  f"{ruta}")
+            if not options['intervalo']:
+                break
+            completo = False
+            time.sleep(options['intervalo'])
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.25 on 2026-10-17 21:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedido', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolicitudPedido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completada', 'Completada'), ('error', 'Error')], default='pendiente', max_length=10)),
+                ('datos', models.JSONField()),
+                ('error', models.TextField(blank=True, default='')),
+                ('codigo_error', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('reclamo', models.CharField(blank=True, max_length=32, null=True)),
+                ('fecha_creacion', models.DateTimeField(default=django.utils.timezone.now)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('pedido', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='pedido.pedido')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='solicitudpedido',
+            index=models.Index(fields=['estado', 'id'], name='solicitud_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitudpedido',
+            index=models.Index(fields=['reclamo'], name='solicitud_reclamo_idx'),
+        ),
+    ]
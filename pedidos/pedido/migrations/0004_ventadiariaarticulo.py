@@ -0,0 +1,27 @@
+# Generated by Django 3.2.25 on 2026-10-17 21:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedido', '0003_claveidempotencia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaDiariaArticulo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('articulo_id', models.PositiveIntegerField()),
+                ('unidades', models.BigIntegerField(default=0)),
+                ('importe_sin_impuestos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='ventadiariaarticulo',
+            constraint=models.UniqueConstraint(fields=('fecha', 'articulo_id'), name='venta_fecha_articulo_uniq'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-17 21:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedido', '0004_ventadiariaarticulo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='detallepedido',
+            index=models.Index(fields=['articulo_id', 'pedido'], name='detalle_articulo_pedido_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='detallepedido',
+            index=models.Index(fields=['articulo_referencia', 'pedido'], name='detalle_referencia_pedido_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['fecha_creacion', 'id'], name='pedido_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['precio_total_con_impuestos', 'id'], name='pedido_total_idx'),
+        ),
+    ]
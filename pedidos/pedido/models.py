@@ -1,5 +1,49 @@
+from decimal import Decimal
+from typing import Optional
+from django.conf import settings
 from django.db import models
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from .pricing import a_centimos, desde_centimos
+
+
+# Literal decimal, para que SQLite no haga una división entera cuando el
+# precio y el impuesto se han guardado sin decimales
+CIEN = Value(Decimal('100.00'))
+
+
+def totales_detalles() -> dict:
+    """Expresiones con la suma de las líneas sin impuestos y de sus
+    impuestos sin redondear."""
+    total = models.DecimalField(max_digits=20, decimal_places=2)
+    exacto = models.DecimalField(max_digits=30, decimal_places=6)
+    precio = F('articulo_precio_sin_impuestos')
+    impuesto = F('articulo_impuesto_aplicable')
+    return {
+        'sin_impuestos': Coalesce(
+            Sum(precio * F('cantidad'), output_field=total),
+            Value(0), output_field=total),
+        'impuestos': Coalesce(
+            Sum(precio * F('cantidad') * impuesto / CIEN,
+                output_field=exacto),
+            Value(0), output_field=exacto),
+    }
+
+
+def redondear_totales(totales: Optional[dict]) -> tuple:
+    """Totales sin y con impuestos a partir de las sumas de
+    `totales_detalles` (`None` si el pedido no tiene líneas).
+
+    Se redondea en Python con las reglas de `pricing`: el impuesto del
+    pedido una sola vez y con los medios hacia arriba, sea cual sea la base
+    de datos.
+    """
+    if totales is None:
+        return desde_centimos(0), desde_centimos(0)
+    total = a_centimos(totales['sin_impuestos'])
+    return (desde_centimos(total),
+            desde_centimos(total + a_centimos(totales['impuestos'])))
 
 
 class Pedido(models.Model):
@@ -17,20 +61,23 @@ class Pedido(models.Model):
     )
     fecha_creacion = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            # Filtros del listado por fecha y por total
+            models.Index(fields=['fecha_creacion', 'id'],
+                         name='pedido_fecha_idx'),
+            models.Index(fields=['precio_total_con_impuestos', 'id'],
+                         name='pedido_total_idx'),
+        ]
+
     def calcular_precio_total(self) -> None:
-        """Calcula el precio total del pedido."""
+        """Calcula el precio total del pedido con una sola consulta."""
 
-        total_sin_impuestos = sum(
-            detalle.articulo_precio_sin_impuestos *
-            detalle.cantidad for detalle in self.detallepedido_set.all())
-        total_con_impuestos = sum(
-            (detalle.articulo_precio_sin_impuestos
-                + (detalle.articulo_precio_sin_impuestos
-                    * detalle.articulo_impuesto_aplicable / 100))
-            * detalle.cantidad for detalle in self.detallepedido_set.all())
-        self.precio_total_sin_impuestos = total_sin_impuestos
-        self.precio_total_con_impuestos = total_con_impuestos
-        self.save()
+        (self.precio_total_sin_impuestos,
+         self.precio_total_con_impuestos) = redondear_totales(
+            self.detallepedido_set.aggregate(**totales_detalles()))
+        self.save(update_fields=['precio_total_sin_impuestos',
+                                 'precio_total_con_impuestos'])
 
 
 class DetallePedido(models.Model):
@@ -45,3 +92,101 @@ class DetallePedido(models.Model):
     articulo_impuesto_aplicable = models.DecimalField(max_digits=5,
                                                       decimal_places=2)
     cantidad = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            # Pedidos que contienen un artículo, sin leer las líneas
+            models.Index(fields=['articulo_id', 'pedido'],
+                         name='detalle_articulo_pedido_idx'),
+            models.Index(fields=['articulo_referencia', 'pedido'],
+                         name='detalle_referencia_pedido_idx'),
+        ]
+
+
+class SolicitudPedido(models.Model):
+    """Petición de creación de un pedido pendiente de procesar."""
+
+    PENDIENTE = 'pendiente'
+    PROCESANDO = 'procesando'
+    COMPLETADA = 'completada'
+    ERROR = 'error'
+    ESTADOS = [
+        (PENDIENTE, 'Pendiente'),
+        (PROCESANDO, 'Procesando'),
+        (COMPLETADA, 'Completada'),
+        (ERROR, 'Error'),
+    ]
+
+    estado = models.CharField(max_length=10, choices=ESTADOS,
+                              default=PENDIENTE)
+    # Cuerpo de la petición de creación, tal como se recibió
+    datos = models.JSONField()
+    pedido = models.ForeignKey(Pedido, null=True, blank=True,
+                               on_delete=models.SET_NULL)
+    error = models.TextField(blank=True, default='')
+    codigo_error = models.PositiveSmallIntegerField(null=True, blank=True)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    # Identifica al worker que la está procesando
+    reclamo = models.CharField(max_length=32, null=True, blank=True)
+    fecha_creacion = models.DateTimeField(default=timezone.now)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Búsqueda de las siguientes solicitudes por procesar
+            models.Index(fields=['estado', 'id'],
+                         name='solicitud_estado_idx'),
+            models.Index(fields=['reclamo'], name='solicitud_reclamo_idx'),
+        ]
+
+
+class ClaveIdempotencia(models.Model):
+    """Respuesta guardada de una creación hecha con `Idempotency-Key`."""
+
+    EN_CURSO = 'en_curso'
+    COMPLETADA = 'completada'
+    ESTADOS = [
+        (EN_CURSO, 'En curso'),
+        (COMPLETADA, 'Completada'),
+    ]
+
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL,
+                                on_delete=models.CASCADE)
+    clave = models.CharField(max_length=128)
+    # SHA-256 del cuerpo de la petición
+    huella = models.CharField(max_length=64)
+    estado = models.CharField(max_length=10, choices=ESTADOS,
+                              default=EN_CURSO)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    respuesta = models.JSONField(null=True, blank=True)
+    cabeceras = models.JSONField(default=dict, blank=True)
+    fecha_creacion = models.DateTimeField(default=timezone.now)
+    expira = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'clave'],
+                                    name='idempotencia_usuario_clave_uniq'),
+        ]
+        indexes = [
+            # Borrado de las claves caducadas
+            models.Index(fields=['expira'], name='idempotencia_expira_idx'),
+        ]
+
+
+class VentaDiariaArticulo(models.Model):
+    """Unidades vendidas e importe sin impuestos de un artículo en un día,
+    según la fecha de creación de los pedidos."""
+
+    fecha = models.DateField()
+    articulo_id = models.PositiveIntegerField()
+    unidades = models.BigIntegerField(default=0)
+    importe_sin_impuestos = models.DecimalField(max_digits=14,
+                                                decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            # También sirve para las consultas por rango de fechas
+            models.UniqueConstraint(fields=['fecha', 'articulo_id'],
+                                    name='venta_fecha_articulo_uniq'),
+        ]
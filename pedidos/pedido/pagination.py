@@ -0,0 +1,37 @@
+from typing import Optional, Tuple
+from django.db.models import QuerySet
+
+
+class PaginacionInvalida(ValueError):
+    """Los parámetros de paginación de la petición no son válidos."""
+
+
+def paginar_por_id(queryset: QuerySet, params, tamano_defecto: int,
+                   tamano_maximo: int) -> Tuple[list, Optional[str]]:
+    """Pagina un queryset por cursor (keyset) sobre su clave primaria.
+
+    Lee `cursor` y `page_size` de `params` y devuelve los objetos de la
+    página junto al cursor de la página siguiente (`None` si es la última).
+    La consulta usa `WHERE id > cursor ORDER BY id LIMIT n`, por lo que su
+    coste no depende de la posición de la página.
+    """
+    try:
+        tamano = int(params.get('page_size', tamano_defecto))
+        cursor = params.get('cursor')
+        cursor = int(cursor) if cursor else None
+    except (TypeError, ValueError):
+        raise PaginacionInvalida('El cursor y page_size deben ser enteros')
+    if tamano <= 0:
+        raise PaginacionInvalida('page_size debe ser mayor que 0')
+    tamano = min(tamano, tamano_maximo)
+
+    queryset = queryset.order_by('id')
+    if cursor is not None:
+        queryset = queryset.filter(id__gt=cursor)
+
+    # Se pide un elemento de más para saber si hay página siguiente
+    objetos = list(queryset[:tamano + 1])
+    if len(objetos) > tamano:
+        objetos = objetos[:tamano]
+        return objetos, str(objetos[-1].id)
+    return objetos, None
@@ -0,0 +1,132 @@
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Sequence, Tuple
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Reglas de cálculo de precios:
+#
+# - Los precios se expresan en céntimos y los impuestos en puntos básicos
+#   (centésimas de punto porcentual: 21,00 % son 2100), siempre enteros.
+# - El total sin impuestos de un pedido es exacto: la suma de
+#   precio * cantidad de sus líneas.
+# - El impuesto de un pedido se calcula sobre la suma exacta de sus líneas y
+#   se redondea una sola vez, al céntimo y con los medios hacia arriba.
+# - El precio unitario con impuestos de una línea se redondea igual.
+CENTIMO = Decimal('0.01')
+PUNTOS_POR_UNIDAD = 10000
+
+# A partir de este número de líneas compensa el cálculo con NumPy
+MIN_LINEAS_VECTORIZADO = 64
+# Límite para operar con enteros de 64 bits sin desbordamiento
+MAX_INT64 = 2 ** 63 - 1
+
+
+def a_centimos(valor) -> int:
+    """Convierte un importe (str, Decimal, int o float) a céntimos."""
+    return int((Decimal(str(valor)) / CENTIMO).to_integral_value(
+        ROUND_HALF_UP))
+
+
+def a_puntos_basicos(porcentaje) -> int:
+    """Convierte un porcentaje de impuesto a puntos básicos."""
+    return a_centimos(porcentaje)
+
+
+def desde_centimos(centimos: int) -> Decimal:
+    """Importe en euros con dos decimales."""
+    return Decimal(centimos) * CENTIMO
+
+
+def formatear_centimos(centimos: int) -> str:
+    """Importe en euros como texto con dos decimales, igual que se
+    serializa un `Decimal` pero sin crearlo."""
+    signo = '-' if centimos < 0 else ''
+    euros, resto = divmod(abs(centimos), 100)
+    return f'{signo}{euros}.{resto:02}'
+
+
+def desde_puntos_basicos(puntos: int) -> Decimal:
+    """Porcentaje de impuesto con dos decimales."""
+    return desde_centimos(puntos)
+
+
+def _dividir_redondeando(numerador: int, divisor: int) -> int:
+    """División entera redondeando los medios hacia arriba (numerador
+    no negativo)."""
+    return (2 * numerador + divisor) // (2 * divisor)
+
+
+def precio_con_impuestos(centimos: int, puntos: int) -> int:
+    """Precio unitario con impuestos, en céntimos."""
+    return _dividir_redondeando(centimos * (PUNTOS_POR_UNIDAD + puntos),
+                                PUNTOS_POR_UNIDAD)
+
+
+def _cabe_en_int64(*maximos: int) -> bool:
+    producto = 1
+    for maximo in maximos:
+        producto *= max(maximo, 1)
+    return producto <= MAX_INT64
+
+
+def _vectorizar(lineas: int, *columnas: Sequence[int]) -> bool:
+    """Indica si compensa usar NumPy con estas columnas."""
+    return (numpy is not None and lineas >= MIN_LINEAS_VECTORIZADO
+            and all(min(columna) >= 0 for columna in columnas))
+
+
+def _array(columna: Sequence[int]):
+    return numpy.fromiter(columna, dtype=numpy.int64, count=len(columna))
+
+
+def precios_con_impuestos(centimos: Sequence[int],
+                          puntos: Sequence[int]) -> list:
+    """Precios unitarios con impuestos de muchas líneas a la vez.
+
+    Con muchas líneas se calculan con NumPy, salvo que los importes puedan
+    desbordar los enteros de 64 bits.
+    """
+    if not (_vectorizar(len(centimos), centimos, puntos) and _cabe_en_int64(
+            2, max(centimos), PUNTOS_POR_UNIDAD + max(puntos))):
+        return [precio_con_impuestos(c, p) for c, p in zip(centimos, puntos)]
+    numerador = _array(centimos) * (PUNTOS_POR_UNIDAD + _array(puntos))
+    return ((2 * numerador + PUNTOS_POR_UNIDAD)
+            // (2 * PUNTOS_POR_UNIDAD)).tolist()
+
+
+def calcular_totales(centimos: Sequence[int], puntos: Sequence[int],
+                     cantidades: Sequence[int]) -> Tuple[int, int]:
+    """Totales sin y con impuestos, en céntimos, de las líneas de un
+    pedido, dadas por columnas.
+
+    Se suman con enteros de Python y en una sola pasada: con las líneas en
+    listas de Python, convertirlas a arrays de NumPy cuesta más que esta
+    pasada (ver `benchmarks/bench_quote.py`).
+    """
+    total = 0
+    impuestos = 0
+    for c, p, cantidad in zip(centimos, puntos, cantidades):
+        importe = c * cantidad
+        total += importe
+        impuestos += importe * p
+    return total, total + _dividir_redondeando(impuestos, PUNTOS_POR_UNIDAD)
+
+
+def totales_de_detalles(detalles: Sequence) -> Tuple[Decimal, Decimal]:
+    """Totales sin y con impuestos de unas líneas de pedido."""
+    total, total_con_impuestos = calcular_totales(
+        [a_centimos(d.articulo_precio_sin_impuestos) for d in detalles],
+        [a_puntos_basicos(d.articulo_impuesto_aplicable) for d in detalles],
+        [d.cantidad for d in detalles])
+    return desde_centimos(total), desde_centimos(total_con_impuestos)
+
+
+def precios_de_detalles(detalles: Sequence) -> list:
+    """Precio unitario con impuestos de cada línea de pedido."""
+    return [desde_centimos(precio) for precio in precios_con_impuestos(
+        [a_centimos(d.articulo_precio_sin_impuestos) for d in detalles],
+        [a_puntos_basicos(d.articulo_impuesto_aplicable) for d in detalles])]
@@ -0,0 +1,210 @@
+from django.db import connection, transaction
+from rest_framework import status
+from . import ventas
+from .clients import get_articulos_client
+from .models import DetallePedido, Pedido
+from .pricing import a_centimos, a_puntos_basicos, calcular_totales, \
+    desde_centimos, desde_puntos_basicos, formatear_centimos, \
+    precios_con_impuestos
+
+
+class PedidoInvalido(Exception):
+    """Los artículos pedidos no forman un pedido válido."""
+
+    def __init__(self, mensaje: str,
+                 status_code: int = status.HTTP_400_BAD_REQUEST) -> None:
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.status_code = status_code
+
+
+class LineaPresupuesto:
+    """Línea de un presupuesto, con los importes en céntimos."""
+
+    __slots__ = ('articulo', 'centimos', 'puntos', 'cantidad',
+                 'centimos_con_impuestos')
+
+    def __init__(self, articulo: dict, centimos: int, puntos: int,
+                 cantidad: int, centimos_con_impuestos: int) -> None:
+        self.articulo = articulo
+        self.centimos = centimos
+        self.puntos = puntos
+        self.cantidad = cantidad
+        self.centimos_con_impuestos = centimos_con_impuestos
+
+    def a_dict(self) -> dict:
+        return {
+            'articulo_id': self.articulo['id'],
+            'referencia': self.articulo['referencia'],
+            'nombre': self.articulo['nombre'],
+            'cantidad': self.cantidad,
+            'precio_sin_impuestos': formatear_centimos(self.centimos),
+            'impuesto_aplicable': formatear_centimos(self.puntos),
+            'precio_con_impuestos': formatear_centimos(
+                self.centimos_con_impuestos),
+            'importe_sin_impuestos': formatear_centimos(
+                self.centimos * self.cantidad),
+        }
+
+
+class Presupuesto:
+    """Líneas y totales de un pedido, calculados sin guardarlo."""
+
+    def __init__(self, lineas: list) -> None:
+        self.lineas = lineas
+        self.total_sin_impuestos, self.total_con_impuestos = \
+            calcular_totales([linea.centimos for linea in lineas],
+                             [linea.puntos for linea in lineas],
+                             [linea.cantidad for linea in lineas])
+
+    def a_dict(self) -> dict:
+        """Presupuesto con los importes como texto con dos decimales."""
+        return {
+            'articulos': [linea.a_dict() for linea in self.lineas],
+            'precio_total_sin_impuestos': formatear_centimos(
+                self.total_sin_impuestos),
+            'impuestos': formatear_centimos(
+                self.total_con_impuestos - self.total_sin_impuestos),
+            'precio_total_con_impuestos': formatear_centimos(
+                self.total_con_impuestos),
+        }
+
+
+def _entero(valor) -> int:
+    """Convierte un entero o un texto con un entero; lanza `ValueError`
+    con cualquier otro valor."""
+    if isinstance(valor, bool):
+        raise ValueError(valor)
+    if isinstance(valor, int):
+        return valor
+    if isinstance(valor, str) and valor.strip().isdigit():
+        return int(valor)
+    raise ValueError(valor)
+
+
+def normalizar_articulos(articulos) -> list:
+    """Comprueba el formato de los artículos pedidos y devuelve una copia
+    con el `id` y la `cantidad` como enteros, tal y como se indexan los
+    artículos que devuelve el cliente."""
+    if not isinstance(articulos, list) or not all(
+            isinstance(articulo_data, dict) for articulo_data in articulos):
+        raise PedidoInvalido('Formato de artículos inválido.')
+    normalizados = []
+    for articulo_data in articulos:
+        try:
+            articulo_id = _entero(articulo_data.get('id'))
+        except ValueError:
+            raise PedidoInvalido('El ID de cada artículo debe ser un entero.')
+        try:
+            cantidad = _entero(articulo_data.get('cantidad'))
+        except ValueError:
+            raise PedidoInvalido('La cantidad debe ser un entero.')
+        normalizados.append({**articulo_data, 'id': articulo_id,
+                             'cantidad': cantidad})
+    return normalizados
+
+
+def validar_articulos(articulos) -> list:
+    """Comprueba que se piden artículos, con IDs enteros y cantidades
+    positivas. Devuelve los artículos normalizados."""
+    if not articulos:
+        raise PedidoInvalido('No se proporcionaron artículos.')
+    articulos = normalizar_articulos(articulos)
+    if any(articulo_data['cantidad'] <= 0 for articulo_data in articulos):
+        raise PedidoInvalido('La cantidad debe ser positiva.')
+    return articulos
+
+
+def presupuestar(articulos: list, client=None) -> Presupuesto:
+    """Calcula las líneas y los totales de un pedido sin guardarlo.
+
+    Los artículos repetidos se consultan una sola vez. Lanza
+    `PedidoInvalido` si los datos no son válidos y los errores del cliente
+    de Artículos (por ejemplo `ArticuloNoEncontrado`) si no se pueden
+    obtener los artículos.
+    """
+    articulos = validar_articulos(articulos)
+    client = client or get_articulos_client()
+    # Validar y obtener la información de todos los artículos a la vez
+    articulos_info = client.obtener_articulos(
+        articulo_data['id'] for articulo_data in articulos)
+    return presupuesto_de(articulos, articulos_info)
+
+
+def presupuesto_de(articulos: list, articulos_info: dict) -> Presupuesto:
+    """Presupuesto de unos artículos ya validados y resueltos."""
+    # Cada artículo se convierte a céntimos una sola vez
+    precios = {}
+    centimos = []
+    puntos = []
+    for articulo_data in articulos:
+        articulo_id = articulo_data['id']
+        if articulo_id not in precios:
+            articulo_info = articulos_info[articulo_id]
+            precios[articulo_id] = (
+                a_centimos(articulo_info['precio_sin_impuestos']),
+                a_puntos_basicos(articulo_info['impuesto_aplicable']))
+        c, p = precios[articulo_id]
+        centimos.append(c)
+        puntos.append(p)
+    con_impuestos = precios_con_impuestos(centimos, puntos)
+
+    return Presupuesto([
+        LineaPresupuesto(articulos_info[articulo_data['id']], c, p,
+                         articulo_data['cantidad'], c_con_impuestos)
+        for articulo_data, c, p, c_con_impuestos
+        in zip(articulos, centimos, puntos, con_impuestos)
+    ])
+
+
+def _nuevo_pedido(presupuesto: Presupuesto) -> Pedido:
+    return Pedido(
+        precio_total_sin_impuestos=desde_centimos(
+            presupuesto.total_sin_impuestos),
+        precio_total_con_impuestos=desde_centimos(
+            presupuesto.total_con_impuestos)
+    )
+
+
+def _detalles(pedido: Pedido, presupuesto: Presupuesto) -> list:
+    return [
+        DetallePedido(
+            pedido=pedido,
+            articulo_id=linea.articulo['id'],
+            articulo_referencia=linea.articulo['referencia'],
+            articulo_nombre=linea.articulo['nombre'],
+            articulo_precio_sin_impuestos=desde_centimos(linea.centimos),
+            articulo_impuesto_aplicable=desde_puntos_basicos(linea.puntos),
+            cantidad=linea.cantidad
+        )
+        for linea in presupuesto.lineas
+    ]
+
+
+def crear_pedido(presupuesto: Presupuesto) -> Pedido:
+    """Guarda el pedido de un presupuesto y todas sus líneas en una sola
+    transacción."""
+    return crear_pedidos([presupuesto])[0]
+
+
+def crear_pedidos(presupuestos: list) -> list:
+    """Guarda varios pedidos y todas sus líneas en una sola transacción.
+
+    Los pedidos se insertan con `bulk_create` si la base de datos devuelve
+    los IDs de una inserción múltiple (PostgreSQL, MariaDB 10.5+); si no
+    (MySQL, SQLite), uno a uno. Las líneas de todos ellos se insertan
+    siempre con un único `bulk_create` y se suman a las ventas diarias.
+    """
+    pedidos = [_nuevo_pedido(presupuesto) for presupuesto in presupuestos]
+    with transaction.atomic():
+        if connection.features.can_return_rows_from_bulk_insert:
+            Pedido.objects.bulk_create(pedidos)
+        else:
+            for pedido in pedidos:
+                pedido.save(force_insert=True)
+        lineas = [_detalles(pedido, presupuesto)
+                  for pedido, presupuesto in zip(pedidos, presupuestos)]
+        DetallePedido.objects.bulk_create(
+            [detalle for detalles in lineas for detalle in detalles])
+        ventas.registrar_pedidos(zip(pedidos, lineas))
+    return pedidos
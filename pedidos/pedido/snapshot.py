@@ -0,0 +1,282 @@
+import bisect
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from typing import Iterable, Optional
+
+
+# Formato del fichero (little-endian, sin relleno):
+#
+#   cabecera | IDs ordenados (u64 cada uno) | registros de ancho fijo
+#
+# El registro i corresponde al ID i, así que el índice de IDs hace de
+# índice de desplazamientos: se busca el ID por bisección y su registro está
+# en `inicio_registros + i * REGISTRO.size`.
+MAGIC = b'CATP'
+FORMATO = 1
+CABECERA = struct.Struct('<4sHHQd64s')
+ID = struct.Struct('<Q')
+# id, versión, precio en céntimos, impuesto en centésimas de punto,
+# referencia y nombre en UTF-8 rellenos con ceros
+REGISTRO = struct.Struct('<QIqi128s320s')
+
+CENTIMOS = Decimal('0.01')
+
+
+class SnapshotInvalido(Exception):
+    """El fichero no es un snapshot del catálogo con este formato."""
+
+
+def _texto(valor: str, ancho: int) -> Optional[bytes]:
+    codificado = valor.encode('utf-8')
+    if len(codificado) > ancho or b'\0' in codificado:
+        return None
+    return codificado
+
+
+def empaquetar(articulo: dict) -> Optional[bytes]:
+    """Registro binario de un artículo, o `None` si no cabe en el formato.
+
+    Los artículos que no caben no se guardan en el snapshot y se siguen
+    pidiendo al servicio; nunca se truncan sus datos.
+    """
+    referencia = _texto(articulo['referencia'], 128)
+    nombre = _texto(articulo['nombre'], 320)
+    if referencia is None or nombre is None:
+        return None
+    precio = Decimal(str(articulo['precio_sin_impuestos'])) / CENTIMOS
+    impuesto = Decimal(str(articulo['impuesto_aplicable'])) / CENTIMOS
+    if precio != precio.to_integral_value() \
+            or impuesto != impuesto.to_integral_value():
+        return None
+    return REGISTRO.pack(int(articulo['id']), int(articulo['version']),
+                         int(precio), int(impuesto), referencia, nombre)
+
+
+def desempaquetar(registro) -> dict:
+    """Artículo con la misma forma que lo devuelve el servicio."""
+    (articulo_id, version, precio, impuesto, referencia,
+     nombre) = REGISTRO.unpack(registro)
+    return {
+        'id': articulo_id,
+        'referencia': referencia.rstrip(b'\0').decode('utf-8'),
+        'nombre': nombre.rstrip(b'\0').decode('utf-8'),
+        'precio_sin_impuestos': str(Decimal(precio) * CENTIMOS),
+        'impuesto_aplicable': str(Decimal(impuesto) * CENTIMOS),
+        'version': version,
+    }
+
+
+def escribir_snapshot(ruta: str, registros: Iterable[bytes],
+                      cursor: Optional[str] = None) -> int:
+    """Escribe un snapshot y lo sustituye de forma atómica.
+
+    Se escribe en un fichero temporal del mismo directorio y se renombra
+    con `os.replace`, así los procesos que tienen abierto el anterior lo
+    siguen leyendo hasta que se dan cuenta del cambio. Devuelve el número
+    de artículos.
+    """
+    registros = sorted(registros, key=lambda registro: ID.unpack_from(
+        registro)[0])
+    cursor = (cursor or '').encode('ascii')
+    if len(cursor) > 64:
+        raise ValueError("El cursor no cabe en la cabecera del snapshot")
+
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    descriptor, temporal = tempfile.mkstemp(dir=directorio,
+                                            prefix='.catalogo-')
+    try:
+        with os.fdopen(descriptor, 'wb') as fichero:
+            fichero.write(CABECERA.pack(MAGIC, FORMATO, 0, len(registros),
+                                        time.time(), cursor))
+            for registro in registros:
+                fichero.write(registro[:ID.size])
+            for registro in registros:
+                fichero.write(registro)
+            fichero.flush()
+            os.fsync(fichero.fileno())
+        os.chmod(temporal, 0o644)
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+    return len(registros)
+
+
+class Snapshot:
+    """Snapshot del catálogo abierto con `mmap`.
+
+    Todos los procesos que abren el mismo fichero comparten sus páginas en
+    la caché del sistema operativo, así que la memoria no crece con el
+    número de workers.
+    """
+
+    def __init__(self, ruta: str) -> None:
+        self.ruta = ruta
+        with open(ruta, 'rb') as fichero:
+            self._stat = os.fstat(fichero.fileno())
+            if self._stat.st_size < CABECERA.size:
+                raise SnapshotInvalido(ruta)
+            self._mmap = mmap.mmap(fichero.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        magic, formato, _, total, self.generado, cursor = \
+            CABECERA.unpack_from(self._mmap)
+        inicio_ids = CABECERA.size
+        self._inicio_registros = inicio_ids + total * ID.size
+        if (magic != MAGIC or formato != FORMATO or len(self._mmap)
+                != self._inicio_registros + total * REGISTRO.size):
+            self._mmap.close()
+            raise SnapshotInvalido(ruta)
+        self.cursor = cursor.rstrip(b'\0').decode('ascii') or None
+        self._vista = memoryview(self._mmap)
+        # `cast` usa el orden de bytes nativo, little-endian en los
+        # servidores en los que se despliega
+        self._ids = self._vista[inicio_ids:self._inicio_registros].cast('Q')
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _posicion(self, articulo_id: int) -> Optional[int]:
+        posicion = bisect.bisect_left(self._ids, articulo_id)
+        if posicion < len(self._ids) and self._ids[posicion] == articulo_id:
+            return posicion
+        return None
+
+    def registro(self, articulo_id: int) -> Optional[memoryview]:
+        """Vista, sin copiar, del registro binario de un artículo."""
+        posicion = self._posicion(articulo_id)
+        if posicion is None:
+            return None
+        inicio = self._inicio_registros + posicion * REGISTRO.size
+        return self._vista[inicio:inicio + REGISTRO.size]
+
+    def get(self, articulo_id) -> Optional[dict]:
+        """Devuelve un artículo del snapshot, o `None` si no está."""
+        registro = self.registro(int(articulo_id))
+        return desempaquetar(registro) if registro is not None else None
+
+    def registros(self):
+        """Recorre todos los registros binarios en orden de ID."""
+        for posicion in range(len(self._ids)):
+            inicio = self._inicio_registros + posicion * REGISTRO.size
+            yield bytes(self._vista[inicio:inicio + REGISTRO.size])
+
+    def es_actual(self) -> bool:
+        """Indica si el fichero en `ruta` sigue siendo el que está abierto."""
+        try:
+            stat = os.stat(self.ruta)
+        except FileNotFoundError:
+            return False
+        return (stat.st_ino, stat.st_dev, stat.st_mtime_ns) == (
+            self._stat.st_ino, self._stat.st_dev, self._stat.st_mtime_ns)
+
+    def cerrar(self) -> None:
+        self._ids.release()
+        self._vista.release()
+        self._mmap.close()
+
+
+class CatalogoCompartido:
+    """Acceso de un proceso al snapshot más reciente del catálogo.
+
+    Comprueba como mucho cada `intervalo` segundos si el refresco ha
+    sustituido el fichero y, si es así, abre el nuevo. Un snapshot generado
+    hace más de `max_edad` segundos no se usa.
+    """
+
+    def __init__(self, ruta: str, max_edad: float = 600,
+                 intervalo: float = 1, reloj=time.monotonic) -> None:
+        self.ruta = ruta
+        self.max_edad = max_edad
+        self.intervalo = intervalo
+        self._reloj = reloj
+        self._snapshot = None
+        self._comprobado = None
+        self._lock = threading.Lock()
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.recargas = 0
+
+    def _actual(self) -> Optional[Snapshot]:
+        ahora = self._reloj()
+        if (self._comprobado is not None
+                and ahora - self._comprobado < self.intervalo):
+            return self._snapshot
+        with self._lock:
+            self._comprobado = ahora
+            if self._snapshot is None or not self._snapshot.es_actual():
+                try:
+                    snapshot = Snapshot(self.ruta)
+                except (FileNotFoundError, SnapshotInvalido):
+                    snapshot = None
+                # El anterior no se cierra: otros hilos pueden estar
+                # leyéndolo y se libera cuando deja de usarse
+                self._snapshot = snapshot
+                if snapshot is not None:
+                    self.recargas += 1
+            return self._snapshot
+
+    def get(self, articulo_id) -> Optional[dict]:
+        """Devuelve el artículo si está en un snapshot vigente."""
+        snapshot = self._actual()
+        if snapshot is None or time.time() - snapshot.generado > self.max_edad:
+            self.fallos += 1
+            return None
+        articulo = snapshot.get(articulo_id)
+        if articulo is None:
+            self.fallos += 1
+        else:
+            self.aciertos += 1
+        return articulo
+
+    def estadisticas(self) -> dict:
+        """Métricas de uso del snapshot."""
+        snapshot = self._snapshot
+        return {
+            'ruta': self.ruta,
+            'articulos': len(snapshot) if snapshot is not None else 0,
+            'generado': snapshot.generado if snapshot is not None else None,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'recargas': self.recargas,
+        }
+
+
+def refrescar_snapshot(client, ruta: str, completo: bool = False,
+                       limite: int = 1000) -> int:
+    """Actualiza el snapshot en `ruta` con el feed de cambios de Artículos.
+
+    Parte del cursor guardado en el snapshot actual y sólo descarga lo que
+    ha cambiado desde entonces; con `completo` (o si no hay snapshot)
+    recorre el catálogo entero. Devuelve el número de artículos.
+    """
+    registros = {}
+    cursor = None
+    if not completo:
+        try:
+            anterior = Snapshot(ruta)
+        except (FileNotFoundError, SnapshotInvalido):
+            anterior = None
+        if anterior is not None:
+            cursor = anterior.cursor
+            for registro in anterior.registros():
+                registros[ID.unpack_from(registro)[0]] = registro
+            anterior.cerrar()
+
+    while True:
+        data = client.obtener_cambios(cursor, limite)
+        for articulo in data['articulos']:
+            registro = empaquetar(articulo)
+            if registro is None:
+                registros.pop(int(articulo['id']), None)
+            else:
+                registros[int(articulo['id'])] = registro
+        cursor = data['siguiente_cursor'] or cursor
+        if not data['hay_mas']:
+            break
+    return escribir_snapshot(ruta, registros.values(), cursor)
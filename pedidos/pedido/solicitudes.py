@@ -0,0 +1,143 @@
+import datetime
+import logging
+import uuid
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .clients import ArticulosServiceError, get_articulos_client
+from .models import SolicitudPedido
+from .services import PedidoInvalido, crear_pedido, presupuestar, \
+    validar_articulos
+
+
+logger = logging.getLogger(__name__)
+
+# Errores del servicio de Artículos que no se arreglan reintentando
+ERRORES_DEFINITIVOS = (400, 404)
+
+
+def encolar(articulos: list) -> SolicitudPedido:
+    """Guarda una petición de creación para procesarla más tarde.
+
+    Sólo se comprueba el formato; los artículos se consultan al procesarla.
+    """
+    return SolicitudPedido.objects.create(
+        datos={'articulos': validar_articulos(articulos)})
+
+
+def reclamar(lote: int, timeout: float,
+             espera_reintento: float = 30, max_intentos: int = 5) -> tuple:
+    """Reserva hasta `lote` solicitudes para este worker.
+
+    Se reservan con un `UPDATE` condicionado al estado, así dos workers no
+    pueden quedarse con la misma aunque no haya `SELECT ... SKIP LOCKED`.
+    Las que fallaron por un error temporal esperan `espera_reintento`
+    segundos y se recuperan las que un worker dejó a medias hace más de
+    `timeout` segundos, salvo que ya se hayan intentado `max_intentos`
+    veces: esas se marcan como erróneas, para que una solicitud que hace
+    caer al worker no se reintente sin fin. Devuelve el identificador de
+    la reserva y las solicitudes reservadas.
+    """
+    ahora = timezone.now()
+    SolicitudPedido.objects.filter(
+        estado=SolicitudPedido.PROCESANDO, intentos__gte=max_intentos,
+        fecha_actualizacion__lt=ahora - datetime.timedelta(
+            seconds=timeout)).update(
+        estado=SolicitudPedido.ERROR, reclamo=None, fecha_actualizacion=ahora,
+        error='La solicitud se ha abandonado sin terminar demasiadas veces.',
+        codigo_error=500)
+    disponibles = (
+        Q(estado=SolicitudPedido.PENDIENTE, intentos=0)
+        | Q(estado=SolicitudPedido.PENDIENTE,
+            fecha_actualizacion__lt=ahora - datetime.timedelta(
+                seconds=espera_reintento))
+        | Q(estado=SolicitudPedido.PROCESANDO,
+            fecha_actualizacion__lt=ahora - datetime.timedelta(
+                seconds=timeout)))
+    ids = list(SolicitudPedido.objects.filter(disponibles)
+               .order_by('id').values_list('id', flat=True)[:lote])
+    reclamo = uuid.uuid4().hex
+    if ids:
+        SolicitudPedido.objects.filter(disponibles, id__in=ids).update(
+            estado=SolicitudPedido.PROCESANDO, reclamo=reclamo,
+            intentos=F('intentos') + 1, fecha_actualizacion=ahora)
+    return reclamo, list(SolicitudPedido.objects.filter(reclamo=reclamo)
+                         .order_by('id'))
+
+
+def _finalizar(solicitud: SolicitudPedido, reclamo: str, **campos) -> bool:
+    """Cambia la solicitud si este worker todavía la tiene reservada."""
+    return SolicitudPedido.objects.filter(
+        id=solicitud.id, reclamo=reclamo).update(
+        reclamo=None, fecha_actualizacion=timezone.now(), **campos) == 1
+
+
+class ReservaPerdida(Exception):
+    """Otro worker ha recuperado la solicitud mientras se procesaba."""
+
+
+def procesar(solicitud: SolicitudPedido, reclamo: str,
+             max_intentos: int = 5) -> None:
+    """Valida, calcula y guarda el pedido de una solicitud reservada."""
+    try:
+        presupuesto = presupuestar(solicitud.datos['articulos'])
+    except PedidoInvalido as e:
+        _finalizar(solicitud, reclamo, estado=SolicitudPedido.ERROR,
+                   error=e.mensaje, codigo_error=e.status_code)
+        return
+    except ArticulosServiceError as e:
+        if (e.status_code in ERRORES_DEFINITIVOS
+                or solicitud.intentos >= max_intentos):
+            _finalizar(solicitud, reclamo, estado=SolicitudPedido.ERROR,
+                       error=e.mensaje, codigo_error=e.status_code)
+        else:
+            # Se reintentará en el siguiente lote
+            logger.warning("Solicitud %s aplazada: %s", solicitud.id,
+                           e.mensaje)
+            _finalizar(solicitud, reclamo, estado=SolicitudPedido.PENDIENTE)
+        return
+
+    try:
+        with transaction.atomic():
+            pedido = crear_pedido(presupuesto)
+            # Si otro worker ha recuperado la solicitud, se deshace el
+            # pedido para no crearlo dos veces
+            if not _finalizar(solicitud, reclamo, pedido=pedido,
+                              estado=SolicitudPedido.COMPLETADA,
+                              error='', codigo_error=None):
+                raise ReservaPerdida(solicitud.id)
+    except ReservaPerdida:
+        logger.warning("Solicitud %s recuperada por otro worker",
+                       solicitud.id)
+
+
+def procesar_lote(lote: int = 100, timeout: float = 300,
+                  max_intentos: int = 5,
+                  espera_reintento: float = 30) -> int:
+    """Reserva y procesa un lote de solicitudes. Devuelve cuántas había."""
+    reclamo, solicitudes = reclamar(lote, timeout, espera_reintento,
+                                    max_intentos)
+    if not solicitudes:
+        return 0
+
+    # Una sola consulta con todos los artículos del lote deja el resto en
+    # la caché del cliente, aunque alguno no exista; si falla, cada
+    # solicitud los pide por separado
+    try:
+        get_articulos_client().buscar_articulos(
+            articulo_data['id'] for solicitud in solicitudes
+            for articulo_data in solicitud.datos['articulos'])
+    except ArticulosServiceError:
+        pass
+
+    for solicitud in solicitudes:
+        try:
+            procesar(solicitud, reclamo, max_intentos)
+        except Exception:
+            # Un fallo inesperado no deja el resto del lote reservado
+            logger.exception("Error al procesar la solicitud %s",
+                             solicitud.id)
+            _finalizar(solicitud, reclamo, estado=SolicitudPedido.ERROR,
+                       error='Error interno al procesar la solicitud.',
+                       codigo_error=500)
+    return len(solicitudes)
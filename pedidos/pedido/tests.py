@@ -1,11 +1,37 @@
+import base64
+import csv
+import datetime
+from decimal import Decimal
+import io
 import json
+import os
+import tempfile
+import threading
+import time
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from unittest.mock import patch
+from django.utils import timezone
+from unittest import skipIf
+from unittest.mock import Mock, patch
+import requests
 from django.contrib.auth.models import User
 from rest_framework.test import APIClient
 from rest_framework.authtoken.models import Token
-from .models import Pedido, DetallePedido
+from .cache import CADUCADO, FRESCO, OBSOLETO, ArticuloCache
+from .breaker import ABIERTO, CERRADO, SEMIABIERTO, CircuitBreaker
+from .clients import CAMPOS_ARTICULO, ArticuloNoEncontrado, ArticulosClient, \
+    ArticulosServiceError, CircuitoAbierto, TokenError
+from .models import ClaveIdempotencia, DetallePedido, Pedido, \
+    SolicitudPedido, VentaDiariaArticulo
+from . import breaker, idempotencia, pricing
+from .filtros import filtrar_pedidos
+from .hedging import Hedging
+from .solicitudes import encolar, procesar, procesar_lote, reclamar
+from .snapshot import CatalogoCompartido, Snapshot, empaquetar, \
+    escribir_snapshot, refrescar_snapshot
 
 
 class PedidoTestCase(TestCase):
@@ -19,18 +45,17 @@ class PedidoTestCase(TestCase):
         self.client = APIClient()
         self.client.force_authenticate(user=self.user, token=self.token)
 
-    @patch('pedido.views.requests.get')
+    @patch.object(ArticulosClient, 'obtener_articulos')
     def test_crear_pedido_exitoso(self, mock_get) -> None:
         """Prueba la creación de un pedido con artículos válidos."""
-        mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = {
+        mock_get.return_value = {1: {
             'id': 1,
             'referencia': 'ART123',
             'nombre': 'Artículo 1',
             'precio_sin_impuestos': 100,
             'impuesto_aplicable': 21,
             'descripcion': 'Descripción del artículo 1'
-        }
+        }}
 
         response = self.client.post(reverse('crear_pedido'), json.dumps({
             'articulos': [
@@ -43,10 +68,10 @@ class PedidoTestCase(TestCase):
         self.assertEqual(float(pedido.precio_total_sin_impuestos), 200.00)
         self.assertEqual(float(pedido.precio_total_con_impuestos), 242.00)
 
-    @patch('pedido.views.requests.get')
+    @patch.object(ArticulosClient, 'obtener_articulos')
     def test_crear_pedido_articulo_inexistente(self, mock_get) -> None:
         """Prueba la creación de un pedido con un artículo inexistente."""
-        mock_get.return_value.status_code = 404
+        mock_get.side_effect = ArticuloNoEncontrado(999)
 
         response = self.client.post(reverse('crear_pedido'), json.dumps({
             'articulos': [
@@ -57,17 +82,16 @@ class PedidoTestCase(TestCase):
         self.assertEqual(response.status_code, 404)
         self.assertEqual(Pedido.objects.count(), 0)
 
-    @patch('pedido.views.requests.get')
+    @patch.object(ArticulosClient, 'obtener_articulos')
     def test_crear_pedido_cantidad_negativa(self, mock_get) -> None:
         """Prueba la creación de un pedido con una cantidad negativa."""
-        mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = {
+        mock_get.return_value = {1: {
             'id': 1,
             'referencia': 'ART123',
             'nombre': 'Artículo 1',
             'precio_sin_impuestos': 100,
             'impuesto_aplicable': 21
-        }
+        }}
 
         response = self.client.post(reverse('crear_pedido'), json.dumps({
             'articulos': [
@@ -78,6 +102,49 @@ class PedidoTestCase(TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertEqual(Pedido.objects.count(), 0)
 
+    @patch.object(ArticulosClient, 'obtener_articulos')
+    def test_crear_pedido_inserciones_en_bloque(self, mock_get) -> None:
+        """Prueba que el pedido y todas sus líneas se insertan con dos
+        INSERT."""
+        mock_get.return_value = {
+            articulo_id: {
+                'id': articulo_id,
+                'referencia': f'ART{articulo_id}',
+                'nombre': f'Artículo {articulo_id}',
+                'precio_sin_impuestos': 10,
+                'impuesto_aplicable': 21
+            } for articulo_id in range(1, 11)}
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post(reverse('crear_pedido'), json.dumps({
+                'articulos': [{'id': articulo_id, 'cantidad': 1}
+                              for articulo_id in range(1, 11)]
+            }), content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        inserciones = [q for q in consultas.captured_queries
+                       if q['sql'].startswith('INSERT')
+                       and 'ventadiariaarticulo' not in q['sql']]
+        self.assertEqual(len(inserciones), 2)
+        self.assertEqual(DetallePedido.objects.count(), 10)
+        self.assertEqual(
+            float(Pedido.objects.get().precio_total_sin_impuestos), 100.00)
+
+    @patch.object(ArticulosClient, 'obtener_articulos')
+    def test_crear_pedido_error_token(self, mock_get) -> None:
+        """Prueba que un error al obtener el token no deja pedidos
+        huérfanos."""
+        mock_get.side_effect = TokenError("No se pudo obtener el token", 401)
+
+        response = self.client.post(reverse('crear_pedido'), json.dumps({
+            'articulos': [
+                {'id': 1, 'cantidad': 1}
+            ]
+        }), content_type='application/json')
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(Pedido.objects.count(), 0)
+
     def test_crear_pedido_sin_articulos(self) -> None:
         """Prueba la creación de un pedido sin artículos."""
         response = self.client.post(reverse('crear_pedido'), json.dumps({
@@ -88,6 +155,462 @@ class PedidoTestCase(TestCase):
         self.assertEqual(Pedido.objects.count(), 0)
 
 
+class PedidoQuoteTestCase(TestCase):
+    """Casos de prueba para el presupuesto de un pedido."""
+
+    def setUp(self) -> None:
+        """Configura un usuario y autentica el cliente de prueba."""
+        self.user = User.objects.create_user(username='testuser',
+                                             password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.articulos = {
+            1: {'id': 1, 'referencia': 'ART1', 'nombre': 'Artículo 1',
+                'precio_sin_impuestos': '0.10', 'impuesto_aplicable': '21.00'},
+            2: {'id': 2, 'referencia': 'ART2', 'nombre': 'Artículo 2',
+                'precio_sin_impuestos': '0.20', 'impuesto_aplicable': '21.00'},
+        }
+
+    @patch.object(ArticulosClient, 'obtener_articulos')
+    def test_presupuestar_pedido(self, mock_get) -> None:
+        """Prueba que el presupuesto coincide con el pedido creado y no
+        escribe en la base de datos."""
+        mock_get.return_value = self.articulos
+        datos = json.dumps({'articulos': [{'id': 1, 'cantidad': 1},
+                                          {'id': 2, 'cantidad': 1},
+                                          {'id': 1, 'cantidad': 2}]})
+
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('presupuestar_pedido'), datos,
+                                        content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        presupuesto = response.json()
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual([linea['articulo_id']
+                          for linea in presupuesto['articulos']], [1, 2, 1])
+        self.assertEqual(presupuesto['articulos'][2]['importe_sin_impuestos'],
+                         '0.20')
+        self.assertEqual(presupuesto['articulos'][0]['precio_con_impuestos'],
+                         '0.12')
+        self.assertEqual(presupuesto['precio_total_sin_impuestos'], '0.50')
+        self.assertEqual(presupuesto['impuestos'], '0.11')
+        self.assertEqual(presupuesto['precio_total_con_impuestos'], '0.61')
+
+        response = self.client.post(reverse('crear_pedido'), datos,
+                                    content_type='application/json')
+        pedido = Pedido.objects.get(id=response.json()['id'])
+        self.assertEqual(str(pedido.precio_total_con_impuestos), '0.61')
+
+    def test_presupuestar_pedido_invalido(self) -> None:
+        """Prueba que el presupuesto valida los datos como la creación."""
+        response = self.client.post(reverse('presupuestar_pedido'),
+                                    {'articulos': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    @patch.object(ArticulosClient, 'obtener_articulos')
+    def test_presupuestar_ids_como_texto(self, mock_get) -> None:
+        """Prueba que los IDs se aceptan como texto con un entero y que
+        cualquier otro valor responde 400."""
+        mock_get.return_value = self.articulos
+        response = self.client.post(reverse('presupuestar_pedido'), {
+            'articulos': [{'id': '1', 'cantidad': 1}, {'id': 2,
+                                                       'cantidad': '2'}]},
+            format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(mock_get.call_args[0][0]), [1, 2])
+
+        for articulo in ({'id': 'uno', 'cantidad': 1}, {'cantidad': 1},
+                         {'id': [1], 'cantidad': 1},
+                         {'id': 1, 'cantidad': 'mucho'}, 'ART1'):
+            response = self.client.post(reverse('presupuestar_pedido'),
+                                        {'articulos': [articulo]},
+                                        format='json')
+            self.assertEqual(response.status_code, 400, articulo)
+
+
+class PedidoBatchTestCase(TestCase):
+    """Casos de prueba para la creación de pedidos por lotes."""
+
+    def setUp(self) -> None:
+        """Configura un usuario y autentica el cliente de prueba."""
+        self.user = User.objects.create_user(username='testuser',
+                                             password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.articulo = {'id': 1, 'referencia': 'ART1',
+                         'nombre': 'Artículo 1',
+                         'precio_sin_impuestos': '10.00',
+                         'impuesto_aplicable': '21.00'}
+
+    @patch.object(ArticulosClient, 'buscar_articulos')
+    def test_crear_lote(self, mock_buscar) -> None:
+        """Prueba que los artículos se consultan una vez para todo el lote y
+        que cada pedido tiene su propio resultado."""
+        mock_buscar.return_value = ({1: self.articulo}, [2])
+        datos = {'pedidos': [
+            {'articulos': [{'id': 1, 'cantidad': 2}]},
+            {'articulos': [{'id': 1, 'cantidad': 1},
+                           {'id': 2, 'cantidad': 1}]},
+            {'articulos': []},
+            {'articulos': [{'id': 1, 'cantidad': 3}]},
+        ]}
+
+        response = self.client.post(reverse('lote_pedidos'), datos,
+                                    format='json')
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(mock_buscar.call_count, 1)
+        self.assertEqual(list(mock_buscar.call_args[0][0]), [1, 1, 2, 1])
+        resultados = response.json()['resultados']
+        self.assertEqual([r['status'] for r in resultados],
+                         [201, 404, 400, 201])
+        self.assertEqual(Pedido.objects.count(), 2)
+        pedido = Pedido.objects.get(id=resultados[3]['id'])
+        self.assertEqual(str(pedido.precio_total_con_impuestos), '36.30')
+        self.assertEqual(
+            DetallePedido.objects.get(pedido=pedido).cantidad, 3)
+
+    @patch.object(ArticulosClient, 'buscar_articulos')
+    def test_crear_lote_error_servicio(self, mock_buscar) -> None:
+        """Prueba que si Artículos falla no se crea ningún pedido."""
+        mock_buscar.side_effect = ArticulosServiceError(
+            'Servicio no disponible', 503)
+        datos = {'pedidos': [{'articulos': [{'id': 1, 'cantidad': 1}]}]}
+
+        response = self.client.post(reverse('lote_pedidos'), datos,
+                                    format='json')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(Pedido.objects.count(), 0)
+
+    def test_crear_lote_vacio(self) -> None:
+        """Prueba que se rechaza un lote vacío o demasiado grande."""
+        response = self.client.post(reverse('lote_pedidos'),
+                                    {'pedidos': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class IdempotenciaTestCase(TestCase):
+    """Casos de prueba para la creación con `Idempotency-Key`."""
+
+    def setUp(self) -> None:
+        """Configura un usuario y el artículo que devuelve Artículos."""
+        self.user = User.objects.create_user(username='testuser',
+                                             password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.datos = {'articulos': [{'id': 1, 'cantidad': 2}]}
+        self.articulos = {1: {'id': 1, 'referencia': 'ART1',
+                              'nombre': 'Artículo 1',
+                              'precio_sin_impuestos': '10.00',
+                              'impuesto_aplicable': '21.00'}}
+
+    def _crear(self, datos=None, clave='clave-1'):
+        return self.client.post(reverse('crear_pedido'), datos or self.datos,
+                                format='json', HTTP_IDEMPOTENCY_KEY=clave)
+
+    @patch.object(ArticulosClient, 'obtener_articulos')
+    def test_reintento_devuelve_respuesta_guardada(self, mock_get) -> None:
+        """Prueba que un reintento no crea otro pedido ni consulta
+        Artículos, y que se resuelve con una sola consulta."""
+        mock_get.return_value = self.articulos
+        primera = self._crear()
+        self.assertEqual(primera.status_code, 201)
+
+        with self.assertNumQueries(1):
+            segunda = self._crear()
+
+        self.assertEqual(segunda.status_code, 201)
+        self.assertEqual(segunda.json(), primera.json())
+        self.assertEqual(segunda['Idempotent-Replayed'], 'true')
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(Pedido.objects.count(), 1)
+
+    @patch.object(ArticulosClient, 'obtener_articulos')
+    def test_clave_con_otra_peticion(self, mock_get) -> None:
+        """Prueba que no se puede reutilizar una clave con otro cuerpo."""
+        mock_get.return_value = self.articulos
+        self._crear()
+        response = self._crear({'articulos': [{'id': 1, 'cantidad': 3}]})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Pedido.objects.count(), 1)
+
+    @patch.object(ArticulosClient, 'obtener_articulos')
+    def test_error_temporal_no_se_guarda(self, mock_get) -> None:
+        """Prueba que tras un error de Artículos el reintento se ejecuta."""
+        mock_get.side_effect = [ArticulosServiceError('Caído', 503),
+                                self.articulos]
+        self.assertEqual(self._crear().status_code, 503)
+        self.assertEqual(self._crear().status_code, 201)
+        self.assertEqual(Pedido.objects.count(), 1)
+
+    @patch.object(ArticulosClient, 'obtener_articulos')
+    def test_reserva_caducada_durante_la_consulta(self, mock_get) -> None:
+        """Prueba que si otra petición recupera la clave mientras se
+        consulta Artículos no se crea el pedido ni se pisa su reserva."""
+        def recuperar(ids, campos=None):
+            # La consulta tarda más que el bloqueo y otra petición se
+            # queda con la clave
+            ClaveIdempotencia.objects.update(expira=timezone.now())
+            idempotencia.reservar(self.user, 'clave-1',
+                                  idempotencia.huella(self.datos))
+            return self.articulos
+        mock_get.side_effect = recuperar
+
+        response = self._crear()
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Pedido.objects.exists())
+        registro = ClaveIdempotencia.objects.get()
+        self.assertEqual(registro.estado, ClaveIdempotencia.EN_CURSO)
+
+    def test_espera_a_la_peticion_en_curso(self) -> None:
+        """Prueba que un duplicado concurrente espera a la petición original
+        y devuelve su respuesta."""
+        registro, nueva = idempotencia.reservar(
+            self.user, 'clave-1', idempotencia.huella(self.datos))
+        self.assertTrue(nueva)
+
+        def terminar(segundos) -> None:
+            idempotencia.completar(registro, 201, {'id': 7}, {})
+
+        with patch.object(idempotencia.time, 'sleep',
+                          side_effect=terminar) as mock_sleep:
+            response = self._crear()
+
+        self.assertEqual(mock_sleep.call_count, 1)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {'id': 7})
+
+    @patch.object(idempotencia.time, 'sleep')
+    def test_peticion_en_curso_sin_terminar(self, mock_sleep) -> None:
+        """Prueba que si la petición original no termina se responde 409."""
+        idempotencia.reservar(self.user, 'clave-1',
+                              idempotencia.huella(self.datos))
+        with self.settings(PEDIDOS_IDEMPOTENCIA_ESPERA=0):
+            response = self._crear()
+        self.assertEqual(response.status_code, 409)
+
+    def test_limpiar_claves_caducadas(self) -> None:
+        """Prueba que el comando borra sólo las claves caducadas."""
+        registro, _ = idempotencia.reservar(self.user, 'vieja', 'x')
+        idempotencia.completar(registro, 201, {'id': 1}, {}, ttl=-1)
+        idempotencia.reservar(self.user, 'nueva', 'x')
+
+        call_command('limpiar_idempotencia', stdout=io.StringIO())
+
+        self.assertEqual(
+            list(ClaveIdempotencia.objects.values_list('clave', flat=True)),
+            ['nueva'])
+
+
+class SolicitudPedidoTestCase(TestCase):
+    """Casos de prueba para la creación asíncrona de pedidos."""
+
+    def setUp(self) -> None:
+        """Configura un usuario y el artículo que devuelve Artículos."""
+        self.user = User.objects.create_user(username='testuser',
+                                             password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.articulo = {'id': 1, 'referencia': 'ART123',
+                         'nombre': 'Artículo 1',
+                         'precio_sin_impuestos': '100.00',
+                         'impuesto_aplicable': '21.00'}
+        # La precarga del lote no consulta Artículos en las pruebas
+        precarga = patch.object(ArticulosClient, 'buscar_articulos',
+                                return_value=({}, []))
+        self.mock_buscar = precarga.start()
+        self.addCleanup(precarga.stop)
+
+    def _encolar(self, articulos: list):
+        return self.client.post(reverse('crear_pedido'),
+                                {'articulos': articulos}, format='json',
+                                HTTP_PREFER='respond-async')
+
+    @patch.object(ArticulosClient, 'obtener_articulos')
+    def test_crear_pedido_asincrono(self, mock_get) -> None:
+        """Prueba que la petición se responde con 202 sin consultar
+        Artículos y que el worker crea después el pedido."""
+        response = self._encolar([{'id': 1, 'cantidad': 2}])
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response['Location'], response.json()['url'])
+        mock_get.assert_not_called()
+        self.assertFalse(Pedido.objects.exists())
+        estado = self.client.get(response['Location']).json()
+        self.assertEqual(estado['estado'], SolicitudPedido.PENDIENTE)
+
+        mock_get.return_value = {1: self.articulo}
+        call_command('procesar_solicitudes', stdout=io.StringIO())
+
+        estado = self.client.get(response['Location']).json()
+        self.assertEqual(estado['estado'], SolicitudPedido.COMPLETADA)
+        pedido = Pedido.objects.get(id=estado['pedido'])
+        self.assertEqual(pedido.precio_total_con_impuestos, 242)
+        self.assertTrue(estado['pedido_url'].endswith(
+            reverse('detalle_pedido', args=[pedido.id])))
+
+    def test_crear_pedido_asincrono_invalido(self) -> None:
+        """Prueba que el formato se valida antes de encolar."""
+        for articulos in ([{'id': 1, 'cantidad': 0}], [{'cantidad': 1}],
+                          [{'id': [1], 'cantidad': 1}]):
+            response = self._encolar(articulos)
+            self.assertEqual(response.status_code, 400, articulos)
+        self.assertFalse(SolicitudPedido.objects.exists())
+
+    @patch.object(ArticulosClient, 'obtener_articulos')
+    def test_error_inesperado_al_procesar(self, mock_get) -> None:
+        """Prueba que un error inesperado marca sólo esa solicitud como
+        errónea y que la precarga no falla por un artículo inexistente."""
+        fallida = encolar([{'id': 2, 'cantidad': 1}])
+        correcta = encolar([{'id': 1, 'cantidad': 1}])
+
+        def obtener_articulos(ids, campos=None):
+            if 2 in list(ids):
+                raise KeyError('precio_sin_impuestos')
+            return {1: self.articulo}
+        mock_get.side_effect = obtener_articulos
+
+        with self.assertLogs('pedido.solicitudes', 'ERROR'):
+            self.assertEqual(procesar_lote(), 2)
+
+        self.assertEqual(list(self.mock_buscar.call_args.args[0]), [2, 1])
+        fallida.refresh_from_db()
+        correcta.refresh_from_db()
+        self.assertEqual(fallida.estado, SolicitudPedido.ERROR)
+        self.assertEqual(fallida.codigo_error, 500)
+        self.assertIsNone(fallida.reclamo)
+        self.assertEqual(correcta.estado, SolicitudPedido.COMPLETADA)
+
+    @patch.object(ArticulosClient, 'obtener_articulos')
+    def test_errores_al_procesar(self, mock_get) -> None:
+        """Prueba que un artículo inexistente es un error definitivo y que
+        un error temporal se reintenta más tarde."""
+        inexistente = encolar([{'id': 999, 'cantidad': 1}])
+        temporal = encolar([{'id': 1, 'cantidad': 1}])
+
+        def obtener_articulos(ids, campos=None):
+            ids = list(ids)
+            if 999 in ids:
+                raise ArticuloNoEncontrado(999)
+            raise ArticulosServiceError("Servicio no disponible", 503)
+        mock_get.side_effect = obtener_articulos
+
+        with self.assertLogs('pedido.solicitudes', 'WARNING'):
+            self.assertEqual(procesar_lote(), 2)
+        # El reintento espera `espera_reintento` segundos
+        self.assertEqual(procesar_lote(), 0)
+
+        inexistente.refresh_from_db()
+        temporal.refresh_from_db()
+        self.assertEqual(inexistente.estado, SolicitudPedido.ERROR)
+        self.assertEqual(inexistente.codigo_error, 404)
+        self.assertEqual(temporal.estado, SolicitudPedido.PENDIENTE)
+        self.assertEqual(temporal.intentos, 1)
+        with self.assertLogs('pedido.solicitudes', 'WARNING'):
+            self.assertEqual(procesar_lote(espera_reintento=0), 1)
+
+    def test_reserva_exclusiva(self) -> None:
+        """Prueba que dos workers no reservan la misma solicitud y que la
+        reserva perdida no crea el pedido."""
+        solicitud = encolar([{'id': 1, 'cantidad': 1}])
+
+        reclamo, reservadas = reclamar(10, timeout=300)
+        self.assertEqual(reservadas, [solicitud])
+        self.assertEqual(reclamar(10, timeout=300)[1], [])
+
+        # Otro worker la recupera por haber superado el timeout
+        nuevo_reclamo, _ = reclamar(10, timeout=-1)
+        with patch.object(ArticulosClient, 'obtener_articulos',
+                          return_value={1: self.articulo}), \
+                self.assertLogs('pedido.solicitudes', 'WARNING'):
+            procesar(reservadas[0], reclamo)
+        self.assertFalse(Pedido.objects.exists())
+        solicitud.refresh_from_db()
+        self.assertEqual(solicitud.reclamo, nuevo_reclamo)
+
+    def test_solicitud_abandonada_demasiadas_veces(self) -> None:
+        """Prueba que una solicitud que los workers dejan a medias una y
+        otra vez se marca como errónea al llegar a `max_intentos`."""
+        solicitud = encolar([{'id': 1, 'cantidad': 1}])
+        for _ in range(3):
+            # El worker muere sin terminarla
+            self.assertEqual(
+                reclamar(10, timeout=-1, max_intentos=3)[1], [solicitud])
+
+        self.assertEqual(reclamar(10, timeout=-1, max_intentos=3)[1], [])
+        solicitud.refresh_from_db()
+        self.assertEqual(solicitud.estado, SolicitudPedido.ERROR)
+        self.assertEqual((solicitud.intentos, solicitud.codigo_error),
+                         (3, 500))
+        self.assertIsNone(solicitud.reclamo)
+
+
+class RecalcularTotalesTestCase(TestCase):
+    """Casos de prueba para el cálculo de los totales de los pedidos."""
+
+    def setUp(self) -> None:
+        """Crea un pedido con líneas y otro sin ellas."""
+        self.pedido = Pedido.objects.create()
+        DetallePedido.objects.bulk_create([
+            DetallePedido(pedido=self.pedido, articulo_id=1,
+                          articulo_referencia='ART1',
+                          articulo_nombre='Artículo 1',
+                          articulo_precio_sin_impuestos=1,
+                          articulo_impuesto_aplicable=21, cantidad=1),
+            DetallePedido(pedido=self.pedido, articulo_id=2,
+                          articulo_referencia='ART2',
+                          articulo_nombre='Artículo 2',
+                          articulo_precio_sin_impuestos='10.99',
+                          articulo_impuesto_aplicable='10.5', cantidad=3),
+        ])
+        self.vacio = Pedido.objects.create(precio_total_sin_impuestos=5,
+                                           precio_total_con_impuestos=5)
+
+    def test_calcular_precio_total(self) -> None:
+        """Prueba que los totales se calculan con una consulta y se guardan
+        con otra."""
+        with self.assertNumQueries(2):
+            self.pedido.calcular_precio_total()
+        self.pedido.refresh_from_db()
+        self.assertEqual(self.pedido.precio_total_sin_impuestos,
+                         Decimal('33.97'))
+        self.assertEqual(self.pedido.precio_total_con_impuestos,
+                         Decimal('37.64'))
+
+    def test_comando_recalcular_totales(self) -> None:
+        """Prueba que el comando recalcula todos los pedidos por bloques."""
+        salida = io.StringIO()
+        call_command('recalcular_totales', chunk_size=1, stdout=salida)
+
+        self.pedido.refresh_from_db()
+        self.vacio.refresh_from_db()
+        self.assertEqual(self.pedido.precio_total_con_impuestos,
+                         Decimal('37.64'))
+        self.assertEqual(self.vacio.precio_total_sin_impuestos, 0)
+        self.assertEqual(len(salida.getvalue().splitlines()), 2)
+
+    def test_comando_redondea_como_pricing(self) -> None:
+        """Prueba que el comando redondea el impuesto del pedido con los
+        medios hacia arriba, igual que `calcular_precio_total`."""
+        pedido = Pedido.objects.create()
+        # Impuesto de 0,025: 0,03 con los medios hacia arriba
+        DetallePedido.objects.create(
+            pedido=pedido, articulo_id=1, articulo_referencia='ART1',
+            articulo_nombre='Artículo 1', articulo_precio_sin_impuestos='0.50',
+            articulo_impuesto_aplicable=5, cantidad=1)
+
+        call_command('recalcular_totales', stdout=io.StringIO())
+        pedido.refresh_from_db()
+        self.assertEqual(pedido.precio_total_con_impuestos, Decimal('0.53'))
+
+        pedido.calcular_precio_total()
+        pedido.refresh_from_db()
+        self.assertEqual(pedido.precio_total_con_impuestos, Decimal('0.53'))
+
+
 class PedidoEditTestCase(TestCase):
     """Casos de prueba para la edición de un pedido."""
 
@@ -111,38 +634,68 @@ class PedidoEditTestCase(TestCase):
         )
         self.pedido.calcular_precio_total()
 
-    @patch('pedido.views.requests.get')
+    @patch.object(ArticulosClient, 'obtener_articulos')
     def test_editar_pedido(self, mock_get) -> None:
         """Prueba la edición de un pedido existente."""
-        mock_get.return_value.status_code = 200
-        mock_get.return_value.json.return_value = {
-            'id': 1,
+        mock_get.return_value = {2: {
+            'id': 2,
             'referencia': 'ART124',
             'nombre': 'Artículo 2',
             'precio_sin_impuestos': 200,
             'impuesto_aplicable': 10,
-            'descripcion': 'Descripción del artículo 2'
-        }
+        }}
 
         response = self.client.put(
             reverse('editar_pedido', args=[self.pedido.id]),
             json.dumps({
                 'articulos': [
-                    {'id': 1, 'cantidad': 1}
+                    {'id': 1, 'cantidad': 1},
+                    {'id': 2, 'cantidad': 1}
                 ]
             }),
             content_type='application/json'
         )
 
         self.assertEqual(response.status_code, 200)
+        # Sólo se consulta el artículo nuevo
+        self.assertEqual(list(mock_get.call_args.args[0]), [2])
         self.pedido.refresh_from_db()
-        self.assertEqual(self.pedido.precio_total_sin_impuestos, 200)
-        self.assertEqual(self.pedido.precio_total_con_impuestos, 220)
+        self.assertEqual(self.pedido.precio_total_sin_impuestos, 300)
+        self.assertEqual(self.pedido.precio_total_con_impuestos, 341)
+        self.assertEqual(
+            [a['cantidad'] for a in response.json()['articulos']], [1, 1])
+
+    @patch.object(ArticulosClient, 'obtener_articulos')
+    def test_editar_pedido_solo_cambios(self, mock_get) -> None:
+        """Prueba que sólo se escriben las líneas que cambian."""
+        DetallePedido.objects.create(
+            pedido=self.pedido, articulo_id=2, articulo_referencia="ART2",
+            articulo_nombre="Artículo 2", articulo_precio_sin_impuestos=5,
+            articulo_impuesto_aplicable=0, cantidad=1)
+        detalle = self.pedido.detallepedido_set.get(articulo_id=1)
+        mock_get.return_value = {}
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.put(
+                reverse('editar_pedido', args=[self.pedido.id]),
+                json.dumps({'articulos': [{'id': 1, 'cantidad': 2}]}),
+                content_type='application/json'
+            )
 
-    @patch('pedido.views.requests.get')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any(consulta['sql'].startswith('INSERT')
+                             and 'detallepedido' in consulta['sql']
+                             for consulta in consultas.captured_queries))
+        self.assertEqual(
+            list(self.pedido.detallepedido_set.values_list('id', flat=True)),
+            [detalle.id])
+        self.pedido.refresh_from_db()
+        self.assertEqual(self.pedido.precio_total_con_impuestos, 242)
+
+    @patch.object(ArticulosClient, 'obtener_articulos')
     def test_editar_pedido_articulo_inexistente(self, mock_get) -> None:
         """Prueba la edición de un pedido con un artículo inexistente."""
-        mock_get.return_value.status_code = 404
+        mock_get.side_effect = ArticuloNoEncontrado(999)
 
         response = self.client.put(
             reverse('editar_pedido', args=[self.pedido.id]),
@@ -191,6 +744,25 @@ class PedidoDetailTestCase(TestCase):
             float(response.json()['precio_total_sin_impuestos']), 200.00)
         self.assertEqual(
             float(response.json()['precio_total_con_impuestos']), 242.00)
+        self.assertEqual(
+            response.json()['articulos'][0]['precio_con_impuestos'],
+            '121.00')
+
+    def test_obtener_pedido_campos(self) -> None:
+        """Prueba que `?fields=` sin `articulos` no consulte los detalles."""
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                reverse('detalle_pedido', args=[self.pedido.id]),
+                {'fields': 'precio_total_con_impuestos'})
+        self.assertEqual(response.json(), {
+            'id': self.pedido.id, 'precio_total_con_impuestos': '242.00'})
+
+    def test_obtener_pedido_campos_invalidos(self) -> None:
+        """Prueba que un campo desconocido en `?fields=` devuelva un 400."""
+        response = self.client.get(
+            reverse('detalle_pedido', args=[self.pedido.id]),
+            {'fields': 'total'})
+        self.assertEqual(response.status_code, 400)
 
     def test_obtener_pedido_inexistente(self) -> None:
         """Prueba obtener un pedido inexistente."""
@@ -237,4 +809,967 @@ class PedidoListTestCase(TestCase):
         """Prueba listar todos los pedidos."""
         response = self.client.get(reverse('listar_pedidos'))
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.json()), 2)
+        self.assertEqual(len(response.json()['pedidos']), 2)
+        self.assertIsNone(response.json()['siguiente_cursor'])
+
+    def test_listar_pedidos_paginado(self) -> None:
+        """Prueba recorrer los pedidos página a página con el cursor."""
+        response = self.client.get(reverse('listar_pedidos'),
+                                   {'page_size': 1})
+        self.assertEqual([p['id'] for p in response.json()['pedidos']],
+                         [self.pedido1.id])
+
+        response = self.client.get(reverse('listar_pedidos'), {
+            'page_size': 1,
+            'cursor': response.json()['siguiente_cursor']})
+        self.assertEqual([p['id'] for p in response.json()['pedidos']],
+                         [self.pedido2.id])
+        self.assertIsNone(response.json()['siguiente_cursor'])
+
+    def test_listar_pedidos_consultas_constantes(self) -> None:
+        """Prueba que cada página cuesta dos consultas sea cual sea el
+        número de pedidos."""
+        with self.assertNumQueries(2):
+            self.client.get(reverse('listar_pedidos'))
+
+        for _ in range(10):
+            pedido = Pedido.objects.create()
+            DetallePedido.objects.create(
+                pedido=pedido,
+                articulo_id=1,
+                articulo_referencia="ART123",
+                articulo_nombre="Artículo 1",
+                articulo_precio_sin_impuestos=100,
+                articulo_impuesto_aplicable=21,
+                cantidad=1
+            )
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('listar_pedidos'))
+        self.assertEqual(len(response.json()['pedidos']), 12)
+
+    def test_listar_pedidos_cursor_invalido(self) -> None:
+        """Prueba que un cursor no numérico devuelva un 400."""
+        response = self.client.get(reverse('listar_pedidos'),
+                                   {'cursor': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+    def _listar(self, **params) -> list:
+        response = self.client.get(reverse('listar_pedidos'), params)
+        self.assertEqual(response.status_code, 200)
+        return [pedido['id'] for pedido in response.json()['pedidos']]
+
+    def test_filtrar_pedidos(self) -> None:
+        """Prueba los filtros por fecha, artículo y total."""
+        Pedido.objects.filter(id=self.pedido1.id).update(
+            fecha_creacion=timezone.now() - datetime.timedelta(days=10))
+        hoy = timezone.localdate().isoformat()
+
+        self.assertEqual(self._listar(desde=hoy), [self.pedido2.id])
+        self.assertEqual(self._listar(hasta=hoy),
+                         [self.pedido1.id, self.pedido2.id])
+        self.assertEqual(self._listar(articulo_id=1), [self.pedido1.id])
+        self.assertEqual(self._listar(articulo_referencia='ART124'),
+                         [self.pedido2.id])
+        self.assertEqual(self._listar(articulo_id=1,
+                                      articulo_referencia='ART124'), [])
+        self.assertEqual(self._listar(total_min='230'), [self.pedido1.id])
+        self.assertEqual(self._listar(total_min='200', total_max='230'),
+                         [self.pedido2.id])
+
+        with self.assertNumQueries(2):
+            self._listar(articulo_id=2)
+
+        for params in ({'articulo_id': 'x'}, {'total_max': 'mucho'},
+                       {'desde': 'ayer'}, {'total_min': 'NaN'},
+                       {'total_min': 'sNaN'}, {'total_max': 'Infinity'},
+                       {'total_max': '1e400'}):
+            response = self.client.get(reverse('listar_pedidos'), params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_filtros_usan_indices(self) -> None:
+        """Prueba con `EXPLAIN` que cada filtro del listado usa su índice.
+
+        Se comprueba la consulta de la página tal y como la hace la vista;
+        el nombre del índice aparece en el plan de SQLite y de MySQL.
+        """
+        casos = [
+            ({'desde': '2024-01-01', 'hasta': '2024-01-07'},
+             'pedido_fecha_idx'),
+            ({'articulo_id': '1'}, 'detalle_articulo_pedido_idx'),
+            ({'articulo_referencia': 'ART123'},
+             'detalle_referencia_pedido_idx'),
+            ({'total_min': '10', 'total_max': '20'}, 'pedido_total_idx'),
+        ]
+        for params, indice in casos:
+            with self.subTest(params=params):
+                pedidos = filtrar_pedidos(Pedido.objects.all(), params)
+                self.assertIn(indice, pedidos.order_by('id')[:51].explain())
+
+
+def _jwt(exp: float) -> str:
+    """Genera un JWT sin firma con la expiración indicada."""
+    payload = base64.urlsafe_b64encode(
+        json.dumps({'exp': exp}).encode()).decode().rstrip('=')
+    return f"cabecera.{payload}.firma"
+
+
+def _respuesta(status_code: int, data=None, headers=None) -> Mock:
+    """Crea una respuesta HTTP simulada."""
+    response = Mock(status_code=status_code, headers=headers or {})
+    response.json.return_value = data
+    return response
+
+
+class ArticulosClientTestCase(TestCase):
+    """Casos de prueba para el cliente del microservicio de Artículos."""
+
+    def setUp(self) -> None:
+        """Crea un cliente nuevo, sin tokens en caché."""
+        self.articulos_client = ArticulosClient(
+            url='http://articulos/articulos/',
+            token_url='http://articulos/api/token/',
+            username='usuario', password='clave')
+        self.articulo = {'id': 1, 'referencia': 'ART123'}
+
+    @patch('pedido.clients.requests.Session.request')
+    def test_token_reutilizado(self, mock_request) -> None:
+        """Prueba que el token se obtiene una sola vez para varias
+        peticiones."""
+        mock_request.side_effect = [
+            _respuesta(200, {'access': _jwt(time.time() + 300),
+                             'refresh': _jwt(time.time() + 3600)}),
+        ] + [_respuesta(200, self.articulo)] * 3
+
+        for _ in range(3):
+            self.articulos_client.obtener_articulo(1)
+
+        metodos = [c.args[0] for c in mock_request.call_args_list]
+        self.assertEqual(metodos, ['POST', 'GET', 'GET', 'GET'])
+
+    @patch('pedido.clients.requests.Session.request')
+    def test_token_renovado_antes_de_expirar(self, mock_request) -> None:
+        """Prueba que un token a punto de expirar se renueva con el token
+        de refresco."""
+        mock_request.side_effect = [
+            _respuesta(200, {'access': _jwt(time.time() + 10),
+                             'refresh': _jwt(time.time() + 3600)}),
+            _respuesta(200, self.articulo),
+            _respuesta(200, {'access': _jwt(time.time() + 300)}),
+            _respuesta(200, self.articulo),
+        ]
+
+        self.articulos_client.obtener_articulo(1)
+        self.articulos_client.obtener_articulo(1)
+
+        self.assertEqual(mock_request.call_args_list[2].args[1],
+                         'http://articulos/api/token/refresh/')
+
+    @patch('pedido.clients.requests.Session.request')
+    def test_reintento_tras_401(self, mock_request) -> None:
+        """Prueba que un 401 descarta el token y reintenta una sola vez."""
+        token = _respuesta(200, {'access': _jwt(time.time() + 300)})
+        mock_request.side_effect = [token, _respuesta(401),
+                                    token, _respuesta(200, self.articulo)]
+
+        self.assertEqual(self.articulos_client.obtener_articulo(1),
+                         self.articulo)
+        metodos = [c.args[0] for c in mock_request.call_args_list]
+        self.assertEqual(metodos, ['POST', 'GET', 'POST', 'GET'])
+
+    @patch('pedido.clients.requests.Session.request')
+    def test_timeout(self, mock_request) -> None:
+        """Prueba que las peticiones usan timeouts y que un timeout se
+        traduce en un 504."""
+        mock_request.side_effect = requests.ConnectTimeout()
+
+        with self.assertRaises(ArticulosServiceError) as contexto:
+            self.articulos_client.obtener_articulo(1)
+
+        self.assertEqual(contexto.exception.status_code, 504)
+        self.assertEqual(mock_request.call_args.kwargs['timeout'], (2.0, 5.0))
+
+    @patch('pedido.clients.requests.Session.request')
+    def test_obtener_articulos_lote(self, mock_request) -> None:
+        """Prueba que varios artículos se obtienen con una sola petición."""
+        mock_request.side_effect = [
+            _respuesta(200, {'access': _jwt(time.time() + 300)}),
+            _respuesta(200, {'articulos': {'1': self.articulo,
+                                           '2': {'id': 2}},
+                             'no_encontrados': []}),
+        ]
+
+        articulos = self.articulos_client.obtener_articulos([1, 2, 1])
+
+        self.assertEqual(sorted(articulos), [1, 2])
+        self.assertEqual(mock_request.call_count, 2)
+        self.assertEqual(mock_request.call_args.kwargs['params'], {
+            'ids': '1,2',
+            'fields': 'id,referencia,nombre,precio_sin_impuestos,'
+                      'impuesto_aplicable,version'})
+
+    @patch('pedido.clients.requests.Session.request')
+    def test_obtener_articulos_lote_por_bloques(self, mock_request) -> None:
+        """Prueba que con más IDs de los que admite Artículos por consulta
+        se hacen varias y se juntan los resultados."""
+        def responder(method, url, **kwargs):
+            if url.endswith('/api/token/'):
+                return _respuesta(200, {'access': _jwt(time.time() + 300)})
+            ids = kwargs['json']['ids']
+            self.assertLessEqual(len(ids), ArticulosClient.MAX_IDS_LOTE)
+            return _respuesta(200, {
+                'articulos': {str(i): {'id': i} for i in ids if i != 1500},
+                'no_encontrados': [1500] if 1500 in ids else []})
+        mock_request.side_effect = responder
+
+        articulos, no_encontrados = self.articulos_client.buscar_articulos(
+            range(1, 2501))
+
+        self.assertEqual(len(articulos), 2499)
+        self.assertEqual(no_encontrados, [1500])
+        self.assertEqual(mock_request.call_count, 4)
+
+    @patch('pedido.clients.requests.Session.request')
+    def test_revalidar_articulo(self, mock_request) -> None:
+        """Prueba que un artículo ya recibido se revalida con su ETag y un
+        304 reutiliza la versión guardada."""
+        mock_request.side_effect = [
+            _respuesta(200, {'access': _jwt(time.time() + 300)}),
+            _respuesta(200, self.articulo, {'ETag': '"1-1"'}),
+            _respuesta(304),
+        ]
+
+        self.articulos_client.obtener_articulo(1)
+        self.assertEqual(self.articulos_client.obtener_articulo(1),
+                         self.articulo)
+        self.assertEqual(
+            mock_request.call_args.kwargs['headers']['If-None-Match'],
+            '"1-1"')
+
+    @patch('pedido.clients.requests.Session.request')
+    def test_revalidar_lote(self, mock_request) -> None:
+        """Prueba que el lote envía las versiones conocidas y reutiliza
+        los artículos sin cambios."""
+        articulo = {'id': 1, 'referencia': 'ART123', 'version': 3}
+        self.articulos_client.cache.ttl = 0
+        self.articulos_client.cache.stale_ttl = 0
+        mock_request.side_effect = [
+            _respuesta(200, {'access': _jwt(time.time() + 300)}),
+            _respuesta(200, {'articulos': {'1': articulo},
+                             'no_encontrados': []}),
+            _respuesta(200, {'articulos': {}, 'sin_cambios': [1],
+                             'no_encontrados': []}),
+        ]
+
+        self.articulos_client.obtener_articulos([1])
+        self.assertEqual(self.articulos_client.obtener_articulos([1]),
+                         {1: articulo})
+        self.assertEqual(mock_request.call_args.kwargs['json'],
+                         {'ids': [1], 'versiones': {'1': 3}})
+
+    @patch('pedido.clients.requests.Session.request')
+    def test_articulos_frescos_sin_peticiones(self, mock_request) -> None:
+        """Prueba que los artículos frescos en caché no generan peticiones
+        y sólo se piden los que faltan."""
+        mock_request.side_effect = [
+            _respuesta(200, {'access': _jwt(time.time() + 300)}),
+            _respuesta(200, {'articulos': {'1': self.articulo},
+                             'no_encontrados': []}),
+            _respuesta(200, {'articulos': {'2': {'id': 2}},
+                             'no_encontrados': []}),
+        ]
+
+        self.articulos_client.obtener_articulos([1])
+        self.articulos_client.obtener_articulos([1])
+        articulos = self.articulos_client.obtener_articulos([1, 2])
+
+        self.assertEqual(sorted(articulos), [1, 2])
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual(mock_request.call_args.kwargs['params']['ids'], '2')
+        estadisticas = self.articulos_client.cache.estadisticas()
+        self.assertEqual(estadisticas['aciertos'], 2)
+        self.assertEqual(estadisticas['fallos'], 2)
+
+    @patch('pedido.clients.requests.Session.request')
+    def test_articulo_obsoleto_revalidado(self, mock_request) -> None:
+        """Prueba que un artículo obsoleto se sirve de la caché y se
+        revalida en segundo plano."""
+        articulo = {'id': 1, 'referencia': 'ART123', 'version': 1}
+        cambiado = {'id': 1, 'referencia': 'ART999', 'version': 2}
+        mock_request.side_effect = [
+            _respuesta(200, {'access': _jwt(time.time() + 300)}),
+            _respuesta(200, {'articulos': {'1': articulo},
+                             'no_encontrados': []}),
+            _respuesta(200, {'articulos': {'1': cambiado},
+                             'no_encontrados': []}),
+        ]
+
+        self.articulos_client.obtener_articulos([1])
+        self.articulos_client.cache.ttl = 0
+        self.assertEqual(self.articulos_client.obtener_articulos([1]),
+                         {1: articulo})
+        self.articulos_client._executor.shutdown(wait=True)
+
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual(self.articulos_client.cache.ver(
+            (1, CAMPOS_ARTICULO)).data, cambiado)
+
+    @patch('pedido.clients.requests.Session.request')
+    def test_obtener_cambios(self, mock_request) -> None:
+        """Prueba consultar el feed de cambios desde un cursor."""
+        mock_request.side_effect = [
+            _respuesta(200, {'access': _jwt(time.time() + 300)}),
+            _respuesta(200, {'articulos': [self.articulo],
+                             'siguiente_cursor': '2_1', 'hay_mas': False}),
+        ]
+
+        cambios = self.articulos_client.obtener_cambios('1_1', limite=10)
+
+        self.assertEqual(cambios['siguiente_cursor'], '2_1')
+        self.assertEqual(mock_request.call_args.args[1],
+                         'http://articulos/articulos/cambios')
+        self.assertEqual(mock_request.call_args.kwargs['params']['desde'],
+                         '1_1')
+
+    @patch('pedido.clients.requests.Session.request')
+    def test_obtener_articulos_lote_faltante(self, mock_request) -> None:
+        """Prueba que un artículo inexistente en el lote lanza un 404."""
+        mock_request.side_effect = [
+            _respuesta(200, {'access': _jwt(time.time() + 300)}),
+            _respuesta(200, {'articulos': {}, 'no_encontrados': [999]}),
+        ]
+
+        with self.assertRaises(ArticuloNoEncontrado) as contexto:
+            self.articulos_client.obtener_articulos([999])
+
+        self.assertEqual(contexto.exception.articulo_id, 999)
+
+    @patch('pedido.clients.requests.Session.request')
+    def test_obtener_articulos_concurrente(self, mock_request) -> None:
+        """Prueba que sin consulta por lotes los artículos se piden en
+        paralelo, una sola vez cada uno."""
+        def responder(method, url, **kwargs):
+            if method == 'POST':
+                return _respuesta(200, {'access': _jwt(time.time() + 300)})
+            if url.endswith('batch'):
+                return _respuesta(404)
+            articulo_id = int(url.rsplit('/', 1)[1])
+            return _respuesta(200, {'id': articulo_id})
+        mock_request.side_effect = responder
+
+        articulos = self.articulos_client.obtener_articulos([1, 2, 3, 2, 1])
+
+        self.assertEqual(sorted(articulos), [1, 2, 3])
+        self.assertFalse(self.articulos_client.lotes_disponibles)
+        urls = [c.args[1] for c in mock_request.call_args_list]
+        self.assertEqual(len([u for u in urls if u[-1].isdigit()]), 3)
+
+    @patch('pedido.clients.requests.Session.request')
+    def test_consulta_por_lotes_se_reintenta(self, mock_request) -> None:
+        """Prueba que tras un 404 de la consulta por lotes se vuelve a
+        probar pasado `REINTENTO_LOTES`."""
+        respuestas = iter([404, 200])
+
+        def responder(method, url, **kwargs):
+            if method == 'POST':
+                return _respuesta(200, {'access': _jwt(time.time() + 300)})
+            if url.endswith('batch'):
+                return _respuesta(next(respuestas), {
+                    'articulos': {'2': {'id': 2}}, 'no_encontrados': []})
+            return _respuesta(200, {'id': int(url.rsplit('/', 1)[1])})
+        mock_request.side_effect = responder
+
+        self.articulos_client.obtener_articulos([1])
+        self.assertFalse(self.articulos_client.lotes_disponibles)
+
+        despues = time.monotonic() + ArticulosClient.REINTENTO_LOTES
+        with patch('pedido.clients.time.monotonic', return_value=despues):
+            self.assertTrue(self.articulos_client.lotes_disponibles)
+            self.assertEqual(self.articulos_client.obtener_articulos([2]),
+                             {2: {'id': 2}})
+        urls = [c.args[1] for c in mock_request.call_args_list]
+        self.assertEqual(len([u for u in urls if u.endswith('batch')]), 2)
+
+    @patch('pedido.clients.requests.Session.request')
+    def test_obtener_articulos_concurrente_404(self, mock_request) -> None:
+        """Prueba que la consulta concurrente falla con el primer 404."""
+        def responder(method, url, **kwargs):
+            if method == 'POST':
+                return _respuesta(200, {'access': _jwt(time.time() + 300)})
+            if url.endswith('/999'):
+                return _respuesta(404)
+            return _respuesta(200, {'id': 1})
+        mock_request.side_effect = responder
+
+        with self.assertRaises(ArticuloNoEncontrado):
+            self.articulos_client.obtener_articulos_concurrente([1, 999])
+
+    @patch('pedido.clients.requests.Session.request')
+    def test_circuito_abierto_falla_al_momento(self, mock_request) -> None:
+        """Prueba que tras varios fallos seguidos no se llama a Artículos y
+        se responde 503."""
+        mock_request.side_effect = requests.ConnectionError()
+        with self.assertLogs('pedido.breaker', 'WARNING'):
+            for _ in range(self.articulos_client.circuito.umbral_fallos):
+                with self.assertRaises(ArticulosServiceError):
+                    self.articulos_client.obtener_articulo(1)
+        llamadas = mock_request.call_count
+
+        with self.assertRaises(CircuitoAbierto) as contexto:
+            self.articulos_client.obtener_articulos([1, 2])
+
+        self.assertEqual(contexto.exception.status_code, 503)
+        self.assertEqual(mock_request.call_count, llamadas)
+        self.assertEqual(
+            self.articulos_client.circuito.estadisticas()['rechazadas'], 1)
+
+    @patch('pedido.clients.requests.Session.request')
+    def test_circuito_abierto_usa_cache(self, mock_request) -> None:
+        """Prueba que con el circuito abierto se pueden usar artículos
+        caducados de la caché si la política lo permite."""
+        client = ArticulosClient(
+            url='http://articulos/articulos/',
+            token_url='http://articulos/api/token/',
+            username='usuario', password='clave', cache_ttl=0,
+            cache_stale_ttl=0, circuito_umbral_fallos=1,
+            circuito_usar_cache=True)
+        client.cache.set((1, CAMPOS_ARTICULO), self.articulo)
+        mock_request.side_effect = requests.ConnectionError()
+        with self.assertLogs('pedido.breaker', 'WARNING'), \
+                self.assertRaises(ArticulosServiceError):
+            client.obtener_articulo(2)
+
+        self.assertEqual(client.obtener_articulos([1]), {1: self.articulo})
+        with self.assertRaises(CircuitoAbierto):
+            client.obtener_articulos([1, 2])
+        self.assertEqual(mock_request.call_count, 1)
+
+    def test_hedging_usa_la_primera_respuesta(self) -> None:
+        """Prueba que una consulta lenta se duplica y se usa la respuesta
+        que llega antes."""
+        client = ArticulosClient(
+            url='http://articulos/articulos/',
+            token_url='http://articulos/api/token/',
+            username='usuario', password='clave', hedging=True,
+            hedging_presupuesto=1, hedging_retardo_inicial=0.01)
+        client.hedging.nueva_consulta()
+        liberar = threading.Event()
+        self.addCleanup(liberar.set)
+        llamadas = []
+
+        def responder(method, path, **kwargs):
+            llamadas.append(path)
+            if len(llamadas) == 1:
+                liberar.wait(5)
+                return _respuesta(200, {'id': 1, 'lenta': True})
+            return _respuesta(200, {'id': 1})
+
+        with patch.object(client, 'request', side_effect=responder):
+            self.assertEqual(client.obtener_articulo(1), {'id': 1})
+
+        self.assertEqual(llamadas, ['1', '1'])
+        estadisticas = client.hedging.estadisticas()
+        self.assertEqual(estadisticas['duplicadas'], 1)
+        self.assertEqual(estadisticas['ganadas_por_duplicado'], 1)
+
+    def test_hedging_no_espera_al_pool(self) -> None:
+        """Prueba que la primera petición no espera a que haya hilos libres
+        en el pool de duplicados ni se duplica por esa espera."""
+        client = ArticulosClient(
+            url='http://articulos/articulos/',
+            token_url='http://articulos/api/token/',
+            username='usuario', password='clave', hedging=True,
+            hedging_presupuesto=1, hedging_retardo_inicial=0.05,
+            max_concurrencia=1)
+        client.hedging.nueva_consulta()
+        liberar = threading.Event()
+        self.addCleanup(liberar.set)
+        for _ in range(2):
+            client._executor_hedging.submit(liberar.wait, 5)
+
+        with patch.object(client, 'request',
+                          return_value=_respuesta(200, {'id': 1})):
+            self.assertEqual(client.obtener_articulo(1), {'id': 1})
+
+        self.assertEqual(client.hedging.estadisticas()['duplicadas'], 0)
+
+    def test_hedging_consulta_por_lotes(self) -> None:
+        """Prueba que la consulta por lotes con GET también se duplica si
+        tarda."""
+        client = ArticulosClient(
+            url='http://articulos/articulos/',
+            token_url='http://articulos/api/token/',
+            username='usuario', password='clave', hedging=True,
+            hedging_presupuesto=1, hedging_retardo_inicial=0.01)
+        client.hedging.nueva_consulta()
+        liberar = threading.Event()
+        self.addCleanup(liberar.set)
+        llamadas = []
+
+        def responder(method, path, **kwargs):
+            llamadas.append((method, path))
+            if len(llamadas) == 1:
+                liberar.wait(5)
+            return _respuesta(200, {'articulos': {'1': {'id': 1},
+                                                  '2': {'id': 2}},
+                                    'no_encontrados': []})
+
+        with patch.object(client, 'request', side_effect=responder):
+            self.assertEqual(client.obtener_articulos([1, 2]),
+                             {1: {'id': 1}, 2: {'id': 2}})
+
+        self.assertEqual(llamadas, [('GET', 'batch'), ('GET', 'batch')])
+        self.assertEqual(client.hedging.estadisticas()['duplicadas'], 1)
+
+
+class HedgingTestCase(TestCase):
+    """Casos de prueba para la política de hedging."""
+
+    def test_retardo_percentil(self) -> None:
+        """Prueba que el retardo es el percentil de las latencias una vez
+        hay muestras suficientes."""
+        hedging = Hedging(percentil=90, retardo_inicial=0.5, min_muestras=10)
+        self.assertEqual(hedging.retardo(), 0.5)
+        for milisegundos in range(1, 21):
+            hedging.registrar(milisegundos / 1000)
+        self.assertAlmostEqual(hedging.retardo(), 0.018)
+
+    def test_presupuesto(self) -> None:
+        """Prueba que no se duplica más de la fracción de consultas del
+        presupuesto, y nunca más de una vez por consulta."""
+        hedging = Hedging(presupuesto=0.25)
+        duplicadas = 0
+        for _ in range(100):
+            hedging.nueva_consulta()
+            duplicadas += hedging.duplicar()
+        self.assertEqual(duplicadas, 25)
+
+        hedging = Hedging(presupuesto=5)
+        for _ in range(10):
+            hedging.nueva_consulta()
+            hedging.duplicar()
+        self.assertFalse(hedging.duplicar())
+        self.assertEqual(hedging.duplicadas, 10)
+
+
+class CircuitBreakerTestCase(TestCase):
+    """Casos de prueba para el circuito de las llamadas a Artículos."""
+
+    def setUp(self) -> None:
+        """Crea un circuito con un reloj controlado por la prueba."""
+        self.ahora = 0.0
+        self.circuito = CircuitBreaker(umbral_fallos=2, duracion_abierto=10,
+                                       reloj=lambda: self.ahora)
+        # Cada transición se registra como aviso
+        avisos = patch.object(breaker.logger, 'warning')
+        self.avisos = avisos.start()
+        self.addCleanup(avisos.stop)
+
+    def _abrir(self) -> None:
+        for _ in range(2):
+            self.assertTrue(self.circuito.permitir())
+            self.circuito.fallo()
+
+    def test_se_abre_tras_fallos_seguidos(self) -> None:
+        """Prueba que un éxito reinicia la cuenta de fallos."""
+        self.circuito.permitir()
+        self.circuito.fallo()
+        self.circuito.permitir()
+        self.circuito.exito()
+        self.circuito.permitir()
+        self.circuito.fallo()
+        self.assertEqual(self.circuito.estado, CERRADO)
+
+        self.circuito.permitir()
+        self.circuito.fallo()
+        self.assertEqual(self.circuito.estado, ABIERTO)
+        self.assertFalse(self.circuito.permitir())
+
+    def test_sonda_cierra_el_circuito(self) -> None:
+        """Prueba que pasado el tiempo abierto sólo pasa una sonda y que
+        su éxito cierra el circuito."""
+        self._abrir()
+        self.ahora = 10
+        self.assertTrue(self.circuito.permitir())
+        self.assertEqual(self.circuito.estado, SEMIABIERTO)
+        self.assertFalse(self.circuito.permitir())
+
+        self.circuito.exito()
+        self.assertEqual(self.circuito.estado, CERRADO)
+        self.assertEqual(self.circuito.estadisticas()['transiciones'], {
+            'cerrado->abierto': 1, 'abierto->semiabierto': 1,
+            'semiabierto->cerrado': 1})
+        self.assertEqual(self.avisos.call_count, 3)
+
+    def test_sonda_fallida_reabre_el_circuito(self) -> None:
+        """Prueba que si falla la sonda el circuito vuelve a abrirse."""
+        self._abrir()
+        self.ahora = 10
+        self.circuito.permitir()
+        self.circuito.fallo()
+        self.assertEqual(self.circuito.estado, ABIERTO)
+        self.ahora = 15
+        self.assertFalse(self.circuito.disponible())
+        self.ahora = 20
+        self.assertTrue(self.circuito.disponible())
+
+    def test_sonda_perdida(self) -> None:
+        """Prueba que una sonda sin resultado no bloquea el circuito."""
+        self._abrir()
+        self.ahora = 10
+        self.circuito.permitir()
+        self.assertFalse(self.circuito.permitir())
+        self.ahora = 20
+        self.assertTrue(self.circuito.permitir())
+        self.assertEqual(self.circuito.estado, SEMIABIERTO)
+
+
+class PedidoExportTestCase(TestCase):
+    """Casos de prueba para la exportación de pedidos."""
+
+    def setUp(self) -> None:
+        """Configura un pedido antiguo y otro reciente."""
+        self.user = User.objects.create_user(username='testuser',
+                                             password='testpassword')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user, token=self.token)
+
+        self.antiguo = Pedido.objects.create(
+            fecha_creacion=timezone.make_aware(datetime.datetime(2024, 1, 1)))
+        self.reciente = Pedido.objects.create(
+            fecha_creacion=timezone.make_aware(datetime.datetime(2024, 6, 1)))
+        for pedido in (self.antiguo, self.reciente):
+            for articulo_id in (1, 2):
+                DetallePedido.objects.create(
+                    pedido=pedido,
+                    articulo_id=articulo_id,
+                    articulo_referencia=f"ART{articulo_id}",
+                    articulo_nombre=f"Artículo {articulo_id}",
+                    articulo_precio_sin_impuestos=100,
+                    articulo_impuesto_aplicable=21,
+                    cantidad=1
+                )
+            pedido.calcular_precio_total()
+
+    def test_exportar_ndjson(self) -> None:
+        """Prueba exportar un pedido por línea en NDJSON."""
+        response = self.client.get(reverse('exportar_pedidos'))
+        self.assertEqual(response.status_code, 200)
+        lineas = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(linea)['id'] for linea in lineas],
+                         [self.antiguo.id, self.reciente.id])
+        self.assertEqual(len(json.loads(lineas[0])['articulos']), 2)
+
+    def test_exportar_csv_por_fechas(self) -> None:
+        """Prueba exportar en CSV sólo los pedidos del rango de fechas."""
+        response = self.client.get(reverse('exportar_pedidos'), {
+            'formato': 'csv', 'desde': '2024-05-01', 'hasta': '2024-06-01'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        filas = list(csv.reader(
+            b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(filas[0][0], 'pedido_id')
+        self.assertEqual({fila[0] for fila in filas[1:]},
+                         {str(self.reciente.id)})
+        self.assertEqual(len(filas), 3)
+
+    def test_exportar_formato_invalido(self) -> None:
+        """Prueba que un formato desconocido devuelva un 400."""
+        response = self.client.get(reverse('exportar_pedidos'),
+                                   {'formato': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_comando_exportar_pedidos(self) -> None:
+        """Prueba el comando de exportación por bloques pequeños."""
+        salida = io.StringIO()
+        call_command('exportar_pedidos', '--chunk-size', '1', stdout=salida)
+        self.assertEqual(len(salida.getvalue().splitlines()), 2)
+
+
+class VentasArticulosTestCase(TestCase):
+    """Casos de prueba para las ventas diarias por artículo."""
+
+    def setUp(self) -> None:
+        """Configura un usuario y los artículos que devuelve Artículos."""
+        self.user = User.objects.create_user(username='testuser',
+                                             password='testpassword')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.articulos = {
+            articulo_id: {'id': articulo_id,
+                          'referencia': f'ART{articulo_id}',
+                          'nombre': f'Artículo {articulo_id}',
+                          'precio_sin_impuestos': precio,
+                          'impuesto_aplicable': '21.00'}
+            for articulo_id, precio in ((1, '10.00'), (2, '2.50'),
+                                        (3, '1.00'))}
+
+    def _ventas(self) -> dict:
+        return {venta.articulo_id: (venta.unidades,
+                                    str(venta.importe_sin_impuestos))
+                for venta in VentaDiariaArticulo.objects.filter(
+                    fecha=timezone.localdate())}
+
+    @patch.object(ArticulosClient, 'obtener_articulos')
+    def test_ventas_al_crear_y_editar(self, mock_get) -> None:
+        """Prueba que las ventas se actualizan al crear y editar pedidos y
+        coinciden con las que reconstruye el comando."""
+        mock_get.side_effect = lambda ids, *args: {
+            articulo_id: self.articulos[articulo_id] for articulo_id in ids}
+        for articulos in ([{'id': 1, 'cantidad': 2}, {'id': 2, 'cantidad': 4}],
+                          [{'id': 1, 'cantidad': 1}]):
+            self.client.post(reverse('crear_pedido'), {'articulos': articulos},
+                             format='json')
+        self.assertEqual(self._ventas(), {1: (3, '30.00'), 2: (4, '10.00')})
+
+        pedido = Pedido.objects.order_by('id').first()
+        self.client.put(reverse('editar_pedido', args=[pedido.id]),
+                        json.dumps({'articulos': [{'id': 1, 'cantidad': 1},
+                                                  {'id': 3, 'cantidad': 5}]}),
+                        content_type='application/json')
+        incrementales = self._ventas()
+        self.assertEqual(incrementales, {1: (2, '20.00'), 2: (0, '0.00'),
+                                         3: (5, '5.00')})
+
+        call_command('reconstruir_ventas', stdout=io.StringIO())
+        reconstruidas = self._ventas()
+        self.assertEqual(reconstruidas,
+                         {articulo_id: venta for articulo_id, venta
+                          in incrementales.items() if venta[0]})
+
+    def test_informe_de_ventas(self) -> None:
+        """Prueba el top de artículos y los totales de un rango de fechas,
+        sin leer los pedidos."""
+        hoy = timezone.localdate()
+        ayer = hoy - datetime.timedelta(days=1)
+        VentaDiariaArticulo.objects.bulk_create([
+            VentaDiariaArticulo(fecha=ayer, articulo_id=1, unidades=1,
+                                importe_sin_impuestos=Decimal('10.00')),
+            VentaDiariaArticulo(fecha=hoy, articulo_id=1, unidades=2,
+                                importe_sin_impuestos=Decimal('20.00')),
+            VentaDiariaArticulo(fecha=hoy, articulo_id=2, unidades=40,
+                                importe_sin_impuestos=Decimal('25.00')),
+            VentaDiariaArticulo(fecha=hoy - datetime.timedelta(days=60),
+                                articulo_id=3, unidades=1,
+                                importe_sin_impuestos=Decimal('99.00')),
+        ])
+
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('ventas_articulos'),
+                                       {'top': 1})
+
+        self.assertEqual(response.status_code, 200)
+        informe = response.json()
+        self.assertEqual(informe['importe_sin_impuestos'], '55.00')
+        self.assertEqual(informe['unidades'], 43)
+        self.assertEqual([dia['fecha'] for dia in informe['por_dia']],
+                         [ayer.isoformat(), hoy.isoformat()])
+        self.assertEqual(informe['articulos'], [
+            {'articulo_id': 1, 'unidades': 3,
+             'importe_sin_impuestos': '30.00'}])
+
+        response = self.client.get(reverse('ventas_articulos'), {
+            'desde': hoy.isoformat(), 'orden': 'unidades'})
+        self.assertEqual(response.json()['articulos'][0]['articulo_id'], 2)
+
+        for params in ({'desde': 'ayer'}, {'desde': '2024-02-30'},
+                       {'desde': '2024-02-02', 'hasta': '2024-02-01'},
+                       {'top': 'x'}, {'top': '0'}, {'top': '101'},
+                       {'orden': 'nombre'}):
+            response = self.client.get(reverse('ventas_articulos'), params)
+            self.assertEqual(response.status_code, 400, params)
+        self.assertEqual(response.json()['error'],
+                         '`orden` debe ser importe o unidades.')
+        response = self.client.get(reverse('ventas_articulos'), {'top': 'x'})
+        self.assertEqual(response.json()['error'],
+                         '`top` debe ser un entero entre 1 y 100.')
+
+
+class ArticuloCacheTestCase(TestCase):
+    """Casos de prueba para la caché local de artículos."""
+
+    def setUp(self) -> None:
+        """Crea una caché con un reloj controlado por la prueba."""
+        self.ahora = 0.0
+        self.cache = ArticuloCache(max_size=2, ttl=10, stale_ttl=20,
+                                   reloj=lambda: self.ahora)
+
+    def test_estados_por_antiguedad(self) -> None:
+        """Prueba el paso de fresca a obsoleta y a caducada."""
+        self.cache.set(1, {'id': 1})
+        self.assertEqual(self.cache.consultar(1)[0], FRESCO)
+        self.ahora = 15
+        self.assertEqual(self.cache.consultar(1)[0], OBSOLETO)
+        self.ahora = 31
+        self.assertEqual(self.cache.consultar(1)[0], CADUCADO)
+        self.assertIsNone(self.cache.get(1))
+
+        self.cache.renovar(1)
+        self.assertEqual(self.cache.get(1), {'id': 1})
+
+    def test_expulsion_lru(self) -> None:
+        """Prueba que se expulsa el artículo usado hace más tiempo."""
+        self.cache.set(1, {'id': 1})
+        self.cache.set(2, {'id': 2})
+        self.cache.get(1)
+        self.cache.set(3, {'id': 3})
+
+        self.assertIsNone(self.cache.ver(2))
+        self.assertIsNotNone(self.cache.ver(1))
+        estadisticas = self.cache.estadisticas()
+        self.assertEqual(estadisticas['expulsiones'], 1)
+        self.assertEqual(estadisticas['tasa_aciertos'], 1.0)
+
+    def test_estadisticas_endpoint(self) -> None:
+        """Prueba que la vista de métricas devuelva las de la caché."""
+        user = User.objects.create_user(username='testuser',
+                                        password='testpassword')
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.get(reverse('estadisticas_cache_articulos'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('tasa_aciertos', response.json())
+
+
+def _articulo(articulo_id: int, **campos) -> dict:
+    """Artículo con la forma que devuelve el servicio de Artículos."""
+    return {'id': articulo_id, 'referencia': f'ART{articulo_id}',
+            'nombre': f'Artículo {articulo_id}',
+            'precio_sin_impuestos': '10.50', 'impuesto_aplicable': '21.00',
+            'version': 1, **campos}
+
+
+class SnapshotTestCase(TestCase):
+    """Casos de prueba para el snapshot compartido del catálogo."""
+
+    def setUp(self) -> None:
+        """Prepara un directorio temporal para los snapshots."""
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = os.path.join(directorio.name, 'catalogo.bin')
+
+    def test_escribir_y_leer(self) -> None:
+        """Prueba que los artículos se leen tal como se guardaron."""
+        articulos = [_articulo(i) for i in (7, 3, 1000)]
+        escribir_snapshot(self.ruta, map(empaquetar, articulos), '123_7')
+
+        snapshot = Snapshot(self.ruta)
+        self.addCleanup(snapshot.cerrar)
+        self.assertEqual(len(snapshot), 3)
+        self.assertEqual(snapshot.cursor, '123_7')
+        self.assertEqual(snapshot.get(3), _articulo(3))
+        self.assertEqual(snapshot.get(1000), _articulo(1000))
+        self.assertIsNone(snapshot.get(4))
+
+    def test_articulo_que_no_cabe(self) -> None:
+        """Prueba que no se truncan los artículos que no caben."""
+        self.assertIsNone(empaquetar(_articulo(1, nombre='ñ' * 200)))
+        self.assertIsNone(empaquetar(_articulo(1,
+                                               impuesto_aplicable='1.505')))
+
+    def test_recarga_al_sustituir(self) -> None:
+        """Prueba que el catálogo abre el nuevo fichero tras el refresco."""
+        escribir_snapshot(self.ruta, [empaquetar(_articulo(1))])
+        catalogo = CatalogoCompartido(self.ruta, intervalo=0)
+        self.assertEqual(catalogo.get(1)['version'], 1)
+
+        escribir_snapshot(self.ruta, [empaquetar(_articulo(1, version=2))])
+        self.assertEqual(catalogo.get(1)['version'], 2)
+        self.assertEqual(catalogo.estadisticas()['recargas'], 2)
+
+        catalogo.max_edad = -1
+        self.assertIsNone(catalogo.get(1))
+
+    def test_refrescar_con_cambios(self) -> None:
+        """Prueba que el refresco parte del cursor del snapshot anterior."""
+        client = Mock()
+        client.obtener_cambios.side_effect = [
+            {'articulos': [_articulo(1), _articulo(2)],
+             'siguiente_cursor': 'c1', 'hay_mas': True},
+            {'articulos': [], 'siguiente_cursor': None, 'hay_mas': False},
+            {'articulos': [_articulo(2, version=2),
+                           _articulo(1, nombre='x' * 400)],
+             'siguiente_cursor': 'c2', 'hay_mas': False},
+        ]
+
+        self.assertEqual(refrescar_snapshot(client, self.ruta), 2)
+        self.assertEqual(refrescar_snapshot(client, self.ruta), 1)
+
+        self.assertEqual(client.obtener_cambios.call_args_list[1].args[0],
+                         'c1')
+        self.assertEqual(client.obtener_cambios.call_args_list[2].args[0],
+                         'c1')
+        snapshot = Snapshot(self.ruta)
+        self.addCleanup(snapshot.cerrar)
+        self.assertEqual(snapshot.cursor, 'c2')
+        self.assertIsNone(snapshot.get(1))
+        self.assertEqual(snapshot.get(2)['version'], 2)
+
+    @patch('pedido.clients.requests.Session.request')
+    def test_cliente_usa_snapshot(self, mock_request) -> None:
+        """Prueba que el cliente sólo pide lo que no está en el snapshot."""
+        escribir_snapshot(self.ruta, [empaquetar(_articulo(1))])
+        articulos_client = ArticulosClient(
+            url='http://articulos/articulos/',
+            token_url='http://articulos/api/token/',
+            username='usuario', password='clave', snapshot_path=self.ruta)
+        mock_request.side_effect = [
+            _respuesta(200, {'access': _jwt(time.time() + 300)}),
+            _respuesta(200, {'articulos': {'2': _articulo(2)},
+                             'no_encontrados': []}),
+        ]
+
+        articulos = articulos_client.obtener_articulos([1, 2])
+
+        self.assertEqual(articulos, {1: _articulo(1), 2: _articulo(2)})
+        self.assertEqual(mock_request.call_args.kwargs['params']['ids'], '2')
+
+
+class PricingTestCase(TestCase):
+    """Casos de prueba para el cálculo de precios en céntimos."""
+
+    def test_conversiones(self) -> None:
+        """Prueba la conversión entre importes, céntimos y puntos básicos."""
+        self.assertEqual(pricing.a_centimos('10.99'), 1099)
+        self.assertEqual(pricing.a_centimos(0.1 + 0.2), 30)
+        self.assertEqual(pricing.a_puntos_basicos(Decimal('21.00')), 2100)
+        self.assertEqual(pricing.desde_centimos(1099), Decimal('10.99'))
+        self.assertEqual(pricing.formatear_centimos(5), '0.05')
+        self.assertEqual(pricing.formatear_centimos(-123), '-1.23')
+
+    def test_redondeo_medios_hacia_arriba(self) -> None:
+        """Prueba que los medios céntimos se redondean hacia arriba."""
+        self.assertEqual(pricing.precio_con_impuestos(50, 2100), 61)
+        self.assertEqual(pricing.precio_con_impuestos(10000, 2100), 12100)
+
+    def test_impuesto_redondeado_por_pedido(self) -> None:
+        """Prueba que el impuesto se redondea una vez por pedido y no por
+        línea."""
+        self.assertEqual(pricing.calcular_totales([1, 1], [2500, 2500],
+                                                  [1, 1]), (2, 3))
+        self.assertEqual(pricing.calcular_totales([], [], []), (0, 0))
+
+    @skipIf(pricing.numpy is None, 'NumPy no está instalado')
+    def test_vectorizado_igual_que_enteros(self) -> None:
+        """Prueba que el cálculo con NumPy coincide con el de enteros de
+        Python."""
+        centimos = [(i * 7919) % 100000 for i in range(5000)]
+        puntos = [(i * 31) % 2500 for i in range(5000)]
+
+        vectorizados = pricing.precios_con_impuestos(centimos, puntos)
+        with patch.object(pricing, 'numpy', None):
+            enteros = pricing.precios_con_impuestos(centimos, puntos)
+
+        self.assertEqual(vectorizados, enteros)
+
+    def test_sin_desbordamiento(self) -> None:
+        """Prueba que los importes que no caben en 64 bits son exactos."""
+        self.assertEqual(
+            pricing.precios_con_impuestos([10 ** 18] * 100, [2100] * 100),
+            [121 * 10 ** 16] * 100)
+        total, total_con_impuestos = pricing.calcular_totales(
+            [10 ** 12] * 100, [2100] * 100, [10 ** 6] * 100)
+        self.assertEqual(total, 10 ** 20)
+        self.assertEqual(total_con_impuestos, 121 * 10 ** 18)
@@ -0,0 +1,98 @@
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+from django.db import models
+from django.db.models import Case, F, Sum, Value, When
+from django.utils import timezone
+from .models import VentaDiariaArticulo
+from .pricing import a_centimos, desde_centimos
+
+
+IMPORTE = models.DecimalField(max_digits=14, decimal_places=2)
+
+
+def acumular(detalles, ventas: dict = None, signo: int = 1) -> dict:
+    """Suma (o resta, con `signo=-1`) a `ventas` las unidades y el importe
+    sin impuestos, en céntimos, de cada artículo de unas líneas de pedido.
+    """
+    if ventas is None:
+        ventas = defaultdict(lambda: [0, 0])
+    for detalle in detalles:
+        venta = ventas[detalle.articulo_id]
+        venta[0] += signo * detalle.cantidad
+        venta[1] += signo * detalle.cantidad * a_centimos(
+            detalle.articulo_precio_sin_impuestos)
+    return ventas
+
+
+def registrar(dia: datetime.date, ventas: dict) -> None:
+    """Suma las `ventas` de cada artículo a las de un día.
+
+    Son dos consultas sean cuantos sean los artículos: un `INSERT` que
+    ignora las filas que ya existen y un `UPDATE` que suma a cada una su
+    parte con `F()`, así dos pedidos a la vez no se pisan.
+    """
+    ventas = {articulo_id: venta for articulo_id, venta in ventas.items()
+              if any(venta)}
+    if not ventas:
+        return
+    VentaDiariaArticulo.objects.bulk_create(
+        [VentaDiariaArticulo(fecha=dia, articulo_id=articulo_id)
+         for articulo_id in ventas],
+        ignore_conflicts=True)
+    # Ordenados para que dos pedidos bloqueen las filas en el mismo orden
+    articulo_ids = sorted(ventas)
+    VentaDiariaArticulo.objects.filter(
+        fecha=dia, articulo_id__in=articulo_ids
+    ).update(
+        unidades=F('unidades') + Case(
+            *[When(articulo_id=articulo_id, then=Value(ventas[articulo_id][0]))
+              for articulo_id in articulo_ids],
+            default=Value(0), output_field=models.BigIntegerField()),
+        importe_sin_impuestos=F('importe_sin_impuestos') + Case(
+            *[When(articulo_id=articulo_id,
+                   then=Value(desde_centimos(ventas[articulo_id][1])))
+              for articulo_id in articulo_ids],
+            default=Value(0), output_field=IMPORTE),
+    )
+
+
+def registrar_pedidos(lineas_por_pedido) -> None:
+    """Suma las ventas de unos pedidos nuevos, dados como pares
+    `(pedido, líneas)`, con dos consultas por día."""
+    por_dia = {}
+    for pedido, lineas in lineas_por_pedido:
+        dia = timezone.localdate(pedido.fecha_creacion)
+        por_dia[dia] = acumular(lineas, por_dia.get(dia))
+    for dia, ventas in por_dia.items():
+        registrar(dia, ventas)
+
+
+def _importe(valor) -> Decimal:
+    """Importe con dos decimales (SQLite devuelve las sumas sin ellos)."""
+    return desde_centimos(a_centimos(valor or 0))
+
+
+def resumen(desde: datetime.date, hasta: datetime.date,
+            top: int = 10, orden: str = 'importe') -> dict:
+    """Totales, ventas por día y los `top` artículos más vendidos entre dos
+    fechas (incluidas), sólo con las tablas de ventas diarias."""
+    ventas = VentaDiariaArticulo.objects.filter(fecha__gte=desde,
+                                                fecha__lte=hasta)
+    sumas = {'unidades': Sum('unidades'),
+             'importe': Sum('importe_sin_impuestos')}
+    totales = ventas.aggregate(**sumas)
+    return {
+        'unidades': totales['unidades'] or 0,
+        'importe_sin_impuestos': _importe(totales['importe']),
+        'por_dia': [
+            {'fecha': fila['fecha'], 'unidades': fila['unidades'],
+             'importe_sin_impuestos': _importe(fila['importe'])}
+            for fila in ventas.values('fecha').annotate(**sumas)
+            .order_by('fecha')],
+        'articulos': [
+            {'articulo_id': fila['articulo_id'], 'unidades': fila['unidades'],
+             'importe_sin_impuestos': _importe(fila['importe'])}
+            for fila in ventas.values('articulo_id').annotate(**sumas)
+            .order_by(f'-{orden}', 'articulo_id')[:top]],
+    }
@@ -1,17 +1,120 @@
+import datetime
 import json
+from typing import Optional
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.http import JsonResponse
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from config.settings import API_ARTICULOS
-from .models import Pedido, DetallePedido
-import requests
-
-
-ARTICULOS_SERVICE_URL = API_ARTICULOS['URL']
-TOKEN_URL = API_ARTICULOS['TOKEN_URL']
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .clients import ArticuloNoEncontrado, ArticulosServiceError, \
+    get_articulos_client
+from .exports import FORMATOS, exportar, parsear_fecha
+from .fields import CamposInvalidos, campos_solicitados
+from .filtros import FiltrosInvalidos, filtrar_pedidos
+from . import idempotencia
+from .models import Pedido, DetallePedido, SolicitudPedido
+from .pagination import PaginacionInvalida, paginar_por_id
+from .pricing import a_centimos, a_puntos_basicos, desde_centimos, \
+    desde_puntos_basicos, precios_de_detalles, totales_de_detalles
+from .services import PedidoInvalido, crear_pedido, crear_pedidos, \
+    normalizar_articulos, presupuestar, presupuesto_de, validar_articulos
+from .solicitudes import encolar
+from . import ventas
+
+
+def _presupuestar(request):
+    """Presupuesto de los `articulos` de la petición, o la respuesta de
+    error si no se puede calcular."""
+    try:
+        return presupuestar(request.data.get('articulos', [])), None
+    except PedidoInvalido as e:
+        return None, Response({'error': e.mensaje}, status=e.status_code)
+    except ArticuloNoEncontrado:
+        return None, Response({'error': 'Artículo no encontrado.'},
+                              status=status.HTTP_404_NOT_FOUND)
+    except ArticulosServiceError as e:
+        return None, Response({'error': e.mensaje}, status=e.status_code)
+
+
+# Cabeceras de la respuesta que se repiten al devolverla guardada
+CABECERAS_GUARDADAS = ('Location', 'Preference-Applied')
+
+
+def _creacion_asincrona(request) -> bool:
+    """Indica si la petición se debe encolar en lugar de procesarla ya."""
+    preferencias = [preferencia.strip().lower() for preferencia
+                    in request.headers.get('Prefer', '').split(',')]
+    return ('respond-async' in preferencias
+            or getattr(settings, 'PEDIDOS_CREACION_ASINCRONA', False))
+
+
+def _guardar(escribir) -> Response:
+    return escribir()
+
+
+def _idempotente(request, clave: str, crear) -> Response:
+    """Ejecuta `crear` una sola vez por clave y guarda su respuesta.
+
+    `crear` recibe la función `guardar(escribir)` con la que hace sus
+    escrituras. Las consultas a Artículos se hacen antes, fuera de
+    cualquier transacción; `escribir` se ejecuta en una transacción corta
+    que primero renueva la reserva de la clave y después guarda la
+    respuesta con el pedido. Los errores 5xx no se guardan, para que se
+    puedan reintentar.
+    """
+    try:
+        registro, nueva = idempotencia.reservar(
+            request.user, clave, idempotencia.huella(request.data),
+            settings.PEDIDOS_IDEMPOTENCIA_ESPERA)
+    except idempotencia.ErrorIdempotencia as e:
+        return Response({'error': e.mensaje}, status=e.status_code)
+    if not nueva:
+        response = JsonResponse(registro.respuesta,
+                                status=registro.status_code)
+        for cabecera, valor in registro.cabeceras.items():
+            response[cabecera] = valor
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
+    guardadas = []
+
+    def guardar(escribir) -> Response:
+        with transaction.atomic():
+            if not idempotencia.renovar(registro):
+                raise idempotencia.ErrorIdempotencia(
+                    'La reserva de la clave de idempotencia ha caducado.')
+            response = escribir()
+            if response.status_code < 500:
+                idempotencia.completar(
+                    registro, response.status_code, response.data,
+                    {cabecera: response[cabecera]
+                     for cabecera in CABECERAS_GUARDADAS
+                     if response.has_header(cabecera)},
+                    settings.PEDIDOS_IDEMPOTENCIA_TTL)
+        guardadas.append(response)
+        return response
+
+    try:
+        response = crear(guardar)
+        # Las respuestas que no escriben nada (errores de validación) se
+        # guardan al terminar
+        if not guardadas and response.status_code < 500:
+            response = guardar(lambda: response)
+    except idempotencia.ErrorIdempotencia as e:
+        # Otra petición tiene ya la clave: no se libera
+        return Response({'error': e.mensaje}, status=e.status_code)
+    except Exception:
+        idempotencia.liberar(registro)
+        raise
+    if response.status_code >= 500:
+        idempotencia.liberar(registro)
+    return response
 
 
 class PedidoCreateView(APIView):
@@ -20,73 +123,210 @@ class PedidoCreateView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request) -> JsonResponse:
-        """Crea un nuevo pedido en la base de datos."""
-
-        articulos = request.data.get('articulos', [])
-        if not articulos:
-            return Response({'error': 'No se proporcionaron artículos.'},
-                            status=status.HTTP_400_BAD_REQUEST)
+        """Crea un nuevo pedido en la base de datos.
+
+        En modo asíncrono (cabecera `Prefer: respond-async` o
+        `PEDIDOS_CREACION_ASINCRONA`) la petición sólo se guarda y se
+        responde 202 con la URL en la que consultar su estado; el pedido lo
+        crea después `procesar_solicitudes`.
+
+        Con la cabecera `Idempotency-Key` los reintentos de la misma
+        petición devuelven la respuesta guardada en lugar de crear otro
+        pedido.
+        """
+        clave = request.headers.get('Idempotency-Key')
+        if clave is None:
+            return self._crear(request)
+        return _idempotente(request, clave,
+                            lambda guardar: self._crear(request, guardar))
+
+    def _crear(self, request, guardar=_guardar) -> Response:
+        if _creacion_asincrona(request):
+            return guardar(lambda: self._encolar(request))
+
+        presupuesto, error = _presupuestar(request)
+        if error is not None:
+            return error
+
+        return guardar(lambda: Response({'id': crear_pedido(presupuesto).id},
+                                        status=status.HTTP_201_CREATED))
+
+    def _encolar(self, request) -> Response:
+        try:
+            solicitud = encolar(request.data.get('articulos', []))
+        except PedidoInvalido as e:
+            return Response({'error': e.mensaje}, status=e.status_code)
+        url = request.build_absolute_uri(
+            reverse('estado_solicitud', args=[solicitud.id]))
+        return Response(
+            {'solicitud': solicitud.id, 'estado': solicitud.estado,
+             'url': url},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': url,
+                     'Preference-Applied': 'respond-async'})
+
+
+class PedidoBatchView(APIView):
+    """Vista para crear muchos pedidos en una sola petición."""
 
-        pedido = Pedido.objects.create()
-        total_sin_impuestos = 0
-        total_con_impuestos = 0
+    permission_classes = [IsAuthenticated]
+    MAX_PEDIDOS = 500
 
-        for articulo_data in articulos:
-            if articulo_data['cantidad'] <= 0:
-                pedido.delete()
-                return Response({'error': 'La cantidad debe ser positiva.'},
+    def post(self, request) -> JsonResponse:
+        """Crea varios pedidos de una vez.
+
+        Los artículos de todos los pedidos se consultan juntos y cada pedido
+        se valida por separado: uno inválido no impide crear los demás. Se
+        responde 201 si se han creado todos y 207 si alguno ha fallado, con
+        el resultado de cada pedido en el orden recibido.
+        """
+        pedidos = request.data.get('pedidos')
+        if not isinstance(pedidos, list) or not pedidos:
+            return JsonResponse({'error': 'No se proporcionaron pedidos.'},
                                 status=status.HTTP_400_BAD_REQUEST)
+        if len(pedidos) > self.MAX_PEDIDOS:
+            return JsonResponse(
+                {'error': f'No se pueden crear más de {self.MAX_PEDIDOS} '
+                          'pedidos a la vez.'},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        resultados = [None] * len(pedidos)
+        validos = {}
+        for indice, pedido_data in enumerate(pedidos):
+            try:
+                articulos = validar_articulos(pedido_data['articulos'])
+            except PedidoInvalido as e:
+                resultados[indice] = (e.status_code, e.mensaje)
+            except (KeyError, TypeError):
+                resultados[indice] = (status.HTTP_400_BAD_REQUEST,
+                                      'Formato de pedido inválido.')
+            else:
+                validos[indice] = articulos
+
+        # Una sola consulta con los artículos de todos los pedidos
+        try:
+            articulos_info, no_encontrados = \
+                get_articulos_client().buscar_articulos(
+                    articulo_data['id'] for articulos in validos.values()
+                    for articulo_data in articulos)
+        except ArticulosServiceError as e:
+            return JsonResponse({'error': e.mensaje}, status=e.status_code)
+
+        no_encontrados = set(no_encontrados)
+        presupuestos = {}
+        for indice, articulos in validos.items():
+            if any(articulo_data['id'] in no_encontrados
+                   for articulo_data in articulos):
+                resultados[indice] = (status.HTTP_404_NOT_FOUND,
+                                      'Artículo no encontrado.')
+            else:
+                presupuestos[indice] = presupuesto_de(articulos,
+                                                      articulos_info)
+
+        creados = crear_pedidos(list(presupuestos.values()))
+        for indice, pedido in zip(presupuestos, creados):
+            resultados[indice] = (status.HTTP_201_CREATED, pedido.id)
+
+        respuesta = []
+        for indice, (codigo, valor) in enumerate(resultados):
+            clave = 'id' if codigo == status.HTTP_201_CREATED else 'error'
+            respuesta.append({'indice': indice, 'status': codigo,
+                              clave: valor})
+        return JsonResponse(
+            {'resultados': respuesta},
+            status=(status.HTTP_201_CREATED
+                    if len(creados) == len(pedidos)
+                    else status.HTTP_207_MULTI_STATUS))
+
+
+class SolicitudPedidoDetailView(APIView):
+    """Vista para consultar el estado de una creación asíncrona."""
 
-            # Generar el token de autenticación
-            token_response = requests.post(
-                TOKEN_URL,
-                data={'username': API_ARTICULOS['USERNAME'],
-                      'password': API_ARTICULOS['PASSWORD']})
-
-            # Verificación de la respuesta
-            if token_response.status_code != 200:
-                return Response({"error": "No se pudo obtener el token"},
-                                status=token_response.status_code)
-
-            token = token_response.json()['access']
-
-            # Solicitud HTTP para validar y obtener la información
-            headers = {'Authorization': f'Bearer {token}'}
-            response = requests.get(
-                f"{ARTICULOS_SERVICE_URL}{articulo_data['id']}",
-                headers=headers
-            )
-
-            if response.status_code == 404:
-                pedido.delete()
-                return Response({'error': 'Artículo no encontrado.'},
-                                status=status.HTTP_404_NOT_FOUND)
-
-            articulo_info = response.json()
-            precio_sin_impuestos = float(articulo_info['precio_sin_impuestos'])
-            impuesto_aplicable = float(articulo_info['impuesto_aplicable'])
-            cantidad = articulo_data['cantidad']
-            total_sin_impuestos += precio_sin_impuestos * cantidad
-            total_con_impuestos += (precio_sin_impuestos
-                                    + (precio_sin_impuestos
-                                       * impuesto_aplicable / 100)) * cantidad
-
-            # Crear el detalle del pedido con la información obtenida
-            DetallePedido.objects.create(
-                pedido=pedido,
-                articulo_id=articulo_info['id'],
-                articulo_referencia=articulo_info['referencia'],
-                articulo_nombre=articulo_info['nombre'],
-                articulo_precio_sin_impuestos=precio_sin_impuestos,
-                articulo_impuesto_aplicable=impuesto_aplicable,
-                cantidad=cantidad
-            )
-
-        pedido.precio_total_sin_impuestos = total_sin_impuestos
-        pedido.precio_total_con_impuestos = total_con_impuestos
-        pedido.save()
-
-        return Response({'id': pedido.id}, status=status.HTTP_201_CREATED)
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, id) -> JsonResponse:
+        """Devuelve el estado de la solicitud y, cuando se ha completado,
+        el pedido creado."""
+        solicitud = get_object_or_404(SolicitudPedido, id=id)
+        data = {'id': solicitud.id, 'estado': solicitud.estado,
+                'fecha_creacion': solicitud.fecha_creacion}
+        if solicitud.pedido_id is not None:
+            data['pedido'] = solicitud.pedido_id
+            data['pedido_url'] = request.build_absolute_uri(
+                reverse('detalle_pedido', args=[solicitud.pedido_id]))
+        if solicitud.estado == SolicitudPedido.ERROR:
+            data['error'] = solicitud.error
+            data['codigo_error'] = solicitud.codigo_error
+        return JsonResponse(data)
+
+
+class PedidoQuoteView(APIView):
+    """Vista para presupuestar un pedido sin crearlo."""
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request) -> JsonResponse:
+        """Calcula los precios de cada línea y los totales, sin y con
+        impuestos, exactamente como al crear el pedido pero sin escribir
+        nada."""
+        presupuesto, error = _presupuestar(request)
+        if error is not None:
+            return error
+        return JsonResponse(presupuesto.a_dict())
+
+
+def _nueva_linea(pedido: Pedido, articulo_info: dict,
+                 cantidad: int) -> DetallePedido:
+    """Línea de pedido con una copia de los datos actuales del artículo."""
+    return DetallePedido(
+        pedido=pedido,
+        articulo_id=articulo_info['id'],
+        articulo_referencia=articulo_info['referencia'],
+        articulo_nombre=articulo_info['nombre'],
+        articulo_precio_sin_impuestos=desde_centimos(
+            a_centimos(articulo_info['precio_sin_impuestos'])),
+        articulo_impuesto_aplicable=desde_puntos_basicos(
+            a_puntos_basicos(articulo_info['impuesto_aplicable'])),
+        cantidad=cantidad
+    )
+
+
+def _aplicar_lineas(pedido: Pedido, detalles: list, cantidades: dict,
+                    articulos_info: dict) -> list:
+    """Convierte los `detalles` actuales del pedido en una línea por
+    artículo con las `cantidades` pedidas.
+
+    Sólo se escriben las filas que cambian: se borran las líneas de
+    artículos que ya no están (y las repetidas), se actualiza la cantidad
+    de las que cambian y se insertan las nuevas con los datos de
+    `articulos_info`. Las líneas que se mantienen conservan el precio con el
+    que se pidieron. Devuelve las líneas resultantes.
+    """
+    existentes = {}
+    sobrantes = []
+    for detalle in detalles:
+        if (detalle.articulo_id in cantidades
+                and detalle.articulo_id not in existentes):
+            existentes[detalle.articulo_id] = detalle
+        else:
+            sobrantes.append(detalle.id)
+
+    modificadas = []
+    for articulo_id, detalle in existentes.items():
+        if detalle.cantidad != cantidades[articulo_id]:
+            detalle.cantidad = cantidades[articulo_id]
+            modificadas.append(detalle)
+    nuevas = [_nueva_linea(pedido, articulos_info[articulo_id], cantidad)
+              for articulo_id, cantidad in cantidades.items()
+              if articulo_id not in existentes]
+
+    if sobrantes:
+        DetallePedido.objects.filter(id__in=sobrantes).delete()
+    if modificadas:
+        DetallePedido.objects.bulk_update(modificadas, ['cantidad'])
+    if nuevas:
+        DetallePedido.objects.bulk_create(nuevas)
+    return list(existentes.values()) + nuevas
 
 
 class PedidoEditView(APIView):
@@ -95,7 +335,11 @@ class PedidoEditView(APIView):
     permission_classes = [IsAuthenticated]
 
     def put(self, request, id) -> JsonResponse:
-        """Edita un pedido existente."""
+        """Edita un pedido existente.
+
+        Sólo se consultan en Artículos los artículos que se añaden al
+        pedido y sólo se escriben las líneas que cambian.
+        """
 
         data = json.loads(request.body)
         articulos_data = data.get('articulos', [])
@@ -106,77 +350,59 @@ class PedidoEditView(APIView):
             return JsonResponse({'error': 'Debe incluir al menos un artículo'},
                                 status=400)
 
-        # Limpiar los artículos anteriores
-        pedido.detallepedido_set.all().delete()
+        try:
+            articulos_data = normalizar_articulos(articulos_data)
+        except PedidoInvalido as e:
+            return JsonResponse({'error': e.mensaje}, status=e.status_code)
 
         for articulo_data in articulos_data:
-            articulo_id = articulo_data['id']
-            cantidad = articulo_data['cantidad']
-
-            if cantidad <= 0:
+            if articulo_data['cantidad'] <= 0:
                 return JsonResponse({
-                    'error':
-                    f"La cantidad de {articulo_id} debe ser mayor que 0"},
+                    'error': f"La cantidad de {articulo_data['id']} "
+                    "debe ser mayor que 0"},
                     status=400)
 
-            # Generar el token de autenticación
-            token_response = requests.post(
-                TOKEN_URL,
-                data={'username': API_ARTICULOS['USERNAME'],
-                      'password': API_ARTICULOS['PASSWORD']})
-            # Verificación de la respuesta
-            if token_response.status_code != 200:
-                return Response({"error": "No se pudo obtener el token"},
-                                status=token_response.status_code)
-
-            token = token_response.json()['access']
-
-            # Solicitud HTTP para validar y obtener la información
-            headers = {'Authorization': f'Bearer {token}'}
-            articulo_response = requests.get(
-                f"{ARTICULOS_SERVICE_URL}{articulo_id}", headers=headers)
-
-            if articulo_response.status_code != 200:
-                return JsonResponse(
-                    {'error':
-                     f"Artículo con referencia {articulo_id} no encontrado"},
-                    status=404)
-
-            articulo_info = articulo_response.json()
-
-            # Actualizar el artículo en el microservicio de Artículos
-            update_data = {
-                'referencia': articulo_info['referencia'],
-                'nombre': articulo_info['nombre'],
-                'descripcion': articulo_info['descripcion'],
-                'precio_sin_impuestos': articulo_info['precio_sin_impuestos'],
-                'impuesto_aplicable': articulo_info['impuesto_aplicable']
-            }
-
-            articulo_update_response = requests.put(
-                f"{ARTICULOS_SERVICE_URL}{articulo_id}",
-                json=update_data,
-                headers=headers)
-
-            if articulo_update_response.status_code != 200:
-                return JsonResponse({
-                    'error':
-                    f"Error al actualizar el artículo {articulo_id}"},
-                    status=articulo_update_response.status_code)
-
-            DetallePedido.objects.create(
-                pedido=pedido,
-                articulo_id=articulo_id,
-                articulo_referencia=articulo_info['referencia'],
-                articulo_nombre=articulo_info['nombre'],
-                articulo_precio_sin_impuestos=articulo_info[
-                    'precio_sin_impuestos'],
-                articulo_impuesto_aplicable=articulo_info[
-                    'impuesto_aplicable'],
-                cantidad=cantidad
-            )
-
-        pedido.calcular_precio_total()
+        # Cantidad total pedida de cada artículo
+        cantidades = {}
+        for articulo_data in articulos_data:
+            cantidades[articulo_data['id']] = (
+                cantidades.get(articulo_data['id'], 0)
+                + articulo_data['cantidad'])
+
+        client = get_articulos_client()
+        try:
+            # Los datos de los artículos nuevos se piden fuera de la
+            # transacción, para no bloquear el pedido durante la consulta
+            presentes = set(pedido.detallepedido_set.values_list(
+                'articulo_id', flat=True))
+            articulos_info = client.obtener_articulos(
+                articulo_id for articulo_id in cantidades
+                if articulo_id not in presentes)
+
+            with transaction.atomic():
+                pedido = Pedido.objects.select_for_update().get(id=pedido.id)
+                detalles = list(pedido.detallepedido_set.order_by('id'))
+                # Otra edición ha podido quitar líneas mientras tanto
+                presentes = {detalle.articulo_id for detalle in detalles}
+                faltan = [articulo_id for articulo_id in cantidades
+                          if articulo_id not in articulos_info
+                          and articulo_id not in presentes]
+                if faltan:
+                    articulos_info.update(client.obtener_articulos(faltan))
+
+                # Lo que se resta a las ventas: las líneas antes de editarlas
+                cambios = ventas.acumular(detalles, signo=-1)
+                lineas = _aplicar_lineas(pedido, detalles, cantidades,
+                                         articulos_info)
+                ventas.registrar(timezone.localdate(pedido.fecha_creacion),
+                                 ventas.acumular(lineas, cambios))
+                (pedido.precio_total_sin_impuestos,
+                 pedido.precio_total_con_impuestos) = totales_de_detalles(
+                    lineas)
+                pedido.save(update_fields=['precio_total_sin_impuestos',
+                                           'precio_total_con_impuestos'])
+        except ArticulosServiceError as e:
+            return JsonResponse({'error': e.mensaje}, status=e.status_code)
 
         return JsonResponse({
             'id': pedido.id,
@@ -186,40 +412,73 @@ class PedidoEditView(APIView):
                 'nombre': detalle.articulo_nombre,
                 'cantidad': detalle.cantidad,
                 'precio_sin_impuestos': detalle.articulo_precio_sin_impuestos,
-                'precio_con_impuestos': detalle.articulo_precio_sin_impuestos
-                * (1 + detalle.articulo_impuesto_aplicable / 100)
-            } for detalle in pedido.detallepedido_set.all()],
+                'precio_con_impuestos': precio
+            } for detalle, precio in zip(lineas,
+                                         precios_de_detalles(lineas))],
             'precio_total_sin_impuestos': pedido.precio_total_sin_impuestos,
             'precio_total_con_impuestos': pedido.precio_total_con_impuestos,
             'fecha_creacion': pedido.fecha_creacion
         }, status=200)
 
 
+# Campos que se pueden pedir con `?fields=`
+CAMPOS_PEDIDO = ['id', 'articulos', 'precio_total_sin_impuestos',
+                 'precio_total_con_impuestos', 'fecha_creacion']
+
+
+def _consulta_pedidos(campos: Optional[list]):
+    """Queryset de pedidos que sólo lee las columnas de `campos`.
+
+    Los detalles sólo se consultan si se piden los `articulos`.
+    """
+    pedidos = Pedido.objects.all()
+    if campos is None:
+        return pedidos.prefetch_related('detallepedido_set')
+    pedidos = pedidos.only(*[campo for campo in campos
+                             if campo != 'articulos'])
+    if 'articulos' in campos:
+        pedidos = pedidos.prefetch_related('detallepedido_set')
+    return pedidos
+
+
+def _serializar_pedido(pedido: Pedido, campos: Optional[list]) -> dict:
+    """Convierte un pedido en un diccionario con los campos pedidos."""
+    data = {'id': pedido.id}
+    if campos is None or 'articulos' in campos:
+        detalles = pedido.detallepedido_set.all()
+        data['articulos'] = [{
+            'referencia': detalle.articulo_referencia,
+            'nombre': detalle.articulo_nombre,
+            'cantidad': detalle.cantidad,
+            'precio_sin_impuestos': detalle.articulo_precio_sin_impuestos,
+            'precio_con_impuestos': precio
+        } for detalle, precio in zip(detalles,
+                                     precios_de_detalles(detalles))]
+    for campo in CAMPOS_PEDIDO[2:]:
+        if campos is None or campo in campos:
+            data[campo] = getattr(pedido, campo)
+    return data
+
+
 class PedidoDetailView(APIView):
     """Vista para obtener un pedido por su ID."""
 
     permission_classes = [IsAuthenticated]
 
     def get(self, request, id) -> JsonResponse:
-        """Obtiene el detalle de un pedido."""
+        """Obtiene el detalle de un pedido.
 
-        pedido = get_object_or_404(Pedido, id=id)
-        detalles = pedido.detallepedido_set.all()
+        Con `?fields=` sólo se leen de la base de datos los campos pedidos.
+        """
 
-        return JsonResponse({
-            'id': pedido.id,
-            'articulos': [{
-                'referencia': detalle.articulo_referencia,
-                'nombre': detalle.articulo_nombre,
-                'cantidad': detalle.cantidad,
-                'precio_sin_impuestos': detalle.articulo_precio_sin_impuestos,
-                'precio_con_impuestos': detalle.articulo_precio_sin_impuestos
-                * (1 + detalle.articulo_impuesto_aplicable / 100)
-            } for detalle in detalles],
-            'precio_total_sin_impuestos': pedido.precio_total_sin_impuestos,
-            'precio_total_con_impuestos': pedido.precio_total_con_impuestos,
-            'fecha_creacion': pedido.fecha_creacion
-        })
+        try:
+            campos = campos_solicitados(request.GET, CAMPOS_PEDIDO)
+        except CamposInvalidos as e:
+            return JsonResponse({'error': str(e)},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        pedido = get_object_or_404(_consulta_pedidos(campos), id=id)
+        return JsonResponse(_serializar_pedido(pedido, campos))
 
 
 class PedidoListView(APIView):
@@ -227,22 +486,147 @@ class PedidoListView(APIView):
 
     permission_classes = [IsAuthenticated]
 
+    # Tamaño de página por defecto y máximo permitido con `?page_size=`
+    page_size = 50
+    max_page_size = 500
+
     def get(self, request) -> JsonResponse:
-        """Obtiene todos los pedidos."""
+        """Obtiene una página de pedidos.
+
+        La página siguiente se pide con `?cursor=<siguiente_cursor>`. Con
+        `?fields=` sólo se leen de la base de datos los campos pedidos. Los
+        pedidos se pueden filtrar por fecha (`?desde=`, `?hasta=`), artículo
+        (`?articulo_id=`, `?articulo_referencia=`) y total con impuestos
+        (`?total_min=`, `?total_max=`).
+        """
+
+        try:
+            campos = campos_solicitados(request.GET, CAMPOS_PEDIDO)
+            pedidos, siguiente_cursor = paginar_por_id(
+                filtrar_pedidos(_consulta_pedidos(campos), request.GET),
+                request.GET, self.page_size, self.max_page_size)
+        except (CamposInvalidos, FiltrosInvalidos, PaginacionInvalida) as e:
+            return JsonResponse({'error': str(e)},
+                                status=status.HTTP_400_BAD_REQUEST)
 
-        pedidos = Pedido.objects.all()
+        return JsonResponse({
+            'pedidos': [_serializar_pedido(pedido, campos)
+                        for pedido in pedidos],
+            'siguiente_cursor': siguiente_cursor
+        })
 
-        return JsonResponse([{
-            'id': pedido.id,
-            'articulos': [{
-                'referencia': detalle.articulo_referencia,
-                'nombre': detalle.articulo_nombre,
-                'cantidad': detalle.cantidad,
-                'precio_sin_impuestos': detalle.articulo_precio_sin_impuestos,
-                'precio_con_impuestos': detalle.articulo_precio_sin_impuestos
-                * (1 + detalle.articulo_impuesto_aplicable / 100)
-            } for detalle in pedido.detallepedido_set.all()],
-            'precio_total_sin_impuestos': pedido.precio_total_sin_impuestos,
-            'precio_total_con_impuestos': pedido.precio_total_con_impuestos,
-            'fecha_creacion': pedido.fecha_creacion
-        } for pedido in pedidos], safe=False)
+
+class PedidoExportView(APIView):
+    """Vista para exportar todos los pedidos y sus líneas."""
+
+    permission_classes = [IsAuthenticated]
+
+    TIPOS_CONTENIDO = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv',
+    }
+
+    def get(self, request) -> StreamingHttpResponse:
+        """Exporta los pedidos en NDJSON o CSV (`?formato=`), opcionalmente
+        filtrados por fecha de creación (`?desde=` y `?hasta=`)."""
+
+        formato = request.GET.get('formato', 'ndjson')
+        if formato not in FORMATOS:
+            return JsonResponse(
+                {'error': f"Formato no soportado: {formato}"},
+                status=status.HTTP_400_BAD_REQUEST)
+        try:
+            desde = parsear_fecha(request.GET.get('desde'))
+            hasta = parsear_fecha(request.GET.get('hasta'), fin=True)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            exportar(formato, desde, hasta),
+            content_type=self.TIPOS_CONTENIDO[formato])
+        response['Content-Disposition'] = \
+            f'attachment; filename="pedidos.{formato}"'
+        return response
+
+
+def _parsear_dia(valor: Optional[str],
+                 defecto: datetime.date) -> datetime.date:
+    """Convierte `YYYY-MM-DD` en una fecha, o devuelve `defecto`."""
+    if not valor:
+        return defecto
+    try:
+        dia = parse_date(valor)
+    except ValueError:
+        # Bien formada pero inexistente, como 2024-02-30
+        dia = None
+    if dia is None:
+        raise ValueError(f"Fecha no válida: {valor}")
+    return dia
+
+
+class VentasArticulosView(APIView):
+    """Vista para consultar las ventas por artículo entre dos fechas."""
+
+    permission_classes = [IsAuthenticated]
+    DIAS_DEFECTO = 30
+    MAX_TOP = 100
+    ORDENES = ('importe', 'unidades')
+
+    def get(self, request) -> JsonResponse:
+        """Devuelve las unidades y el importe sin impuestos vendidos entre
+        `?desde=` y `?hasta=` (incluidos, por defecto los últimos 30 días),
+        por día y de los `?top=` artículos que más venden (`?orden=importe`
+        o `unidades`).
+
+        Se calcula con las ventas diarias ya agregadas, sin leer las líneas
+        de los pedidos.
+        """
+        try:
+            hasta = _parsear_dia(request.GET.get('hasta'),
+                                 timezone.localdate())
+            desde = _parsear_dia(
+                request.GET.get('desde'),
+                hasta - datetime.timedelta(days=self.DIAS_DEFECTO - 1))
+        except ValueError as e:
+            return JsonResponse({'error': str(e)},
+                                status=status.HTTP_400_BAD_REQUEST)
+        if desde > hasta:
+            return JsonResponse(
+                {'error': '`desde` no puede ser posterior a `hasta`.'},
+                status=status.HTTP_400_BAD_REQUEST)
+        top = request.GET.get('top', '10')
+        if not top.isdigit() or not 0 < int(top) <= self.MAX_TOP:
+            return JsonResponse(
+                {'error': f"`top` debe ser un entero entre 1 y "
+                          f"{self.MAX_TOP}."},
+                status=status.HTTP_400_BAD_REQUEST)
+        top = int(top)
+        orden = request.GET.get('orden', 'importe')
+        if orden not in self.ORDENES:
+            return JsonResponse(
+                {'error': f"`orden` debe ser {' o '.join(self.ORDENES)}."},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        return JsonResponse({'desde': desde, 'hasta': hasta,
+                             **ventas.resumen(desde, hasta, top, orden)})
+
+
+class ArticulosCacheStatsView(APIView):
+    """Vista para consultar las métricas de la caché local de artículos."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request) -> Response:
+        """Devuelve tamaño, aciertos, fallos y expulsiones de la caché, el
+        uso del snapshot del catálogo si está configurado, el estado y las
+        transiciones del circuito y los duplicados del hedging."""
+        client = get_articulos_client()
+        return Response({
+            **client.cache.estadisticas(),
+            'circuito': client.circuito.estadisticas(),
+            'hedging': (client.hedging.estadisticas()
+                        if client.hedging is not None else None),
+            'snapshot': (client.catalogo.estadisticas()
+                         if client.catalogo is not None else None),
+        })